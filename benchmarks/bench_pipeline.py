@@ -0,0 +1,332 @@
+"""Benchmark the overhead of bloodytools itself in the simulator pipeline.
+
+    python -m benchmarks.bench_pipeline [--simulators NAME ...] [--repeat N] [--tolerance F] [--history PATH] [--no_record]
+
+Each registered simulator runs as a regular job against the stub
+SimulationCraft in tests/fake_simc.py, which answers every profileset file
+with a deterministic report right away. All specs get a generated profile
+based on a fallback profile, so profile extraction, Simulation_Data
+construction, profileset file writing, json parsing, and data collection
+run at the profile counts of real runs. Phases are timed by the spans of
+bloodytools.utils.tracing, time spent inside the stub is not counted as
+overhead.
+
+Results are appended to a history file. A simulator whose overhead is
+more than tolerance slower than the median of its previous runs on the
+same machine is a regression, the benchmark exits with 1 and the run is
+not recorded.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+from unittest import mock
+
+from bloodytools.simulations import simulator_factory
+from bloodytools.simulations.simulator import Simulator
+from bloodytools.utils import profile_extraction, tracing
+from bloodytools.utils.config import Config
+from bloodytools.utils.scheduler import JobScheduler
+from simc_support.game_data.WowSpec import WOWSPECS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_SIMC = os.path.join(ROOT, "tests", "fake_simc.py")
+TEMPLATE_PROFILE = os.path.join(
+    ROOT,
+    "fallback_profiles",
+    "castingpatchwerk5",
+    "MID2",
+    "MID2_Warlock_Affliction.simc",
+)
+HISTORY = os.path.join(ROOT, "benchmarks", "history.jsonl")
+
+WOW_SPEC = ("death_knight", "unholy")
+"""Spec of single spec simulators. A melee spec with the most talent tree paths."""
+FIGHT_STYLE = "patchwerk"
+PHASES = (
+    "extract_profile",
+    "add_simulation_data",
+    "write_profileset_file",
+    "parse_json",
+    "_collect_data",
+    "_write",
+)
+BASELINE_RUNS = 5
+"""Previous runs whose median is the baseline of the regression check."""
+MIN_REGRESSION = 0.005
+"""Seconds, smaller differences are noise."""
+
+
+def write_profiles(directory: str) -> typing.Callable[..., str]:
+    """Write a profile for each spec into directory. Items and options are
+    taken from a fallback profile.
+
+    Returns:
+        typing.Callable[..., str]: replacement of create_fallback_profile_path
+    """
+    with open(TEMPLATE_PROFILE) as f:
+        template = [
+            line
+            for line in f
+            if not line.startswith(("warlock=", "spec=", "warlock.", "omnium"))
+        ]
+    for wow_spec in WOWSPECS:
+        with open(os.path.join(directory, f"{wow_spec.full_name}.simc"), "w") as f:
+            f.write(f'{wow_spec.wow_class.simc_name}="bench_{wow_spec.simc_name}"\n')
+            f.write(f"spec={wow_spec.simc_name}\n")
+            f.writelines(template)
+
+    def create_fallback_profile_path(wow_spec, tier: str, fight_style: str) -> str:
+        return os.path.join(directory, f"{wow_spec.full_name}.simc")
+
+    return create_fallback_profile_path
+
+
+def get_union_duration(intervals: typing.List[typing.Tuple[float, float]]) -> float:
+    """Seconds covered by at least one of the (start, end) intervals."""
+    duration = 0.0
+    end = float("-inf")
+    for interval_start, interval_end in sorted(intervals):
+        if interval_end <= end:
+            continue
+        duration += interval_end - max(interval_start, end)
+        end = interval_end
+    return duration
+
+
+def evaluate_trace(path: str) -> dict:
+    """Overhead, phase durations, and profile count of a traced job."""
+    with open(path) as f:
+        spans: typing.List[dict] = [
+            event for event in map(json.loads, f) if event["ph"] == "X"
+        ]
+
+    def seconds(name: str) -> float:
+        return float(sum(span["dur"] for span in spans if span["name"] == name)) / 1e6
+
+    job = next(span for span in spans if span["name"] == "job")
+    simc = get_union_duration(
+        [
+            (span["ts"] / 1e6, (span["ts"] + span["dur"]) / 1e6)
+            for span in spans
+            if span["name"] == "simc"
+        ]
+    )
+    return {
+        "success": job["args"]["success"],
+        "profiles": sum(
+            span["args"].get("profiles", 0)
+            for span in spans
+            if span["name"] == "simulate"
+        ),
+        "simc": simc,
+        "overhead": job["dur"] / 1e6 - simc,
+        "phases": {phase: seconds(phase) for phase in PHASES},
+    }
+
+
+def run_simulator(name: str, trace_file: str) -> dict:
+    """Run the job of simulator name once and evaluate its trace."""
+    # measure parsing, not the memos of earlier runs
+    profile_extraction._parsed_profiles.clear()
+    Simulator._profiles.clear()
+
+    config = Config(
+        executable=FAKE_SIMC,
+        simc_hash="benchmark",
+        result_cache=False,
+        job_journal="",
+        wow_class_spec_names=[WOW_SPEC],
+        simulator_type_names=[name],
+        fight_styles=[FIGHT_STYLE],
+    )
+    tracing.start_tracing(trace_file)
+    try:
+        JobScheduler(config, simulator_factory).run()
+    finally:
+        tracing.stop_tracing()
+    return evaluate_trace(trace_file)
+
+
+def benchmark(names: typing.List[str], repeat: int) -> typing.Dict[str, dict]:
+    """Median of repeat runs of each simulator."""
+    results = {}
+    with contextlib.ExitStack() as stack:
+        tmp_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        cwd = os.getcwd()
+        stack.callback(os.chdir, cwd)
+        os.chdir(tmp_dir)
+        # progress lines of simulations
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        # talent simulators look for a custom profile
+        open("custom_profile.txt", "w").close()
+        os.mkdir("profiles")
+        stack.enter_context(
+            mock.patch.object(
+                profile_extraction,
+                "create_fallback_profile_path",
+                write_profiles(os.path.abspath("profiles")),
+            )
+        )
+
+        for name in names:
+            runs = [
+                run_simulator(name, os.path.join(tmp_dir, f"{name}_{i}.jsonl"))
+                for i in range(repeat)
+            ]
+            results[name] = {
+                "success": all(run["success"] for run in runs),
+                "profiles": runs[0]["profiles"],
+                "simc": statistics.median(run["simc"] for run in runs),
+                "overhead": statistics.median(run["overhead"] for run in runs),
+                "phases": {
+                    phase: statistics.median(run["phases"][phase] for run in runs)
+                    for phase in PHASES
+                },
+            }
+    return results
+
+
+def get_machine() -> str:
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}|{platform.python_version()}"
+
+
+def read_history(path: str) -> typing.List[dict]:
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def find_regressions(
+    results: typing.Dict[str, dict],
+    history: typing.List[dict],
+    machine: str,
+    tolerance: float,
+) -> typing.Dict[str, typing.Tuple[float, float]]:
+    """Simulators whose overhead exceeds the median of their last runs on
+    machine by more than tolerance.
+
+    Returns:
+        typing.Dict[str, typing.Tuple[float, float]]: simulator name -> (baseline, overhead)
+    """
+    regressions = {}
+    for name, result in results.items():
+        previous = [
+            entry["results"][name]["overhead"]
+            for entry in history
+            if entry["machine"] == machine and name in entry["results"]
+        ][-BASELINE_RUNS:]
+        if not previous:
+            continue
+        baseline = statistics.median(previous)
+        overhead = result["overhead"]
+        if (
+            overhead > baseline * (1 + tolerance)
+            and overhead - baseline > MIN_REGRESSION
+        ):
+            regressions[name] = (baseline, overhead)
+    return regressions
+
+
+def get_revision() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return ""
+
+
+def main(arguments: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--simulators",
+        nargs="*",
+        default=[],
+        help="Simulators to run. Default: all registered simulators",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs of each simulator. Default: 3"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown against the history before a run fails. Default: 0.25",
+    )
+    parser.add_argument(
+        "--history", default=HISTORY, help=f"History file. Default: '{HISTORY}'"
+    )
+    parser.add_argument(
+        "--no_record",
+        action="store_true",
+        help="Compare against the history without adding this run.",
+    )
+    args = parser.parse_args(arguments)
+
+    names = args.simulators or [
+        simulator.snake_case_name() for simulator in simulator_factory.list_simulators()
+    ]
+    start = time.perf_counter()
+    results = benchmark(names, args.repeat)
+
+    print(f"{'simulator':<24} {'profiles':>8} {'overhead':>9} {'simc':>9}  phases")
+    for name, result in results.items():
+        phases = ", ".join(
+            f"{phase} {seconds * 1000:.1f}"
+            for phase, seconds in result["phases"].items()
+            if seconds
+        )
+        print(
+            f"{name:<24} {result['profiles']:>8} {result['overhead'] * 1000:>7.1f}ms "
+            f"{result['simc'] * 1000:>7.1f}ms  {phases or '-'}"
+            + ("" if result["success"] else "  FAILED")
+        )
+    print(f"Benchmark took {time.perf_counter() - start:.1f} s")
+
+    machine = get_machine()
+    failed = [name for name, result in results.items() if not result["success"]]
+    regressions = find_regressions(
+        results, read_history(args.history), machine, args.tolerance
+    )
+    for name, (baseline, overhead) in regressions.items():
+        print(
+            f"Regression of {name}: {overhead * 1000:.1f} ms overhead, "
+            f"{baseline * 1000:.1f} ms before"
+        )
+    for name in failed:
+        print(f"Job of {name} failed.")
+    if regressions or failed:
+        return 1
+
+    if not args.no_record:
+        with open(args.history, "a") as f:
+            entry = {
+                "time": datetime.datetime.utcnow().isoformat(),
+                "revision": get_revision(),
+                "machine": machine,
+                "repeat": args.repeat,
+                "results": results,
+            }
+            f.write(json.dumps(entry) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Benchmark profile extraction over all fallback profiles and, if a
+SimulationCraft directory is given, over its `profiles/` directory.
+
+    python -m benchmarks.bench_profile_extraction [--simc_dir SIMC_DIR] [--repeat N]
+
+Parsed profiles are memoized, the memo is cleared before each file so the
+parser itself is measured.
+"""
+
+import argparse
+import glob
+import os
+import time
+import typing
+
+from bloodytools.utils import profile_extraction
+from bloodytools.utils.profile_extraction import (
+    CharacterSource,
+    IncompleteProfileError,
+    extract_profile,
+)
+from simc_support.game_data.WowClass import WOWCLASSES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def find_profiles(simc_dir: str) -> typing.List[str]:
+    paths = glob.glob(
+        os.path.join(ROOT, "fallback_profiles", "**", "*.simc"), recursive=True
+    )
+    if simc_dir:
+        paths += glob.glob(
+            os.path.join(simc_dir, "profiles", "**", "*.simc"), recursive=True
+        )
+    return sorted(paths)
+
+
+def parse_all(paths: typing.List[str]) -> int:
+    """Parse all paths, returns the number of complete profiles."""
+    parsed = 0
+    for path in paths:
+        profile_extraction._parsed_profiles.clear()
+        try:
+            extract_profile(path, WOWCLASSES[0], CharacterSource.SIMULATIONCRAFT)
+        except IncompleteProfileError:
+            continue
+        parsed += 1
+    return parsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--simc_dir", default="", help="SimulationCraft directory. Default: ''"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Parse all files N times. Default: 20"
+    )
+    args = parser.parse_args()
+
+    paths = find_profiles(args.simc_dir)
+    lines = 0
+    for path in paths:
+        with open(path) as f:
+            lines += sum(1 for _ in f)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        parsed = parse_all(paths)
+    duration = time.perf_counter() - start
+
+    print(f"{len(paths)} files ({parsed} complete profiles), {lines} lines")
+    print(
+        f"{duration / args.repeat * 1000:.2f} ms per pass, "
+        f"{duration / args.repeat / max(1, len(paths)) * 1e6:.0f} us per file"
+    )
+
+
+if __name__ == "__main__":
+    main()
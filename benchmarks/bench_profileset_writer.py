@@ -0,0 +1,78 @@
+"""Benchmark writing the profileset file of a large Simulation_Group.
+
+    python -m benchmarks.bench_profileset_writer [--profiles N] [--repeat N]
+
+Profiles resemble secondary distributions of talent builds: a class
+declaration, talents, clear_talents, a potion and gear stats each.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from bloodytools.utils.simulation_objects import Simulation_Data, Simulation_Group
+
+PROFILE = {
+    "character": {
+        "class": "shaman",
+        "spec": "elemental",
+        "level": "80",
+        "race": "orc",
+        "role": "spell",
+    },
+    "items": {
+        "head": {"id": "212011", "bonus_id": "4800/4786"},
+        "main_hand": {"id": "222566", "enchant_id": "7460"},
+    },
+}
+
+
+def create_group(profiles: int, base_filename: str) -> Simulation_Group:
+    group = Simulation_Group(executable="simc", base_filename=base_filename)
+    group.add(Simulation_Data(name="baseline", profile=PROFILE))
+    for i in range(1, profiles):
+        group.add(
+            Simulation_Data(
+                name=f"build_{i % 50}_{i}",
+                profile=PROFILE,
+                simc_arguments=[
+                    "shaman=baseline",
+                    "clear_talents=1",
+                    f"talents=BYQAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA{i % 50}",
+                    "potion=tempered_potion_3",
+                    f"gear_crit_rating={i % 100 * 50}",
+                    f"gear_haste_rating={5000 - i % 100 * 50}",
+                    "# comments are dropped",
+                ],
+            )
+        )
+    group.filename = base_filename + ".simc"
+    return group
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--profiles", type=int, default=10000, help="Profiles per group. Default: 10000"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Write the file N times. Default: 5"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        group = create_group(args.profiles, os.path.join(tmp_dir, "group"))
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            group.write_profileset_file(fight_style="patchwerk", special_remark="")
+        duration = (time.perf_counter() - start) / args.repeat
+        size = os.path.getsize(group.filename)
+
+    print(f"{args.profiles} profiles, {size / 1024**2:.1f} MiB profileset file")
+    print(f"{duration * 1000:.1f} ms per write")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,26 @@
 import logging
+import sys
 
 from bloodytools.main import main
-from bloodytools.utils.args import arg_parse_config
+from bloodytools.utils.args import arg_parse_config, arg_parse_worker
+from bloodytools.utils.distributed import Worker
 from bloodytools.utils.utils import logger_config
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["worker"]:
+        worker_args = arg_parse_worker(sys.argv[2:])
+
+        logger_config(logging.getLogger("bloodytools"), worker_args.debug)
+
+        Worker(
+            worker_args.coordinator,
+            worker_args.executable,
+            threads=worker_args.threads,
+            name=worker_args.name,
+            simc_hash=worker_args.simc_hash,
+        ).run()
+        sys.exit()
+
     args = arg_parse_config()
 
     logger_config(logging.getLogger("bloodytools"), args.debug)
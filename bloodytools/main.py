@@ -22,7 +22,11 @@ import logging
 
 from bloodytools.simulations import simulator_factory
 from bloodytools.utils.args import arg_parse_config
+from bloodytools.utils.backends import close_simulation_backends
 from bloodytools.utils.config import Config
+from bloodytools.utils.journal import get_job_journal
+from bloodytools.utils.scheduler import JobScheduler, JobsFailedError
+from bloodytools.utils.tracing import start_tracing, stop_tracing
 
 logger = logging.getLogger(__name__)
 
@@ -40,23 +44,16 @@ def main(args=None):
 
     bloodytools_start_time = datetime.datetime.utcnow()
 
-    for wow_spec in config.wow_specs:
-        for simulator_name in config.simulator_type_names:
-            simulator = simulator_factory.get_simulator(simulator_name)
-            for fight_style in config.fight_styles:
-                logger.info(
-                    f"Starting {simulator.name()} simulation for {wow_spec} fighting {fight_style}."
-                )
-                try:
-                    simulator(
-                        wow_spec=wow_spec,
-                        fight_style=fight_style,
-                        settings=config,
-                    ).run()
-                except Exception as e:
-                    logger.exception(e)
-                    raise e
-                logger.info(f"{simulator.name()} simulations finished.")
+    if config.trace_file:
+        start_tracing(config.trace_file)
+    try:
+        results = JobScheduler(
+            config, simulator_factory, journal=get_job_journal(config)
+        ).run()
+    finally:
+        close_simulation_backends()
+        stop_tracing()
+    failed_results = [result for result in results if not result.success]
 
     logger.info(
         "Bloodytools took {} to finish.".format(
@@ -65,6 +62,9 @@ def main(args=None):
     )
     logger.debug("main ended")
 
+    if failed_results:
+        raise JobsFailedError(failed_results)
+
 
 if __name__ == "__main__":
     args = arg_parse_config()
@@ -9,9 +9,9 @@ import typing
 
 from bloodytools.utils.simulation_objects import Simulation_Data, Simulation_Group
 from bloodytools.simulations.simulator import Simulator
-from bloodytools.utils.utils import create_base_json_dict
-from bloodytools.utils.profile_extraction import get_profile
-from simc_support.game_data.WowSpec import WOWSPECS
+from bloodytools.utils.tracing import span
+from bloodytools.utils.scheduler import run_concurrently
+from simc_support.game_data.WowSpec import WOWSPECS, WowSpec
 
 logger = logging.getLogger(__name__)
 
@@ -114,65 +114,69 @@ class PowerInfusionSimulator(Simulator):
         logger.debug("talent_simulations end")
         return data_dict
 
-    def run(self) -> None:
-        """Manages the simulation flow. You can adjust by overwriting the provided methods."""
-        logger.debug(f"Start pipeline for {self.name()} of {self.wow_spec}")
-        data_dict = create_base_json_dict(
-            self.name(), self.wow_spec, self.fight_style, self.settings
-        )
-
-        del data_dict["profile"]
+    def get_fingerprint_profiles(self) -> typing.Dict[str, dict]:
+        return {
+            str(spec): profile for spec, profile in self.load_profiles(WOWSPECS).items()
+        }
 
-        logger.debug("Starting pre processing")
-        data_dict = self.pre_processing(data_dict)
+    def _run(self) -> None:
+        data_dict = self._create_base_json_dict()
 
-        for spec in WOWSPECS:
-            try:
-                profile = get_profile(spec, self.fight_style, self.settings)
-            except FileNotFoundError:
-                logger.warning(f"Profile for {spec} was not found. Skipping.")
-                continue
-
-            simulation_group = Simulation_Group(
-                name="simulation_group",
-                threads=self.settings.threads,
-                profileset_work_threads=self.settings.profileset_work_threads,
-                executable=self.settings.executable,
-                remove_files=not self.settings.keep_files,
-            )
+        del data_dict["profile"]
 
-            for pi_name, pi_override in PI_OPTIONS.items():
-                pi_override = pi_override.copy()
+        data_dict = self._pre_processing(data_dict)
 
-                full_spec_name = " ".join([spec.full_name, spec.wow_class.full_name])
-                if pi_name == PowerInfusionEnum.NO_PI.value:
-                    full_spec_name = f"{{{full_spec_name}}}"
+        target_error = self.settings.target_error.get(self.fight_style, "0.1")
+        profiles = self.load_profiles(WOWSPECS)
+        workers, threads = self.get_concurrency(len(profiles))
 
-                simulation_data = Simulation_Data(
-                    name=full_spec_name,
-                    fight_style=self.fight_style,
-                    profile=profile,
-                    simc_arguments=pi_override,
-                    target_error=self.settings.target_error.get(
-                        self.fight_style, "0.1"
-                    ),
-                    ptr=self.settings.ptr,
-                    default_actions=self.settings.default_actions,
-                    executable=self.settings.executable,
-                    iterations=self.settings.iterations,
-                    remove_files=not self.settings.keep_files,
-                    generate_html=self.settings.html,
+        with span("add_simulation_data") as tags:
+            simulation_groups: typing.Dict[WowSpec, Simulation_Group] = {}
+            for spec, profile in profiles.items():
+                simulation_group = self.create_simulation_group(
+                    name=str(spec), threads=threads
                 )
 
-                simulation_group.add(simulation_data)
+                for pi_name, pi_override in PI_OPTIONS.items():
+                    pi_override = pi_override.copy()
+
+                    full_spec_name = " ".join(
+                        [spec.full_name, spec.wow_class.full_name]
+                    )
+                    if pi_name == PowerInfusionEnum.NO_PI.value:
+                        full_spec_name = f"{{{full_spec_name}}}"
+
+                    simulation_data = Simulation_Data(
+                        name=full_spec_name,
+                        fight_style=self.fight_style,
+                        profile=profile,
+                        simc_arguments=pi_override,
+                        target_error=target_error,
+                        ptr=self.settings.ptr,
+                        default_actions=self.settings.default_actions,
+                        executable=self.settings.executable,
+                        iterations=self.settings.iterations,
+                        remove_files=not self.settings.keep_files,
+                        generate_html=self.settings.html,
+                    )
+
+                    simulation_group.add(simulation_data)
+
+                simulation_groups[spec] = simulation_group
+            tags["profiles"] = sum(
+                len(group.profiles) for group in simulation_groups.values()
+            )
 
-            logger.info(f"Simulating {spec}.")
-            if self.settings.use_raidbots and self.settings.apikey:
-                self.settings.simc_hash = simulation_group.simulate_with_raidbots(
-                    self.settings.apikey
-                )
-            else:
-                simulation_group.simulate()
+        logger.info(
+            f"Simulating {len(simulation_groups)} specs, {workers} at a time with {threads} threads each."
+        )
+        errors = self.simulate_groups(list(simulation_groups.values()), workers)
+
+        fallbacks: typing.Dict[WowSpec, Simulation_Data] = {}
+        for (spec, simulation_group), error in zip(simulation_groups.items(), errors):
+            if error:
+                self.add_failed_spec(data_dict, spec, error)
+                continue
 
             data = self._collect_data(simulation_group, self.settings.data_type)
 
@@ -181,38 +185,41 @@ class PowerInfusionSimulator(Simulator):
             # detect handle profiles without PI apl
             min_dps = min([p.get_dps() for p in simulation_group.profiles])
             max_dps = max([p.get_dps() for p in simulation_group.profiles])
-            if (max_dps - min_dps) * 100 / max_dps < float(
-                self.settings.target_error.get(self.fight_style, "0.1")
-            ) * 2:
+            if (max_dps - min_dps) * 100 / max_dps < float(target_error) * 2:
                 logger.info(
                     f"Profile for {spec} does not have a PI line. Falling back to hardcoded timing."
                 )
-                profile_name = " ".join([spec.full_name, spec.wow_class.full_name])
-                simulation_data = Simulation_Data(
-                    name=profile_name,
+                fallbacks[spec] = Simulation_Data(
+                    name=" ".join([spec.full_name, spec.wow_class.full_name]),
                     fight_style=self.fight_style,
-                    profile=profile,
+                    profile=profiles[spec],
                     simc_arguments=["external_buffs.power_infusion=1/121/241"],
-                    target_error=self.settings.target_error.get(
-                        self.fight_style, "0.1"
-                    ),
+                    target_error=target_error,
                     ptr=self.settings.ptr,
                     default_actions=self.settings.default_actions,
                     executable=self.settings.executable,
                     iterations=self.settings.iterations,
                     remove_files=not self.settings.keep_files,
                     generate_html=self.settings.html,
+                    threads=threads,
                 )
 
-                fallback_data = simulation_data.simulate()
-                data_dict["data"][profile_name] = fallback_data
+        errors = run_concurrently(Simulation_Data.simulate, fallbacks.values(), workers)
+        for (spec, simulation_data), error in zip(fallbacks.items(), errors):
+            profile_name = simulation_data.name
+            if error:
+                self.add_failed_spec(data_dict, spec, error)
+                data_dict["data"].pop(profile_name, None)
+                data_dict["data"].pop(f"{{{profile_name}}}", None)
+                continue
+
+            data_dict["data"][profile_name] = simulation_data.get_dps()
 
-                non_apl_key = "profile_without_pi_support"
-                if non_apl_key not in data_dict:
-                    data_dict[non_apl_key] = []
-                data_dict[non_apl_key].append(profile_name)
+            non_apl_key = "profile_without_pi_support"
+            if non_apl_key not in data_dict:
+                data_dict[non_apl_key] = []
+            data_dict[non_apl_key].append(profile_name)
 
-        logger.debug("Starting post processing")
-        data_dict = self.post_processing(data_dict)
+        data_dict = self._post_processing(data_dict)
 
         self._write(data_dict)
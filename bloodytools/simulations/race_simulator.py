@@ -19,6 +19,10 @@ class RaceSimulator(Simulator):
         profile = data_dict["profile"]
 
         for race in self.wow_spec.wow_class.races:
+            # races of both factions, e.g. Pandaren, are listed twice
+            if simulation_group.get_profile(race.full_name):
+                continue
+
             simulation_data = Simulation_Data(
                 name=race.full_name,
                 fight_style=self.fight_style,
@@ -6,6 +6,7 @@ import typing
 
 from bloodytools.simulations.simulator import Simulator
 from bloodytools.utils.simulation_objects import (
+    Profileset_Data,
     Simulation_Data,
     Simulation_Group,
     SimulationError,
@@ -190,66 +191,57 @@ class SecondaryDistributionSimulator(Simulator):
             "hero_talents=",
         ]
 
+        # the first distribution is the base of all others, otherwise the
+        # expanded profile is repeated for each of thousands of distributions
+        base: typing.Optional[Simulation_Data] = None
         for human_name, talent_combination in talent_combinations.items():
             for crit, haste, mastery, vers in distribution_multipliers:
-                s_o = Simulation_Data(
-                    name="{}{}{}_{}_{}_{}".format(
-                        human_name,
-                        self.profile_split_character(),
-                        crit,
-                        haste,
-                        mastery,
-                        vers,
+                name = "{}{}{}_{}_{}_{}".format(
+                    human_name,
+                    self.profile_split_character(),
+                    crit,
+                    haste,
+                    mastery,
+                    vers,
+                )
+                simc_arguments = [
+                    *clear_talents,
+                    *[str(part) for part in talent_combination],
+                    "gear_crit_rating={}".format(int(secondaries * (crit / 100))),
+                    "gear_haste_rating={}".format(int(secondaries * (haste / 100))),
+                    "gear_mastery_rating={}".format(int(secondaries * (mastery / 100))),
+                    "gear_versatility_rating={}".format(
+                        int(secondaries * (vers / 100))
                     ),
+                    # Force everyone to use primary stat pot. Otherwise
+                    # the dps data could get exacerbated by a flip-flopping
+                    # pot.
+                    "potion=lights_potential_2",
+                ]
+
+                if base:
+                    simulation_group.add(
+                        Profileset_Data(base, name, simc_arguments=simc_arguments)
+                    )
+                    continue
+
+                base = Simulation_Data(
+                    name=name,
                     fight_style=self.fight_style,
                     target_error=self.settings.target_error.get(
                         self.fight_style, "0.1"
                     ),
                     iterations=self.settings.iterations,
                     profile=data_dict["profile"],
-                    simc_arguments=[
-                        *clear_talents,
-                        *[str(part) for part in talent_combination],
-                        "gear_crit_rating={}".format(int(secondaries * (crit / 100))),
-                        "gear_haste_rating={}".format(int(secondaries * (haste / 100))),
-                        "gear_mastery_rating={}".format(
-                            int(secondaries * (mastery / 100))
-                        ),
-                        "gear_versatility_rating={}".format(
-                            int(secondaries * (vers / 100))
-                        ),
-                        # Force everyone to use primary stat pot. Otherwise
-                        # the dps data could get exacerbated by a flip-flopping
-                        # pot.
-                        "potion=lights_potential_2",
-                    ],
+                    simc_arguments=simc_arguments,
                     ptr=self.settings.ptr,
                     default_actions=self.settings.default_actions,
                     executable=self.settings.executable,
                     generate_html=self.settings.html,
-                    load_custom_apl=(
-                        self.settings.custom_apl
-                        if (crit, haste, mastery, vers) == distribution_multipliers[0]
-                        and (
-                            human_name,
-                            talent_combination,
-                        )
-                        == list(talent_combinations.items())[0]
-                        else False
-                    ),
-                    load_custom_fight_style=(
-                        self.settings.custom_fight_style
-                        if (crit, haste, mastery, vers) == distribution_multipliers[0]
-                        and (
-                            human_name,
-                            talent_combination,
-                        )
-                        == list(talent_combinations.items())[0]
-                        else False
-                    ),
+                    load_custom_apl=self.settings.custom_apl,
+                    load_custom_fight_style=self.settings.custom_fight_style,
                 )
-
-                simulation_group.add(s_o)
+                simulation_group.add(base)
 
     def post_processing(self, data_dict: dict) -> dict:
         data_dict = super().post_processing(data_dict)
@@ -1,27 +1,82 @@
 import abc
 import dataclasses
+import functools
+import hashlib
+import importlib
+import inspect
 import json
 import logging
 import os
 import importlib.resources
+import threading
 import typing
 import yaml
 
 
+from bloodytools.utils.backends import SimulationBackend, get_simulation_backend
+from bloodytools.utils.cache import get_result_cache
 from bloodytools.utils.config import Config
 from bloodytools.utils.data_type import DataType
+from bloodytools.utils.journal import get_file_hash
 from bloodytools.utils.simulation_objects import Simulation_Group
 from bloodytools.utils.utils import create_base_json_dict
+from bloodytools.utils.refinement import refine_simulation_group
+from bloodytools.utils.scheduler import (
+    get_core_budget,
+    get_concurrent_simulations,
+    run_concurrently,
+)
+from bloodytools.utils.talent_resolution import TalentResolver
+from bloodytools.utils.tracing import span
 from bloodytools.utils.profile_extraction import (
     CharacterSource,
     extract_profile,
     EmptyFileError,
+    get_profile,
 )
 from simc_support.game_data.WowSpec import WowSpec
 
 logger = logging.getLogger(__name__)
 
 
+FINGERPRINT_VERSION = "2"
+"""Bump if the composition of input fingerprints changes."""
+
+RESULT_MODULES = (
+    "bloodytools.utils.profile_extraction",
+    "bloodytools.utils.refinement",
+    "bloodytools.utils.simc_json",
+    "bloodytools.utils.simulation_objects",
+    "bloodytools.utils.utils",
+)
+"""Modules that shape the results of every simulator, part of each simulator version."""
+
+
+@functools.lru_cache(maxsize=None)
+def get_simulator_version(simulator_class: type) -> str:
+    """Hash of the source of all bloodytools modules in the MRO of
+    simulator_class and of RESULT_MODULES. Changes whenever the simulator,
+    one of its base classes, or the creation of profiles and results
+    changes. Other modules, e.g. backends, are expected to not change
+    results.
+    """
+    module_names = sorted(
+        {
+            klass.__module__
+            for klass in simulator_class.__mro__
+            if klass.__module__.split(".")[0] == "bloodytools"
+        }.union(RESULT_MODULES)
+    )
+    version = hashlib.sha256()
+    for module_name in module_names:
+        source_file = inspect.getsourcefile(importlib.import_module(module_name))
+        version.update(module_name.encode("utf-8"))
+        if source_file:
+            with open(source_file, "rb") as f:
+                version.update(f.read())
+    return version.hexdigest()
+
+
 class UnknownFightStyleError(Exception):
     pass
 
@@ -50,6 +105,20 @@ class Simulator(abc.ABC):
     fight_style: str
     settings: Config
 
+    requires_full_json: typing.ClassVar[bool] = False
+    """Keep the whole SimulationCraft json report in Simulation_Group.json_data (and _last_simc_json). By default only players, statistics, and profileset results are read from the report."""
+
+    _profiles: typing.ClassVar[typing.Dict[tuple, dict]] = {}
+    _profiles_lock: typing.ClassVar[threading.Lock] = threading.Lock()
+
+    _simulated_groups: typing.List[Simulation_Group] = dataclasses.field(
+        default_factory=list, init=False, repr=False
+    )
+    """Groups simulated by _simulate since the last _write, source of metadata.simc_statistics."""
+
+    _input_fingerprint: str = dataclasses.field(default="", init=False, repr=False)
+    """Input fingerprint taken at the start of run(). Remote backends replace settings.simc_hash with the build they report during the run."""
+
     @classmethod
     @abc.abstractmethod
     def name(cls) -> str:
@@ -75,27 +144,37 @@ class Simulator(abc.ABC):
     def run(self) -> None:
         """Manages the simulation flow. You can adjust by overwriting the provided methods."""
         logger.debug(f"Start pipeline for {self.name()} of {self.wow_spec}")
-        data_dict = create_base_json_dict(
-            self.name(), self.wow_spec, self.fight_style, self.settings
-        )
+        self._input_fingerprint = self.get_input_fingerprint()
+        with span(
+            "run",
+            simulator=self.name(),
+            spec=str(self.wow_spec),
+            fight_style=self.fight_style,
+        ):
+            self._run()
 
-        logger.debug("Starting pre processing")
-        data_dict = self.pre_processing(data_dict)
+    def _run(self) -> None:
+        data_dict = self._create_base_json_dict()
+        data_dict = self._pre_processing(data_dict)
 
-        simulation_group = Simulation_Group(
-            name="simulation_group",
-            threads=self.settings.threads,
-            profileset_work_threads=self.settings.profileset_work_threads,
-            executable=self.settings.executable,
-            remove_files=not self.settings.keep_files,
-            generate_html=self.settings.html,
-            base_filename=self.settings.base_filename,
-        )
-        self.add_simulation_data(
-            simulation_group,
-            data_dict,
+        simulation_group = self.create_simulation_group(
+            base_filename=self.settings.base_filename
         )
+        self._add_simulation_data(simulation_group, data_dict)
 
+        self._simulate_and_write(simulation_group, data_dict)
+
+    def _simulate_and_write(
+        self, simulation_group: Simulation_Group, data_dict: dict
+    ) -> None:
+        """Second half of the pipeline: simulate simulation_group, collect its
+        data, post process, and write the result. Simulators that create
+        their group differently call this after creating it.
+
+        Args:
+            simulation_group (Simulation_Group): filled group
+            data_dict (dict): pre processed data of the simulation
+        """
         self._simulate(simulation_group)
 
         if simulation_group.json_data:
@@ -125,18 +204,189 @@ class Simulator(abc.ABC):
                 simulation_group.json_data
             )
 
-        logger.debug("Starting post processing")
-        data_dict = self.post_processing(data_dict)
+        data_dict = self._post_processing(data_dict)
 
         self._write(data_dict)
 
-    def _simulate(self, simulation_group: Simulation_Group) -> None:
-        if self.settings.use_raidbots and self.settings.apikey:
-            self.settings.simc_hash = simulation_group.simulate_with_raidbots(
-                self.settings.apikey
+    # Phases of the pipeline with their tracing spans. Simulators that
+    # override _run use these instead of calling the phases directly.
+
+    def _create_base_json_dict(self) -> dict:
+        with span("create_base_json_dict"):
+            data_dict: dict = create_base_json_dict(
+                self.name(), self.wow_spec, self.fight_style, self.settings
             )
-        else:
-            simulation_group.simulate()
+        return data_dict
+
+    def _pre_processing(self, data_dict: dict) -> dict:
+        logger.debug("Starting pre processing")
+        with span("pre_processing"):
+            return self.pre_processing(data_dict)
+
+    def _add_simulation_data(
+        self, simulation_group: Simulation_Group, data_dict: dict
+    ) -> None:
+        with span("add_simulation_data") as tags:
+            self.add_simulation_data(simulation_group, data_dict)
+            tags["profiles"] = len(simulation_group.profiles)
+
+    def _post_processing(self, data_dict: dict) -> dict:
+        logger.debug("Starting post processing")
+        with span("post_processing"):
+            return self.post_processing(data_dict)
+
+    def create_simulation_group(
+        self,
+        name: str = "simulation_group",
+        base_filename: str = "",
+        threads: str = "",
+    ) -> Simulation_Group:
+        """Create an empty Simulation_Group configured by settings.
+
+        Args:
+            name (str, optional): name of the group. Defaults to "simulation_group".
+            base_filename (str, optional): base name of generated files. Defaults to "", which creates a random name.
+            threads (str, optional): threads of the group. Defaults to "", which uses settings.threads.
+
+        Returns:
+            Simulation_Group: empty group
+        """
+        profileset_work_threads = self.settings.profileset_work_threads
+        if threads and profileset_work_threads:
+            profileset_work_threads = str(
+                min(int(profileset_work_threads), int(threads))
+            )
+        return Simulation_Group(
+            name=name,
+            threads=threads or self.settings.threads,
+            profileset_work_threads=profileset_work_threads,
+            executable=self.settings.executable,
+            remove_files=not self.settings.keep_files,
+            generate_html=self.settings.html,
+            base_filename=base_filename,
+            cache=get_result_cache(self.settings),
+            simc_hash=self.settings.simc_hash,
+            incremental=self.settings.incremental,
+            shards=self.settings.profileset_shards,
+            shard_threads=self.settings.shard_threads,
+            full_json=self.requires_full_json,
+            hoist_keys=self.settings.profileset_hoist_keys,
+            backend=self.backend,
+            output_log=self.settings.simc_output_log,
+        )
+
+    @property
+    def backend(self) -> SimulationBackend:
+        return get_simulation_backend(self.settings)
+
+    def load_profiles(
+        self, wow_specs: typing.Iterable[WowSpec]
+    ) -> typing.Dict[WowSpec, dict]:
+        """Load the profile of each spec for fight_style. Profiles are loaded
+        once per process and shared between simulators, don't modify them.
+        Specs without a profile are skipped.
+
+        Args:
+            wow_specs (typing.Iterable[WowSpec]): specs to load
+
+        Returns:
+            typing.Dict[WowSpec, dict]: profile of each spec that has one
+        """
+        profiles: typing.Dict[WowSpec, dict] = {}
+        for wow_spec in wow_specs:
+            key = (
+                wow_spec,
+                self.fight_style,
+                self.settings.tier,
+                self.settings.custom_profile,
+                self.settings.executable,
+            )
+            with self._profiles_lock:
+                profile = self._profiles.get(key)
+            if profile is None:
+                try:
+                    profile = get_profile(wow_spec, self.fight_style, self.settings)
+                except FileNotFoundError:
+                    logger.warning(f"Profile for {wow_spec} was not found. Skipping.")
+                    continue
+                with self._profiles_lock:
+                    self._profiles[key] = profile
+            profiles[wow_spec] = profile
+        return profiles
+
+    def get_concurrency(self, simulations: int) -> typing.Tuple[int, str]:
+        """Split the threads of this simulator between independent simulations.
+
+        Args:
+            simulations (int): number of independent simulations
+
+        Returns:
+            typing.Tuple[int, str]: number of concurrent simulations, threads of each simulation
+        """
+        try:
+            threads = int(self.settings.threads)
+        except ValueError:
+            threads = get_core_budget(self.settings)
+        workers = get_concurrent_simulations(threads, simulations)
+        return workers, str(max(1, threads // workers))
+
+    def add_failed_spec(
+        self, data_dict: dict, wow_spec: WowSpec, error: Exception
+    ) -> None:
+        """Record a failed simulation of one spec of a cross-spec simulator in data_dict["failed_specs"]."""
+        logger.error(f"Simulation of {wow_spec} failed. Skipping.", exc_info=error)
+        data_dict.setdefault("failed_specs", []).append(str(wow_spec))
+
+    def resolve_talents(
+        self, profile: dict, builds: typing.List[typing.List[str]]
+    ) -> typing.List[str]:
+        """Resolve the talent string of each build in one batched simulation. Known builds are taken from cache.
+
+        Args:
+            profile (dict): base profile of all builds
+            builds (typing.List[typing.List[str]]): simc_arguments of each build
+
+        Returns:
+            typing.List[str]: talent string of each build, empty if none was found
+        """
+        return TalentResolver(self.settings).resolve(
+            str(self.wow_spec), profile, builds
+        )
+
+    def _simulate(self, simulation_group: Simulation_Group) -> None:
+        with span(
+            "simulate",
+            group=simulation_group.name,
+            profiles=len(simulation_group.profiles),
+        ):
+            if self.settings.adaptive_target_error:
+                refine_simulation_group(
+                    simulation_group,
+                    lambda name: self.create_simulation_group(name=name),
+                    self.settings.coarse_target_error,
+                )
+            else:
+                simulation_group.simulate()
+        self._simulated_groups.append(simulation_group)
+        if not self.backend.local and simulation_group.simc_hash:
+            self.settings.simc_hash = simulation_group.simc_hash
+
+    def simulate_groups(
+        self, simulation_groups: typing.Sequence[Simulation_Group], workers: int
+    ) -> typing.List[typing.Optional[Exception]]:
+        """Simulate independent groups concurrently. Groups of remote backends
+        are all submitted at once.
+
+        Args:
+            simulation_groups (typing.Sequence[Simulation_Group]): groups to simulate
+            workers (int): number of local simulations at the same time
+
+        Returns:
+            typing.List[typing.Optional[Exception]]: error of each group, None on success
+        """
+        if not self.backend.local:
+            workers = len(simulation_groups)
+        return run_concurrently(self._simulate, simulation_groups, workers)
 
     def pre_processing(self, data_dict: dict) -> dict:
         """Adjusts data_dict before simulations are done. Use this to update profile information.
@@ -190,49 +440,52 @@ class Simulator(abc.ABC):
         Returns:
             dict: dictionary with simulated data
         """
-        data: typing.Dict[str, typing.Any] = {}
-        for profile in simulation_group.profiles:
-            wanted_value = -1
-            if data_type == DataType.DPS:
-                wanted_value = profile.get_dps()
-            logger.debug(f"Profile '{profile.name}' {data_type.value}: {wanted_value}")
-
-            name_parts = profile.name.split(self.profile_split_character())
-            name = name_parts[0]
-            try:
-                nested_keys = name_parts[1:]
-            except KeyError:
-                nested_keys = []
-
-            if name not in data:
-                data[name] = {}
-
-            # create keys if necessary
-            local_dict = data[name]
-            for key in nested_keys[:-1]:
-                if key not in local_dict:
-                    local_dict[key] = {}
-                local_dict = local_dict[key]
-
-            # set value of the last valid key
-            last_key = name
-            if nested_keys:
-                last_key = nested_keys[-1]
-            last_dict = data
-            if nested_keys:
-                last_dict = last_dict[name]
-                for key in nested_keys[:-1]:
-                    last_dict = last_dict[key]
-            last_dict.update({last_key: wanted_value})
+        with span("_collect_data", profiles=len(simulation_group.profiles)):
+            data: typing.Dict[str, typing.Any] = {}
+            for profile in simulation_group.profiles:
+                wanted_value = -1
+                if data_type == DataType.DPS:
+                    wanted_value = profile.get_dps()
+                logger.debug(
+                    f"Profile '{profile.name}' {data_type.value}: {wanted_value}"
+                )
+
+                name_parts = profile.name.split(self.profile_split_character())
+                name = name_parts[0]
+                try:
+                    nested_keys = name_parts[1:]
+                except KeyError:
+                    nested_keys = []
+
+                if name not in data:
+                    data[name] = {}
 
-            logger.debug(
-                "Added '{}' with {} dps to dictionary.".format(
-                    profile.name, profile.get_dps()
+                # create keys if necessary
+                local_dict = data[name]
+                for key in nested_keys[:-1]:
+                    if key not in local_dict:
+                        local_dict[key] = {}
+                    local_dict = local_dict[key]
+
+                # set value of the last valid key
+                last_key = name
+                if nested_keys:
+                    last_key = nested_keys[-1]
+                last_dict = data
+                if nested_keys:
+                    last_dict = last_dict[name]
+                    for key in nested_keys[:-1]:
+                        last_dict = last_dict[key]
+                last_dict.update({last_key: wanted_value})
+
+                logger.debug(
+                    "Added '{}' with {} dps to dictionary.".format(
+                        profile.name, profile.get_dps()
+                    )
                 )
-            )
 
-        logger.debug(f"data dictionary: {json.dumps(data, ensure_ascii=False)}")
-        return data
+            logger.debug(f"data dictionary: {json.dumps(data, ensure_ascii=False)}")
+            return data
 
     def post_processing(self, data_dict: dict) -> dict:
         """Enriches data_dict after simulations are done. Use this to add information like data["translations"].
@@ -246,29 +499,148 @@ class Simulator(abc.ABC):
         logger.debug(f"data_dict {json.dumps(data_dict)}")
         return data_dict
 
+    def _get_talent_tree_path_file(self) -> typing.Any:
+        upper_module = ".".join(__name__.split(".")[:-1])
+        return importlib.resources.files(upper_module).joinpath(
+            "talent_tree_paths",
+            f"{self.wow_spec.wow_class.simc_name}_{self.wow_spec.simc_name}.yaml",
+        )
+
+    def get_fingerprint_profiles(self) -> typing.Dict[str, dict]:
+        """Profiles the result of run() depends on. Override this if the
+        simulator loads profiles of other specs.
+
+        Returns:
+            typing.Dict[str, dict]: spec name -> profile
+        """
+        return {
+            str(self.wow_spec): get_profile(
+                self.wow_spec, self.fight_style, self.settings
+            )
+        }
+
+    def get_input_fingerprint(self) -> str:
+        """Hash of everything the result of run() depends on: profiles,
+        talent paths, SimulationCraft build, precision, and the version of the
+        simulator.
+
+        Returns:
+            str: fingerprint, empty if the SimulationCraft build is unknown
+        """
+        if not self.settings.simc_hash:
+            return ""
+
+        try:
+            with self._get_talent_tree_path_file().open("rb") as f:
+                talent_paths = hashlib.sha256(f.read()).hexdigest()
+        except FileNotFoundError:
+            talent_paths = ""
+
+        fingerprint = {
+            "version": FINGERPRINT_VERSION,
+            "simulator": self.snake_case_name(),
+            "simulator_version": get_simulator_version(type(self)),
+            "fight_style": self.fight_style,
+            "profiles": self.get_fingerprint_profiles(),
+            "talent_paths": talent_paths,
+            "simc_hash": self.settings.simc_hash,
+            "iterations": self.settings.iterations,
+            "target_error": self.settings.target_error.get(self.fight_style, "0.1"),
+            "data_type": self.settings.data_type,
+            "ptr": self.settings.ptr,
+            "custom_apl": (
+                get_file_hash("custom_apl.txt") if self.settings.custom_apl else ""
+            ),
+            "custom_fight_style": (
+                get_file_hash("custom_fight_style.txt")
+                if self.settings.custom_fight_style
+                else ""
+            ),
+        }
+        return hashlib.sha256(
+            json.dumps(fingerprint, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def is_result_fresh(self) -> bool:
+        """The existing result file was created from the same input."""
+        fingerprint = self.get_input_fingerprint()
+        if not fingerprint:
+            return False
+        try:
+            with open(self.get_output_path(), "r", encoding="utf-8") as f:
+                metadata = json.load(f).get("metadata", {})
+        except (FileNotFoundError, ValueError):
+            return False
+        return bool(metadata.get("input_fingerprint") == fingerprint)
+
+    def get_simc_statistics(self) -> dict:
+        """Iterations, CPU seconds, and achieved error of all profiles simulated
+        since the last _write, as reported by SimulationCraft.
+
+        Returns:
+            dict: aggregated statistics, empty if nothing was simulated
+        """
+        profiles = [
+            profile
+            for simulation_group in self._simulated_groups
+            for profile in simulation_group.profiles
+            if profile.iterations_run
+        ]
+        if not profiles:
+            return {}
+
+        iterations = [profile.iterations_run for profile in profiles]
+        cpu_seconds = sum(profile.cpu_seconds for profile in profiles)
+        achieved_errors = [profile.achieved_error for profile in profiles]
+        return {
+            "profiles": len(profiles),
+            "iterations": sum(iterations),
+            "iterations_min": min(iterations),
+            "iterations_max": max(iterations),
+            "cpu_seconds": round(cpu_seconds, 3),
+            "cpu_seconds_per_profile": round(cpu_seconds / len(profiles), 3),
+            "target_error": self.settings.target_error.get(self.fight_style, "0.1"),
+            "achieved_error_mean": round(sum(achieved_errors) / len(profiles), 4),
+            "achieved_error_max": round(max(achieved_errors), 4),
+        }
+
+    def get_output_path(self) -> str:
+        """Path of the result file written by run()."""
+        file_name = f"{self.wow_spec.wow_class.simc_name}_{self.wow_spec.simc_name}_{self.fight_style.lower()}.json"
+        return os.path.join("results", self.snake_case_name(), file_name)
+
     def _write(self, data_dict: dict) -> None:
         """Write data_dict to disk.
 
         Args:
             data_dict (dict): [description]
         """
-        path = os.path.join("results", self.snake_case_name())
-        if not os.path.isdir(path):
-            os.makedirs(path)
-
-        file_name = f"{self.wow_spec.wow_class.simc_name}_{self.wow_spec.simc_name}_{self.fight_style.lower()}.json"
-        full_path = os.path.join(path, file_name)
-        logger.info(f"Writing result to {full_path}")
-        # write json to file
-        with open(full_path, "w", encoding="utf-8") as f:
-            f.write(
-                json.dumps(
-                    data_dict,
-                    sort_keys=True,
-                    indent=4 if self.settings.pretty else None,
-                    ensure_ascii=False,
-                )
+        with span("_write"):
+            metadata = data_dict.setdefault("metadata", {})
+            metadata["input_fingerprint"] = (
+                self._input_fingerprint or self.get_input_fingerprint()
             )
+            simc_statistics = self.get_simc_statistics()
+            if simc_statistics:
+                metadata["simc_statistics"] = simc_statistics
+            self._simulated_groups = []
+
+            full_path = self.get_output_path()
+            path = os.path.dirname(full_path)
+            if not os.path.isdir(path):
+                os.makedirs(path)
+
+            logger.info(f"Writing result to {full_path}")
+            # write json to file
+            with open(full_path, "w", encoding="utf-8") as f:
+                f.write(
+                    json.dumps(
+                        data_dict,
+                        sort_keys=True,
+                        indent=4 if self.settings.pretty else None,
+                        ensure_ascii=False,
+                    )
+                )
 
     def create_sorted_key_value_data(
         self,
@@ -431,13 +803,8 @@ class Simulator(abc.ABC):
             )
 
         # load predefined talent paths from file
-        upper_module = ".".join(__name__.split(".")[:-1])
-        ref = importlib.resources.files(upper_module).joinpath(
-            "talent_tree_paths",
-            f"{self.wow_spec.wow_class.simc_name}_{self.wow_spec.simc_name}.yaml",
-        )
         try:
-            with ref.open("rb") as f:
+            with self._get_talent_tree_path_file().open("rb") as f:
                 loaded_data = yaml.safe_load(f)
         except FileNotFoundError as e:
             raise MissingTalentTreePathFileError() from e
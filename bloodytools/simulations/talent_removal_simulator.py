@@ -28,6 +28,10 @@ class TalentRemovalSimulator(Simulator):
     ) -> None:
         logger.debug("talent_simulations start")
 
+        talents_of_builds = self.resolve_talents(
+            data_dict["profile"], list(data_dict["data_profile_overrides"].values())
+        )
+
         for i, k_v in enumerate(data_dict["data_profile_overrides"].items()):
             human_name, simc_args = k_v
 
@@ -54,18 +58,8 @@ class TalentRemovalSimulator(Simulator):
             )
 
             # get talent string
-            data_copy = simulation.copy()
-            data_copy.iterations = "1"
-            data_copy.simc_arguments = (
-                data_copy.get_simc_arguments_from_profile(data_dict["profile"])
-                + data_copy.simc_arguments
-            )
-            tmp_group = Simulation_Group(data_copy, name="extract_talents")
-            tmp_group.simulate()
-            if tmp_group.profiles[0].json_data:
-                talent_string = "talents=" + self._get_talents(
-                    tmp_group.profiles[0].json_data
-                )
+            if talents_of_builds[i]:
+                talent_string = "talents=" + talents_of_builds[i]
                 if talent_string not in data_dict["data_profile_overrides"][human_name]:
                     data_dict["data_profile_overrides"][human_name].append(
                         talent_string
@@ -1,9 +1,9 @@
+import copy
 import logging
 import typing
 
 from bloodytools.utils.simulation_objects import Simulation_Data, Simulation_Group
 from bloodytools.simulations.simulator import Simulator
-from bloodytools.utils.utils import create_base_json_dict
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +14,8 @@ class MissingTalentTreePathFileError(Exception):
 
 KeyType = typing.TypeVar("KeyType")
 
+TARGET_COUNTS = [1, 2, 3, 4, 5, 6, 8, 9, 15]
+
 
 def _deep_update(
     mapping: typing.Dict[KeyType, typing.Any],
@@ -59,6 +61,14 @@ class TalentTargetScalingSimulator(Simulator):
             "class_talents=",
         ]
 
+        talents_of_builds = self.resolve_talents(
+            data_dict["profile"],
+            [
+                clear_talents + simc_args
+                for simc_args in data_dict["data_profile_overrides"].values()
+            ],
+        )
+
         # TODO: fix order of profiles. custom/T29 needs to be first
         for i, k_v in enumerate(data_dict["data_profile_overrides"].items()):
             human_name, simc_args = k_v
@@ -84,18 +94,8 @@ class TalentTargetScalingSimulator(Simulator):
             )
 
             # get talent string
-            data_copy = simulation_data.copy()
-            data_copy.iterations = "1"
-            data_copy.simc_arguments = (
-                data_copy.get_simc_arguments_from_profile(data_dict["profile"])
-                + data_copy.simc_arguments
-            )
-            tmp_group = Simulation_Group(data_copy, name="extract_talents")
-            tmp_group.simulate()
-            if tmp_group.profiles[0].json_data:
-                talents = "talents=" + self._get_talents(
-                    tmp_group.profiles[0].json_data
-                )
+            if talents_of_builds[i]:
+                talents = "talents=" + talents_of_builds[i]
                 if talents not in data_dict["data_profile_overrides"][human_name]:
                     data_dict["data_profile_overrides"][human_name].append(talents)
 
@@ -123,31 +123,69 @@ class TalentTargetScalingSimulator(Simulator):
         logger.debug("talent_simulations end")
         return data_dict
 
-    def run(self) -> None:
-        """Manages the simulation flow. You can adjust by overwriting the provided methods."""
-        logger.debug(f"Start pipeline for {self.name()} of {self.wow_spec}")
-        data_dict = create_base_json_dict(
-            self.name(), self.wow_spec, self.fight_style, self.settings
-        )
-
-        logger.debug("Starting pre processing")
-        data_dict = self.pre_processing(data_dict)
+    def create_target_scaling_group(self, data_dict: dict) -> Simulation_Group:
+        """Create one group with a profileset for each build and target count.
+        The base profile simulates the first target count, all profilesets
+        set their own desired_targets.
+
+        Args:
+            data_dict (dict): all data of the simulation
+
+        Returns:
+            Simulation_Group: group with len(TARGET_COUNTS) profiles per build
+        """
+        simulation_group = self.create_simulation_group()
+        self._add_simulation_data(simulation_group, data_dict)
+        builds = [
+            (build, build.name, list(build.simc_arguments))
+            for build in simulation_group.profiles
+        ]
 
-        for target_count in [1, 2, 3, 4, 5, 6, 8, 9, 15]:
-            simulation_group = Simulation_Group(
-                name="simulation_group",
-                threads=self.settings.threads,
-                profileset_work_threads=self.settings.profileset_work_threads,
-                executable=self.settings.executable,
-                remove_files=not self.settings.keep_files,
+        profiles: typing.List[Simulation_Data] = []
+        for target_count in TARGET_COUNTS:
+            for build, build_name, build_arguments in builds:
+                if profiles:
+                    profile = copy.copy(build)
+                    # multi line arguments (custom apl) are inherited from the base profile
+                    build_arguments = [
+                        argument for argument in build_arguments if "\n" not in argument
+                    ]
+                else:
+                    profile = build
+                profile.simc_arguments = build_arguments + [
+                    f"desired_targets={target_count}"
+                ]
+                profile.name = self.get_profile_name(build_name, str(target_count))
+                profiles.append(profile)
+
+        simulation_group.profiles = profiles
+        return simulation_group
+
+    def _run(self) -> None:
+        data_dict = self._create_base_json_dict()
+
+        data_dict = self._pre_processing(data_dict)
+
+        if self.settings.target_scaling_single_group:
+            simulation_group = self.create_target_scaling_group(data_dict)
+
+            logger.info(
+                f"Simulating {len(TARGET_COUNTS)} target counts in one simulation."
             )
-            self.add_simulation_data(
+            self._simulate_and_write(simulation_group, data_dict)
+            return
+
+        for target_count in TARGET_COUNTS:
+            simulation_group = self.create_simulation_group()
+            self._add_simulation_data(
                 simulation_group,
                 data_dict,
             )
 
             for profile in simulation_group.profiles:
-                profile.name = self.get_profile_name(profile.name, str(target_count))
+                simulation_group.rename_profile(
+                    profile, self.get_profile_name(profile.name, str(target_count))
+                )
                 if profile == simulation_group.profiles[0]:
                     profile.simc_arguments.append(f"desired_targets={target_count}")
 
@@ -167,7 +205,6 @@ class TalentTargetScalingSimulator(Simulator):
                     simulation_group.json_data["sim"]["players"][0]["talents"]
                 )
 
-        logger.debug("Starting post processing")
-        data_dict = self.post_processing(data_dict)
+        data_dict = self._post_processing(data_dict)
 
         self._write(data_dict)
@@ -43,7 +43,21 @@ class TierSetSimulator(Simulator):
             ],
         }
 
+        clear_talents = [
+            "talents=",
+            "spec_talents=",
+            "class_talents=",
+        ]
+
         for tier, simc_input in tier_mapping.items():
+            talents_of_builds = self.resolve_talents(
+                data_dict["profile"],
+                [
+                    simc_input + clear_talents + simc_args
+                    for simc_args in data_dict["data_profile_overrides"].values()
+                ],
+            )
+
             for i, k_v in enumerate(data_dict["data_profile_overrides"].items()):
                 human_name, simc_args = k_v
 
@@ -52,12 +66,6 @@ class TierSetSimulator(Simulator):
                 else:
                     profile = {}
 
-                clear_talents = [
-                    "talents=",
-                    "spec_talents=",
-                    "class_talents=",
-                ]
-
                 merged_simc_args = simc_input + clear_talents + simc_args
 
                 data = Simulation_Data(
@@ -76,18 +84,8 @@ class TierSetSimulator(Simulator):
                 )
 
                 # get talent string
-                data_copy = data.copy()
-                data_copy.iterations = "1"
-                data_copy.simc_arguments = (
-                    data_copy.get_simc_arguments_from_profile(data_dict["profile"])
-                    + data_copy.simc_arguments
-                )
-                tmp_group = Simulation_Group(data_copy, name="extract_talents")
-                tmp_group.simulate()
-                if tmp_group.profiles[0].json_data:
-                    talents = "talents=" + self._get_talents(
-                        tmp_group.profiles[0].json_data
-                    )
+                if talents_of_builds[i]:
+                    talents = "talents=" + talents_of_builds[i]
                     if talents not in data_dict["data_profile_overrides"][human_name]:
                         data_dict["data_profile_overrides"][human_name].append(talents)
 
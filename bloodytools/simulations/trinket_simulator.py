@@ -1,3 +1,4 @@
+import copy
 import logging
 import typing
 
@@ -313,6 +314,28 @@ def _get_reduced_itemlevel_list(
     return filtered_itemlevels
 
 
+def _select_screened_trinkets(
+    dps_by_trinket: typing.Dict[str, int], top_k: int, margin: float
+) -> typing.Set[str]:
+    """Select the top_k trinkets and all trinkets within margin percent of the dps of the top_k-th trinket.
+
+    Args:
+        dps_by_trinket (typing.Dict[str, int]): screening dps of each trinket
+        top_k (int): number of best trinkets that are kept
+        margin (float): percentage below the top_k-th trinket that is kept too
+
+    Returns:
+        typing.Set[str]: kept trinkets
+    """
+    ranking = sorted(dps_by_trinket, key=lambda key: dps_by_trinket[key], reverse=True)
+    if len(ranking) <= top_k:
+        return set(ranking)
+    threshold = dps_by_trinket[ranking[max(top_k, 1) - 1]] * (1 - margin / 100)
+    return set(ranking[:top_k]) | {
+        key for key in ranking if dps_by_trinket[key] >= threshold
+    }
+
+
 class TrinketSimulator(Simulator):
     @classmethod
     def name(cls) -> str:
@@ -497,30 +520,89 @@ class TrinketSimulator(Simulator):
 
                         simulation_group.add(new_data)
 
+        if self.settings.trinket_screening:
+            self._screen_trinkets(simulation_group, data_dict)
+
+    def _screen_trinkets(
+        self, simulation_group: Simulation_Group, data_dict: dict
+    ) -> None:
+        """Simulate each trinket at its highest itemlevel with a loose
+        target_error and remove all profiles of trinkets that are clearly
+        not competitive from simulation_group. Removed trinkets are listed
+        in data_dict["screened_out"].
+        """
+        baseline = simulation_group.profiles[0]
+        candidates: typing.Dict[str, Simulation_Data] = {}
+        for profile in simulation_group.profiles[1:]:
+            trinket, itemlevel = profile.name.split(self.profile_split_character())
+            if trinket not in candidates or int(itemlevel) > int(
+                candidates[trinket].name.split(self.profile_split_character())[1]
+            ):
+                candidates[trinket] = profile
+
+        if len(candidates) <= self.settings.screening_top_k:
+            return
+
+        screening_group = self.create_simulation_group(name="trinket_screening")
+        for profile in [baseline] + list(candidates.values()):
+            # shallow copies, the full precision profiles stay untouched
+            screening_profile = copy.copy(profile)
+            screening_profile.target_error = self.settings.screening_target_error
+            screening_profile.dps = -1
+            screening_group.add(screening_profile)
+
+        logger.info(
+            f"Screening {len(candidates)} trinkets of {self.wow_spec} at target_error {self.settings.screening_target_error}"
+        )
+        self._simulate(screening_group)
+
+        dps_by_trinket = {
+            trinket: screening_group.get_dps_of(profile.name)
+            for trinket, profile in candidates.items()
+        }
+        kept_trinkets = _select_screened_trinkets(
+            dps_by_trinket,
+            self.settings.screening_top_k,
+            self.settings.screening_margin,
+        )
+        simulation_group.profiles = [baseline] + [
+            profile
+            for profile in simulation_group.profiles[1:]
+            if profile.name.split(self.profile_split_character())[0] in kept_trinkets
+        ]
+
+        data_dict["screened_out"] = sorted(set(candidates) - kept_trinkets)
+        logger.info(
+            f"Screening kept {len(kept_trinkets)} of {len(candidates)} trinkets."
+        )
+
     def post_processing(self, data_dict: dict) -> dict:
         data_dict = super().post_processing(data_dict)
 
         # transform trinket ids back to names
         trinket_list = _get_trinkets(self.wow_spec, self.settings)
         trinket_dict = {t.item_id: t for t in trinket_list}
-        new_data_dict: typing.Dict[str, typing.Dict[str, int]] = {}
-        for item_id, subdict in data_dict["data"].items():
+
+        def get_full_name(item_id: str) -> str:
             if " [" in item_id:
                 actual_item_id, special_case = item_id.split(" [")
-                special_case = " [" + special_case
-                actual_item_id = int(actual_item_id)
-                new_data_dict[trinket_dict[actual_item_id].full_name + special_case] = (
-                    subdict
-                )
-            else:
-                try:
-                    actual_number = int(item_id)
-                except ValueError:
-                    new_data_dict[item_id] = subdict
-                else:
-                    new_data_dict[trinket_dict[actual_number].full_name] = subdict
+                return trinket_dict[int(actual_item_id)].full_name + " [" + special_case
+            try:
+                actual_number = int(item_id)
+            except ValueError:
+                return item_id
+            return trinket_dict[actual_number].full_name
+
+        new_data_dict: typing.Dict[str, typing.Dict[str, int]] = {}
+        for item_id, subdict in data_dict["data"].items():
+            new_data_dict[get_full_name(item_id)] = subdict
         data_dict["data"] = new_data_dict
 
+        if "screened_out" in data_dict:
+            data_dict["screened_out"] = sorted(
+                get_full_name(item_id) for item_id in data_dict["screened_out"]
+            )
+
         # derive itemlevel list from simulated information
         simulated_steps = set()
         for values in data_dict["data"].values():
@@ -3,10 +3,9 @@ import logging
 import typing
 
 from bloodytools.simulations.simulator import Simulator
-from bloodytools.utils.profile_extraction import get_profile
+from bloodytools.utils.tracing import span
 from bloodytools.utils.simulation_objects import Simulation_Data, Simulation_Group
-from bloodytools.utils.utils import create_base_json_dict
-from simc_support.game_data.WowSpec import WOWSPECS, ENHANCEMENT
+from simc_support.game_data.WowSpec import WOWSPECS, ENHANCEMENT, WowSpec
 from simc_support.game_data.Role import Role
 from simc_support.game_data.Stat import Stat
 
@@ -125,90 +124,103 @@ class WindfuryTotemSimulator(Simulator):
         logger.debug("talent_simulations end")
         return data_dict
 
-    def run(self) -> None:
-        """Manages the simulation flow. You can adjust by overwriting the provided methods."""
-        logger.debug(f"Start pipeline for {self.name()} of {self.wow_spec}")
-        data_dict = create_base_json_dict(
-            self.name(), self.wow_spec, self.fight_style, self.settings
-        )
-
-        del data_dict["profile"]
-
-        logger.debug("Starting pre processing")
-        data_dict = self.pre_processing(data_dict)
-
-        melee_specs = [
+    def get_melee_specs(self) -> typing.List[WowSpec]:
+        """Specs that profit from Windfury Totem."""
+        return [
             spec
             for spec in WOWSPECS
             if spec.role == Role.MELEE and spec.stat != Stat.INTELLECT
         ]
 
-        for melee_spec in melee_specs:
-            try:
-                profile = get_profile(melee_spec, self.fight_style, self.settings)
-            except FileNotFoundError:
-                logger.warning(f"Profile for {melee_spec} was not found. Skipping.")
-                continue
+    def get_fingerprint_profiles(self) -> typing.Dict[str, dict]:
+        return {
+            str(spec): profile
+            for spec, profile in self.load_profiles(self.get_melee_specs()).items()
+        }
 
-            simulation_group = Simulation_Group(
-                name="simulation_group",
-                threads=self.settings.threads,
-                profileset_work_threads=self.settings.profileset_work_threads,
-                executable=self.settings.executable,
-                remove_files=not self.settings.keep_files,
-            )
+    def _run(self) -> None:
+        data_dict = self._create_base_json_dict()
+
+        del data_dict["profile"]
+
+        data_dict = self._pre_processing(data_dict)
 
-            for windfury_name, windfury_override in WINDFURY_OPTIONS.items():
-                windfury_override = windfury_override.copy()
-                if (
-                    melee_spec == ENHANCEMENT
-                    and windfury_name == "windfury"
-                    and ENHANCEMENT_EXTERNAL_WINDFURY.get(self.fight_style.lower(), [])
-                ):
-                    windfury_override.append(
-                        *ENHANCEMENT_EXTERNAL_WINDFURY[self.fight_style.lower()]
+        profiles = self.load_profiles(self.get_melee_specs())
+        workers, threads = self.get_concurrency(len(profiles))
+
+        with span("add_simulation_data") as tags:
+            simulation_groups: typing.Dict[WowSpec, Simulation_Group] = {}
+            for melee_spec, profile in profiles.items():
+                simulation_group = self.create_simulation_group(
+                    name=str(melee_spec), threads=threads
+                )
+
+                for windfury_name, windfury_override in WINDFURY_OPTIONS.items():
+                    windfury_override = windfury_override.copy()
+                    if (
+                        melee_spec == ENHANCEMENT
+                        and windfury_name == "windfury"
+                        and ENHANCEMENT_EXTERNAL_WINDFURY.get(
+                            self.fight_style.lower(), []
+                        )
+                    ):
+                        windfury_override.append(
+                            *ENHANCEMENT_EXTERNAL_WINDFURY[self.fight_style.lower()]
+                        )
+                    if (
+                        melee_spec == ENHANCEMENT
+                        and windfury_name == "no windfury"
+                        and ENHANCEMENT_OWN_WINDFURY.get(self.fight_style.lower(), [])
+                    ):
+                        windfury_override.append(
+                            *ENHANCEMENT_OWN_WINDFURY[self.fight_style.lower()]
+                        )
+
+                    full_spec_name = " ".join(
+                        [melee_spec.full_name, melee_spec.wow_class.full_name]
                     )
-                if (
-                    melee_spec == ENHANCEMENT
-                    and windfury_name == "no windfury"
-                    and ENHANCEMENT_OWN_WINDFURY.get(self.fight_style.lower(), [])
-                ):
-                    windfury_override.append(
-                        *ENHANCEMENT_OWN_WINDFURY[self.fight_style.lower()]
+                    if windfury_name == WindfuryEnum.NO_WINDFURY.value:
+                        full_spec_name = f"{{{full_spec_name}}}"
+
+                    simulation_data = Simulation_Data(
+                        name=full_spec_name,
+                        fight_style=self.fight_style,
+                        profile=profile,
+                        simc_arguments=windfury_override,
+                        target_error=self.settings.target_error.get(
+                            self.fight_style, "0.1"
+                        ),
+                        ptr=self.settings.ptr,
+                        default_actions=self.settings.default_actions,
+                        executable=self.settings.executable,
+                        iterations=self.settings.iterations,
+                        remove_files=not self.settings.keep_files,
+                        generate_html=self.settings.html,
                     )
 
-                full_spec_name = " ".join(
-                    [melee_spec.full_name, melee_spec.wow_class.full_name]
-                )
-                if windfury_name == WindfuryEnum.NO_WINDFURY.value:
-                    full_spec_name = f"{{{full_spec_name}}}"
-
-                simulation_data = Simulation_Data(
-                    name=full_spec_name,
-                    fight_style=self.fight_style,
-                    profile=profile,
-                    simc_arguments=windfury_override,
-                    target_error=self.settings.target_error.get(
-                        self.fight_style, "0.1"
-                    ),
-                    ptr=self.settings.ptr,
-                    default_actions=self.settings.default_actions,
-                    executable=self.settings.executable,
-                    iterations=self.settings.iterations,
-                    remove_files=not self.settings.keep_files,
-                    generate_html=self.settings.html,
-                )
+                    simulation_group.add(simulation_data)
 
-                simulation_group.add(simulation_data)
+                simulation_groups[melee_spec] = simulation_group
+            tags["profiles"] = sum(
+                len(group.profiles) for group in simulation_groups.values()
+            )
+
+        logger.info(
+            f"Simulating {len(simulation_groups)} specs, {workers} at a time with {threads} threads each."
+        )
+        errors = self.simulate_groups(list(simulation_groups.values()), workers)
 
-            logger.info(f"Simulating {melee_spec}.")
-            simulation_group.simulate()
+        for (melee_spec, simulation_group), error in zip(
+            simulation_groups.items(), errors
+        ):
+            if error:
+                self.add_failed_spec(data_dict, melee_spec, error)
+                continue
 
             data = self._collect_data(simulation_group, self.settings.data_type)
 
             data_dict["data"] = _deep_update(data_dict["data"], data)
 
-        logger.debug("Starting post processing")
-        data_dict = self.post_processing(data_dict)
+        data_dict = self._post_processing(data_dict)
 
         self._write(data_dict)
@@ -1,4 +1,5 @@
 import argparse
+import typing
 from bloodytools.simulations import simulator_factory
 from bloodytools.utils.config import Config
 
@@ -32,6 +33,91 @@ def arg_parse_config():
             settings.threads
         ),
     )
+    parser.add_argument(
+        "--jobs",
+        metavar="NUMBER",
+        type=int,
+        help="Number of jobs (spec x simulation type x fight style) run at the same time. Each job gets an equal share of --cores as SimulationCraft threads. Default: '{}'".format(
+            settings.concurrent_jobs
+        ),
+    )
+    parser.add_argument(
+        "--cores",
+        metavar="NUMBER",
+        type=int,
+        help="Number of cores shared by all concurrent jobs. 0 uses all available cores. Default: '{}'".format(
+            settings.core_budget
+        ),
+    )
+    parser.add_argument(
+        "--trinket_screening",
+        action="store_const",
+        const=True,
+        default=False,
+        help="Screen trinkets at their highest itemlevel with a loose target_error and simulate only the best ones at all itemlevels.",
+    )
+    parser.add_argument(
+        "--screening_top_k",
+        metavar="NUMBER",
+        type=int,
+        help="Number of best screened trinkets that are simulated at all itemlevels. Default: '{}'".format(
+            settings.screening_top_k
+        ),
+    )
+    parser.add_argument(
+        "--screening_margin",
+        metavar="PERCENT",
+        type=float,
+        help="Screened trinkets within this percentage of the last of the best trinkets are kept too. Default: '{}'".format(
+            settings.screening_margin
+        ),
+    )
+    parser.add_argument(
+        "--target_scaling_single_group",
+        action="store_const",
+        const=True,
+        default=False,
+        help="Simulate all target counts of talent_target_scaling in one simulation. Combine with --shards to spread it across processes.",
+    )
+    parser.add_argument(
+        "--adaptive_target_error",
+        action="store_const",
+        const=True,
+        default=False,
+        help="Simulate all profiles at --coarse_target_error first and refine only profiles whose results are too close to their neighbours to rank them.",
+    )
+    parser.add_argument(
+        "--coarse_target_error",
+        metavar="STRING",
+        type=str,
+        help="target_error of the first round of --adaptive_target_error. Default: '{}'".format(
+            settings.coarse_target_error
+        ),
+    )
+    parser.add_argument(
+        "--shards",
+        metavar="NUMBER",
+        type=int,
+        help="Number of SimulationCraft processes the profilesets of one simulation are split across. 0 picks a count based on available cores. Default: '{}'".format(
+            settings.profileset_shards
+        ),
+    )
+    parser.add_argument(
+        "--shard_threads",
+        metavar="NUMBER",
+        type=int,
+        help="Threads of each profileset shard. 0 splits threads evenly between shards. Default: '{}'".format(
+            settings.shard_threads
+        ),
+    )
+    parser.add_argument(
+        "--hoist_keys",
+        metavar="STRING",
+        type=str,
+        help="Comma separated simc options that are left out of profilesets if the baseline has the same argument. An empty string writes all arguments. Default: '{}'".format(
+            ",".join(settings.profileset_hoist_keys)
+        ),
+    )
     parser.add_argument(
         "--debug",
         action="store_const",
@@ -117,6 +203,68 @@ def arg_parse_config():
         default=False,
         help="Keep generated simc input (.simc) and output files (.json and if --html also .html).",
     )
+    parser.add_argument(
+        "--no_cache",
+        "--no-cache",
+        dest="no_cache",
+        action="store_const",
+        const=True,
+        default=False,
+        help="Always run SimulationCraft, even if results of an identical simulation are cached.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_const",
+        const=True,
+        default=False,
+        help="Cache results per profile and only simulate profiles whose input changed since the last run.",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        "--cache-dir",
+        dest="cache_dir",
+        metavar="PATH",
+        type=str,
+        help="Directory of the result cache. Default: '{}'".format(settings.cache_dir),
+    )
+    parser.add_argument(
+        "--journal",
+        metavar="PATH",
+        type=str,
+        help="Journal of job states, used by --resume. An empty string disables the journal. Default: '{}'".format(
+            settings.job_journal
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_const",
+        const=True,
+        default=False,
+        help="Continue a crashed run. Skips jobs the journal records as done, failed and unfinished jobs are run again.",
+    )
+    parser.add_argument(
+        "--skip_fresh",
+        action="store_const",
+        const=True,
+        default=False,
+        help="Skip jobs whose existing result was created from the same input: profiles, talent paths, SimulationCraft build, precision and simulator version. The simulator version covers the simulator modules and the modules creating profiles and results, changes of other modules or of dependencies like simc-support aren't detected.",
+    )
+    parser.add_argument(
+        "--simc_log",
+        action="store_const",
+        const=True,
+        default=False,
+        help="Write the whole SimulationCraft output of each simulation to a .log file next to its input file.",
+    )
+    parser.add_argument(
+        "--trace_file",
+        metavar="PATH",
+        type=str,
+        default="",
+        help="Write timing spans of all pipeline phases to this file. Files ending in .jsonl get one event per line, other files are Chrome trace json. Default: '{}'".format(
+            settings.trace_file
+        ),
+    )
     parser.add_argument(
         "--html",
         action="store_const",
@@ -131,6 +279,30 @@ def arg_parse_config():
         default=False,
         help="Indent result files to make them more human readable.",
     )
+    parser.add_argument(
+        "--backend",
+        metavar="STRING",
+        type=str,
+        help="Backend that runs the simulations. 'local' runs SimulationCraft from this process, 'local_pool' from worker processes, 'remote' on Raidbots (needs an apikey), 'distributed' on workers started with 'python -m bloodytools worker'. Default: '{}'".format(
+            settings.simulation_backend
+        ),
+    )
+    parser.add_argument(
+        "--coordinator_host",
+        metavar="STRING",
+        type=str,
+        help="Address the coordinator of the distributed backend listens on. Use 0.0.0.0 to accept workers of other machines. Default: '{}'".format(
+            settings.coordinator_host
+        ),
+    )
+    parser.add_argument(
+        "--coordinator_port",
+        metavar="NUMBER",
+        type=int,
+        help="Port the coordinator of the distributed backend listens on. Default: '{}'".format(
+            settings.coordinator_port
+        ),
+    )
     parser.add_argument(
         "--raidbots",
         action="store_const",
@@ -140,3 +312,58 @@ def arg_parse_config():
     )
 
     return parser.parse_args()
+
+
+def arg_parse_worker(arguments: typing.Optional[typing.List[str]] = None):
+    settings = Config(log_warnings=False)
+    parser = argparse.ArgumentParser(
+        prog="python -m bloodytools worker",
+        description="Simulate profileset shards of a bloodytools coordinator.",
+    )
+    parser.add_argument(
+        "--coordinator",
+        metavar="URL",
+        type=str,
+        required=True,
+        help="Url of the coordinator, e.g. 'http://192.168.0.2:{}'".format(
+            settings.coordinator_port
+        ),
+    )
+    parser.add_argument(
+        "--executable",
+        metavar="PATH",
+        type=str,
+        default=settings.executable,
+        help="Relative path to SimulationCrafts executable. Default: '{}'".format(
+            settings.executable
+        ),
+    )
+    parser.add_argument(
+        "--threads",
+        metavar="NUMBER",
+        type=str,
+        default="",
+        help="Number of threads used by each simulation. Default: '' which lets SimulationCraft decide",
+    )
+    parser.add_argument(
+        "--name",
+        metavar="STRING",
+        type=str,
+        default="",
+        help="Name of this worker in logs of the coordinator. Default: host name and process id",
+    )
+    parser.add_argument(
+        "--simc_hash",
+        metavar="STRING",
+        type=str,
+        help="SimulationCraft build of the executable. Default: asks the executable",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_const",
+        const=True,
+        default=settings.debug,
+        help="Enables debug modus. Default: '{}'".format(settings.debug),
+    )
+
+    return parser.parse_args(arguments)
@@ -0,0 +1,378 @@
+"""Backends run the simulations of Simulation_Groups.
+
+Every backend has the same contract: `submit` starts a group and returns a job
+id, `poll` tells whether the job is done, and `result` returns the simc hash
+reported for the job or raises its error. Results are set on the group
+itself, like `Simulation_Group.simulate` does.
+
+Backends are selected by name with `Config.simulation_backend`. More backends
+can be added with `register_backend`.
+"""
+
+import abc
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import typing
+import uuid
+
+from bloodytools.utils.config import Config
+from bloodytools.utils.distributed import Coordinator, CoordinatorJob
+from bloodytools.utils.raidbots import RaidbotsClient
+from bloodytools.utils.request import RAIDBOTS_URL
+from bloodytools.utils.simulation_objects import Profileset_Data, Simulation_Group
+
+logger = logging.getLogger(__name__)
+
+BackendFactory = typing.Callable[[Config], "SimulationBackend"]
+
+
+class SimulationBackend(abc.ABC):
+    local = True
+    """Jobs run on this machine and share its cores."""
+
+    poll_interval = 1.0
+    """Seconds simulate() waits between polls."""
+
+    @abc.abstractmethod
+    def submit(self, group: Simulation_Group) -> str:
+        """Start the simulation of group.
+
+        Returns:
+            str: job id
+        """
+
+    @abc.abstractmethod
+    def poll(self, job_id: str, timeout: float = 0.0) -> bool:
+        """Wait up to timeout seconds for the job to finish.
+
+        Returns:
+            bool: True if the job is done
+        """
+
+    @abc.abstractmethod
+    def result(self, job_id: str) -> str:
+        """Result of a finished job. Each result can only be collected once.
+
+        Raises:
+            Exception: error of the failed job
+
+        Returns:
+            str: git hash of the SimulationCraft build, empty if the backend doesn't know it
+        """
+
+    def simulate(self, group: Simulation_Group) -> str:
+        """Simulate group and wait for its result.
+
+        Returns:
+            str: git hash of the SimulationCraft build, empty if the backend doesn't know it
+        """
+        job_id = self.submit(group)
+        while not self.poll(job_id, timeout=self.poll_interval):
+            pass
+        return self.result(job_id)
+
+    def close(self) -> None:
+        """Release resources of the backend. Unfinished jobs are abandoned."""
+
+
+class FutureBackend(SimulationBackend):
+    """Backend that tracks each job with a concurrent.futures.Future."""
+
+    def __init__(self) -> None:
+        self._futures: typing.Dict[str, concurrent.futures.Future] = {}
+
+    @abc.abstractmethod
+    def _start(self, group: Simulation_Group) -> concurrent.futures.Future:
+        """Start the simulation of group, the future resolves to its simc hash."""
+
+    def submit(self, group: Simulation_Group) -> str:
+        job_id = str(uuid.uuid4())
+        self._futures[job_id] = self._start(group)
+        return job_id
+
+    def poll(self, job_id: str, timeout: float = 0.0) -> bool:
+        future = self._futures[job_id]
+        concurrent.futures.wait([future], timeout=timeout)
+        return future.done()
+
+    def result(self, job_id: str) -> str:
+        return str(self._futures.pop(job_id).result())
+
+
+class LocalBackend(FutureBackend):
+    """Runs SimulationCraft from the submitting thread, submit() blocks until
+    the simulation is done."""
+
+    def _start(self, group: Simulation_Group) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        try:
+            group.simulate_with_profilesets()
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result("")
+        return future
+
+
+def _simulate_in_process(group: Simulation_Group) -> Simulation_Group:
+    group.simulate_with_profilesets()
+    return group
+
+
+def _copy_results(group: Simulation_Group, simulated: Simulation_Group) -> None:
+    """Copy the state of a group simulated in another process back to the
+    original group. Profiles keep their identity."""
+    for profile, simulated_profile in zip(group.profiles, simulated.profiles):
+        if isinstance(profile, Profileset_Data):
+            # keeps the reference to the base of the original group
+            for slot in Profileset_Data.__slots__[1:]:
+                if hasattr(simulated_profile, slot):
+                    setattr(profile, slot, getattr(simulated_profile, slot))
+        else:
+            profile.__dict__.update(simulated_profile.__dict__)
+    group.__dict__.update(
+        {
+            key: value
+            for key, value in simulated.__dict__.items()
+            if key
+            not in (
+                "profiles",
+                "cache",
+                "backend",
+                "_profiles_by_name",
+                "_indexed_profiles",
+                "_indexed_count",
+            )
+        }
+    )
+
+
+class LocalPoolBackend(FutureBackend):
+    """Runs SimulationCraft from a pool of worker processes. Writing profileset
+    files and parsing reports of large groups doesn't compete for the GIL of
+    the main process. Progress of the simulations isn't logged."""
+
+    def __init__(self, max_workers: typing.Optional[int] = None) -> None:
+        """
+        Args:
+            max_workers (typing.Optional[int], optional): number of worker processes. Defaults to None, which uses the number of cores.
+        """
+        super().__init__()
+        self.max_workers = max_workers
+        self._executor: typing.Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers
+                )
+            return self._executor
+
+    def _start(self, group: Simulation_Group) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def copy_results(process_future: concurrent.futures.Future) -> None:
+            try:
+                _copy_results(group, process_future.result())
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result("")
+
+        self._get_executor().submit(_simulate_in_process, group).add_done_callback(
+            copy_results
+        )
+        return future
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+class RemoteBackend(FutureBackend):
+    """Simulates on Raidbots or a server with the same HTTP api. All jobs are
+    polled together from one event loop running in a background thread."""
+
+    local = False
+
+    def __init__(
+        self, apikey: str, base_url: str = RAIDBOTS_URL, **client_kwargs: typing.Any
+    ) -> None:
+        """
+        Args:
+            apikey (str): Raidbots api key
+            base_url (str, optional): Raidbots or a compatible server. Defaults to RAIDBOTS_URL.
+            client_kwargs: passed on to RaidbotsClient
+        """
+        super().__init__()
+        self.client = RaidbotsClient(apikey, base_url=base_url, **client_kwargs)
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="remote-backend",
+                    daemon=True,
+                ).start()
+            return self._loop
+
+    def _start(self, group: Simulation_Group) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(
+            self.client.simulate(group), self._get_loop()
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._loop:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+
+class DistributedBackend(SimulationBackend):
+    """Splits each group into one shard per registered worker and lets the
+    workers of a Coordinator simulate them."""
+
+    local = False
+
+    def __init__(self, coordinator: Coordinator) -> None:
+        self.coordinator = coordinator
+        self._jobs: typing.Dict[
+            str,
+            typing.Tuple[
+                Simulation_Group,
+                typing.List[Simulation_Group],
+                typing.List[CoordinatorJob],
+            ],
+        ] = {}
+
+    def submit(self, group: Simulation_Group) -> str:
+        group.set_simulation_start_time()
+        shard_groups = group.create_shard_groups(self.coordinator.worker_count)
+        coordinator_jobs = [
+            self.coordinator.submit(shard.name, shard.create_profileset_input())
+            for shard in shard_groups
+        ]
+        job_id = str(uuid.uuid4())
+        self._jobs[job_id] = (group, shard_groups, coordinator_jobs)
+        logger.info(
+            f"Queued {len(shard_groups)} shards of {group.name} for {self.coordinator.worker_count} workers"
+        )
+        return job_id
+
+    def poll(self, job_id: str, timeout: float = 0.0) -> bool:
+        futures = [job.future for job in self._jobs[job_id][2]]
+        done, not_done = concurrent.futures.wait(
+            futures,
+            timeout=timeout,
+            return_when=concurrent.futures.FIRST_EXCEPTION,
+        )
+        return not not_done or any(future.exception() for future in done)
+
+    def result(self, job_id: str) -> str:
+        group, shard_groups, coordinator_jobs = self._jobs.pop(job_id)
+        try:
+            for shard, coordinator_job in zip(shard_groups, coordinator_jobs):
+                shard.json_data = coordinator_job.future.result()
+        except Exception:
+            for coordinator_job in coordinator_jobs:
+                self.coordinator.cancel(coordinator_job)
+            raise
+
+        group.merge_shard_results(shard_groups)
+        group.set_simulation_end_time()
+        return coordinator_jobs[0].simc_hash
+
+    def close(self) -> None:
+        self.coordinator.close()
+
+
+def _create_remote_backend(settings: Config) -> RemoteBackend:
+    if not settings.apikey:
+        raise ValueError("The remote simulation backend needs an apikey.")
+    return RemoteBackend(settings.apikey, base_url=settings.raidbots_url)
+
+
+_backend_factories: typing.Dict[str, BackendFactory] = {
+    "local": lambda settings: LocalBackend(),
+    "local_pool": lambda settings: LocalPoolBackend(),
+    "remote": _create_remote_backend,
+    "distributed": lambda settings: DistributedBackend(
+        Coordinator(
+            host=settings.coordinator_host,
+            port=settings.coordinator_port,
+            simc_hash=settings.simc_hash,
+            worker_timeout=settings.worker_timeout,
+        ).start()
+    ),
+}
+
+_backends: typing.Dict[typing.Tuple[str, str, str], SimulationBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: BackendFactory) -> None:
+    """Make a backend selectable with Config.simulation_backend.
+
+    Args:
+        name (str): name of the backend, replaces a backend of the same name
+        factory (BackendFactory): creates the backend from settings
+    """
+    with _backends_lock:
+        _backend_factories[name] = factory
+        for key in [key for key in _backends if key[0] == name]:
+            _backends.pop(key).close()
+
+
+def close_simulation_backends() -> None:
+    """Close all backends created by get_simulation_backend."""
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.close()
+        _backends.clear()
+
+
+def get_backend_name(settings: Config) -> str:
+    # --raidbots predates selectable backends
+    if (
+        settings.simulation_backend == "local"
+        and settings.use_raidbots
+        and settings.apikey
+    ):
+        return "remote"
+    return settings.simulation_backend
+
+
+def get_simulation_backend(settings: Config) -> SimulationBackend:
+    """Get the backend selected by settings. Backends are shared by all
+    simulators of the process, so remote jobs are polled together and pools
+    are reused.
+
+    Raises:
+        ValueError: unknown backend or missing settings
+
+    Returns:
+        SimulationBackend: backend to simulate with
+    """
+    name = get_backend_name(settings)
+    key = (name, settings.raidbots_url, settings.apikey)
+    with _backends_lock:
+        if key not in _backends:
+            if name not in _backend_factories:
+                raise ValueError(
+                    "Unknown simulation backend '{}'. Available: {}".format(
+                        name, ", ".join(sorted(_backend_factories))
+                    )
+                )
+            _backends[key] = _backend_factories[name](settings)
+            logger.debug(f"Created simulation backend {name}")
+        return _backends[key]
@@ -0,0 +1,143 @@
+"""On-disk, content-addressed cache for simulation results.
+
+Entries are json files named by the sha256 of their inputs. Reading an entry
+refreshes its modification time, eviction removes the least recently used
+entries once the cache grows beyond its size limit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import typing
+
+from bloodytools.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = "1"
+"""Bump to invalidate all existing cache entries."""
+
+
+class ResultCache:
+    def __init__(self, cache_dir: str, max_size: int) -> None:
+        """
+        Args:
+            cache_dir (str): directory of the cache, created if necessary
+            max_size (int): size limit in bytes, 0 disables eviction
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    @staticmethod
+    def create_key(*parts: str) -> str:
+        """Create a cache key from all parts that influence a result."""
+        key = hashlib.sha256()
+        for part in (CACHE_FORMAT_VERSION,) + parts:
+            key.update(part.encode("utf-8"))
+            key.update(b"\0")
+        return key.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> typing.Optional[dict]:
+        """Get the cached entry of key or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Removing corrupted cache entry '{path}'.")
+            self._remove(path)
+            return None
+
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        if not isinstance(data, dict):
+            return None
+        logger.debug(f"Cache hit for '{key}'.")
+        return data
+
+    def put(self, key: str, data: dict, evict: bool = True) -> None:
+        """Store data under key and evict old entries if necessary.
+
+        Args:
+            key (str): cache key
+            data (dict): entry
+            evict (bool, optional): evict right away. Eviction scans the whole cache, call evict() once after storing many entries instead. Defaults to True.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file first, concurrent readers never see partial entries
+        file_descriptor, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        logger.debug(f"Cached '{key}'.")
+
+        if evict:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits max_size."""
+        if self.max_size <= 0:
+            return
+
+        entries: typing.List[typing.Tuple[float, int, str]] = []
+        total_size = 0
+        for directory, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if not file_name.endswith(".json"):
+                    continue
+                path = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_size:
+            return
+
+        for _, size, path in sorted(entries):
+            self._remove(path)
+            total_size -= size
+            logger.debug(f"Evicted cache entry '{path}'.")
+            if total_size <= self.max_size:
+                break
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def get_result_cache(settings: Config) -> typing.Optional[ResultCache]:
+    """Get the result cache described by settings, if caching is possible.
+
+    Without a known simc_hash results of different SimulationCraft builds
+    can't be told apart, so no cache is used.
+    """
+    if not settings.result_cache:
+        return None
+    if not settings.simc_hash:
+        logger.debug("Result cache disabled, SimulationCraft hash is unknown.")
+        return None
+    return ResultCache(settings.cache_dir, settings.cache_max_size)
@@ -6,10 +6,58 @@ import uuid
 from bloodytools.utils.data_type import DataType
 from simc_support.game_data.WowSpec import WowSpec, get_wow_spec
 
+from bloodytools.utils.request import RAIDBOTS_URL
 from bloodytools.utils.simc import get_simc_hash
 
 logger = logging.getLogger(__name__)
 
+PROFILESET_HOIST_KEYS = (
+    # character
+    "level",
+    "race",
+    "role",
+    "position",
+    "spec",
+    "talents",
+    "class_talents",
+    "spec_talents",
+    "hero_talents",
+    "default_pet",
+    # items
+    "head",
+    "neck",
+    "shoulders",
+    "back",
+    "chest",
+    "wrists",
+    "hands",
+    "waist",
+    "legs",
+    "feet",
+    "finger1",
+    "finger2",
+    "trinket1",
+    "trinket2",
+    "main_hand",
+    "off_hand",
+    "gear_agility",
+    "gear_intellect",
+    "gear_strength",
+    "gear_stamina",
+    "gear_crit_rating",
+    "gear_haste_rating",
+    "gear_mastery_rating",
+    "gear_versatility_rating",
+    # consumables
+    "potion",
+    "flask",
+    "food",
+    "augmentation",
+    "temporary_enchant",
+)
+"""simc options whose last value wins, independent of their position. Arguments with
+these keys are safe to leave out of profilesets if the baseline has the same argument."""
+
 # ! Hier sitz ich nun ich armer Tor. Bin so klug als wie zuvor.
 # ! Schrieb Module und Klassen gar. Doch wozu ich sie gebar?
 # ! Drum denk ich nun, ich lass sie weg. Zuvor funktionierte's also was soll der Kek(s)?
@@ -61,6 +109,16 @@ class Config:
     threads: str = ""
     tier: str = "MID2"
     use_raidbots: bool = False
+    raidbots_url: str = RAIDBOTS_URL
+    """Base url of Raidbots or a server with the same api."""
+    simulation_backend: str = "local"
+    """Backend that runs simulations: "local" runs SimulationCraft from this process, "local_pool" from a pool of worker processes, "remote" uses Raidbots or a server with the same api (needs apikey), "distributed" lets workers started with `python -m bloodytools worker` simulate."""
+    coordinator_host: str = "127.0.0.1"
+    """Address the coordinator of the distributed backend listens on. Use 0.0.0.0 to accept workers of other machines."""
+    coordinator_port: int = 8765
+    """Port the coordinator of the distributed backend listens on."""
+    worker_timeout: float = 60.0
+    """Seconds without heartbeat after which a worker is considered lost and its shards are queued again."""
     write_humanreadable_secondary_distribution_file: bool = False
     apikey: str = ""
     simulator_type_names: typing.List[str] = dataclasses.field(default_factory=list)
@@ -69,6 +127,50 @@ class Config:
     )
     fight_styles: typing.List[str] = dataclasses.field(default_factory=list)
 
+    result_cache: bool = True
+    """Reuse results of identical profileset simulations done with the same SimulationCraft build."""
+    cache_dir: str = ".bloodytools_cache"
+    cache_max_size: int = 2 * 1024**3
+    """Size limit of cache_dir in bytes. Least recently used entries are removed first."""
+    incremental: bool = False
+    """Cache results per profile and only simulate profiles whose input changed. Requires result_cache."""
+    job_journal: str = "results/jobs.jsonl"
+    """Journal of job states of the current run, used by resume. Empty disables the journal."""
+    resume: bool = False
+    """Skip jobs the journal records as done with the current SimulationCraft build and an unchanged result file. Without resume a run starts a new journal."""
+    skip_fresh: bool = False
+    """Skip jobs whose result file was created from the same input fingerprint (profiles, talent paths, SimulationCraft build, precision, simulator version). See get_simulator_version for the modules covered by the simulator version."""
+    simc_output_log: bool = False
+    """Write the whole SimulationCraft output of each simulation group to <base_filename>.log. Only the last lines are kept in memory for error reports."""
+    trace_file: str = ""
+    """Write timing spans of all pipeline phases to this file. Files ending in .jsonl get one event per line, other files are Chrome trace json (chrome://tracing, ui.perfetto.dev). Empty disables tracing."""
+    concurrent_jobs: int = 1
+    """Number of jobs (spec x simulator x fight style) that are run at the same time."""
+    core_budget: int = 0
+    """Number of cores shared by all concurrent jobs. 0 uses all available cores."""
+    trinket_screening: bool = False
+    """Screen trinkets at their highest itemlevel first and simulate only competitive ones at all itemlevels."""
+    screening_top_k: int = 10
+    """Number of best trinkets of the screening that are simulated at all itemlevels."""
+    screening_margin: float = 1.0
+    """Trinkets within this percentage of the dps of the screening_top_k-th trinket are kept too."""
+    screening_target_error: str = "0.5"
+    """target_error of the screening simulation."""
+    target_scaling_single_group: bool = False
+    """Simulate all target counts of TalentTargetScalingSimulator as profilesets of one simulation."""
+    adaptive_target_error: bool = False
+    """Simulate all profiles at coarse_target_error first and refine only profiles whose confidence interval overlaps a neighbour in the ranking."""
+    coarse_target_error: str = "0.4"
+    """target_error of the first round of adaptive_target_error. Halved each round until target_error is reached."""
+    profileset_shards: int = 1
+    """Number of SimulationCraft processes the profilesets of one simulation are split across. 0 picks a count based on available cores."""
+    shard_threads: int = 0
+    """Threads of each profileset shard. 0 splits threads evenly between shards."""
+    profileset_hoist_keys: typing.List[str] = dataclasses.field(
+        default_factory=lambda: list(PROFILESET_HOIST_KEYS)
+    )
+    """Profileset arguments with these keys are left out if the baseline has the same argument. Only add simc options whose last value wins independent of their position."""
+
     log_warnings: bool = True
     """Log warnings for Config creation."""
 
@@ -148,6 +250,48 @@ class Config:
                 )
             )
 
+        if args.jobs:  # type: ignore
+            config.concurrent_jobs = args.jobs  # type: ignore
+            logger.debug("Set concurrent_jobs to {}".format(config.concurrent_jobs))
+
+        if args.cores:  # type: ignore
+            config.core_budget = args.cores  # type: ignore
+            logger.debug("Set core_budget to {}".format(config.core_budget))
+
+        if args.trinket_screening:  # type: ignore
+            config.trinket_screening = True
+
+        if args.screening_top_k:  # type: ignore
+            config.screening_top_k = args.screening_top_k  # type: ignore
+
+        if args.screening_margin is not None:  # type: ignore
+            config.screening_margin = args.screening_margin  # type: ignore
+
+        if args.target_scaling_single_group:  # type: ignore
+            config.target_scaling_single_group = True
+
+        if args.adaptive_target_error:  # type: ignore
+            config.adaptive_target_error = True
+
+        if args.coarse_target_error:  # type: ignore
+            config.coarse_target_error = args.coarse_target_error  # type: ignore
+
+        if args.shards is not None:  # type: ignore
+            config.profileset_shards = args.shards  # type: ignore
+            logger.debug("Set profileset_shards to {}".format(config.profileset_shards))
+
+        if args.shard_threads:  # type: ignore
+            config.shard_threads = args.shard_threads  # type: ignore
+            logger.debug("Set shard_threads to {}".format(config.shard_threads))
+
+        if args.hoist_keys is not None:  # type: ignore
+            config.profileset_hoist_keys = [
+                key.strip() for key in args.hoist_keys.split(",") if key.strip()  # type: ignore
+            ]
+            logger.debug(
+                "Set profileset_hoist_keys to {}".format(config.profileset_hoist_keys)
+            )
+
         if args.ptr:  # type: ignore
             config.ptr = "1"
         else:
@@ -166,6 +310,39 @@ class Config:
         if args.file_name:  # type: ignore
             config.base_filename = args.file_name  # type: ignore
 
+        if args.no_cache:  # type: ignore
+            config.result_cache = False
+
+        config.incremental = args.incremental  # type: ignore
+
+        if args.cache_dir:  # type: ignore
+            config.cache_dir = args.cache_dir  # type: ignore
+            logger.debug("Set cache_dir to {}".format(config.cache_dir))
+
+        if args.journal is not None:  # type: ignore
+            config.job_journal = args.journal  # type: ignore
+            logger.debug("Set job_journal to {}".format(config.job_journal))
+
+        config.resume = args.resume  # type: ignore
+        config.skip_fresh = args.skip_fresh  # type: ignore
+        config.simc_output_log = args.simc_log  # type: ignore
+
+        if args.trace_file:  # type: ignore
+            config.trace_file = args.trace_file  # type: ignore
+            logger.debug("Set trace_file to {}".format(config.trace_file))
+
+        if args.backend:  # type: ignore
+            config.simulation_backend = args.backend  # type: ignore
+            logger.debug(
+                "Set simulation_backend to {}".format(config.simulation_backend)
+            )
+
+        if args.coordinator_host:  # type: ignore
+            config.coordinator_host = args.coordinator_host  # type: ignore
+
+        if args.coordinator_port:  # type: ignore
+            config.coordinator_port = args.coordinator_port  # type: ignore
+
         config.use_raidbots = args.raidbots  # type: ignore
         config.keep_files = args.keep_files  # type: ignore
         config.pretty = args.pretty  # type: ignore
@@ -0,0 +1,462 @@
+"""Simulate profileset shards on other machines.
+
+A Coordinator queues the profileset input of shards and serves it over HTTP.
+Workers (`python -m bloodytools worker --coordinator URL`) register with
+the SimulationCraft build they run, lease one shard at a time, run it with
+their own executable and post back the trimmed json report. While a shard
+runs its worker sends heartbeats. Shards of workers that stop sending them
+are queued again.
+
+All requests are json POSTs:
+
+- /register {name, simc_hash} -> {worker_id, heartbeat_interval}, 409 if the build differs
+- /lease {worker_id} -> {job_id, name, input}, 204 if nothing is queued
+- /heartbeat {worker_id, job_id}, 404 if the job was given to another worker
+- /result {worker_id, job_id, simc_hash, data or error}, 409 if the build differs
+
+Unknown workers get 404 and register again.
+"""
+
+import collections
+import concurrent.futures
+import dataclasses
+import http.server
+import json
+import logging
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import typing
+import uuid
+
+import requests
+
+from bloodytools.utils.simc import get_simc_hash
+from bloodytools.utils.simc_json import extract_profileset_report
+from bloodytools.utils.simulation_objects import SimulationError
+
+logger = logging.getLogger(__name__)
+
+RESULT_ATTEMPTS = 5
+"""Attempts to send a result to the coordinator, the delay doubles after each failure."""
+
+
+class DistributedError(SimulationError):
+    """A shard couldn't be simulated by any worker."""
+
+
+def is_same_build(simc_hash: str, other_hash: str) -> bool:
+    """Compare short and full git hashes."""
+    return simc_hash.startswith(other_hash) or other_hash.startswith(simc_hash)
+
+
+@dataclasses.dataclass
+class CoordinatorJob:
+    job_id: str
+    name: str
+    input: str
+    future: concurrent.futures.Future
+    attempts: int = 0
+    worker_id: str = ""
+    simc_hash: str = ""
+
+
+@dataclasses.dataclass
+class WorkerState:
+    worker_id: str
+    name: str
+    simc_hash: str
+    last_seen: float
+    job_ids: typing.Set[str] = dataclasses.field(default_factory=set)
+
+
+class Coordinator:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        simc_hash: str = "",
+        worker_timeout: float = 60.0,
+        max_attempts: int = 3,
+    ) -> None:
+        """
+        Args:
+            host (str, optional): address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): port to listen on. Defaults to 0, which picks a free port.
+            simc_hash (str, optional): SimulationCraft build workers have to run. Defaults to "", which accepts all builds.
+            worker_timeout (float, optional): seconds without heartbeat after which a worker is considered lost. Defaults to 60.0.
+            max_attempts (int, optional): leases of a shard before it fails. Defaults to 3.
+        """
+        self.simc_hash = simc_hash
+        self.worker_timeout = worker_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._queue: typing.Deque[str] = collections.deque()
+        self._jobs: typing.Dict[str, CoordinatorJob] = {}
+        self._workers: typing.Dict[str, WorkerState] = {}
+        self._closed = threading.Event()
+        self.host = host
+        self._server = http.server.ThreadingHTTPServer((host, port), CoordinatorHandler)
+        self._server.daemon_threads = True
+        setattr(self._server, "coordinator", self)
+
+        if not simc_hash:
+            logger.warning(
+                "SimulationCraft hash is unknown, results of all builds are accepted."
+            )
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._server.server_port}"
+
+    @property
+    def worker_count(self) -> int:
+        with self._lock:
+            return len(self._workers)
+
+    def start(self) -> "Coordinator":
+        threading.Thread(
+            target=self._server.serve_forever, name="coordinator", daemon=True
+        ).start()
+        threading.Thread(
+            target=self._reap_workers, name="coordinator-reaper", daemon=True
+        ).start()
+        logger.info(f"Coordinator is waiting for workers on {self.url}")
+        return self
+
+    def close(self) -> None:
+        """Stop serving, queued and running shards fail."""
+        self._closed.set()
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.future.done():
+                    job.future.set_exception(DistributedError("Coordinator closed."))
+            self._jobs.clear()
+            self._queue.clear()
+
+    def submit(self, name: str, simc_input: str) -> CoordinatorJob:
+        """Queue a profileset input, its future resolves to the trimmed json report."""
+        job = CoordinatorJob(
+            job_id=str(uuid.uuid4()),
+            name=name,
+            input=simc_input,
+            future=concurrent.futures.Future(),
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._queue.append(job.job_id)
+        return job
+
+    def cancel(self, job: CoordinatorJob) -> None:
+        with self._lock:
+            self._remove(job)
+        job.future.cancel()
+
+    def _remove(self, job: CoordinatorJob) -> None:
+        self._jobs.pop(job.job_id, None)
+        if job.job_id in self._queue:
+            self._queue.remove(job.job_id)
+        if job.worker_id in self._workers:
+            self._workers[job.worker_id].job_ids.discard(job.job_id)
+
+    def _requeue(self, job: CoordinatorJob, error: str) -> None:
+        """Give a leased shard to the next worker, or fail it after max_attempts."""
+        if job.worker_id in self._workers:
+            self._workers[job.worker_id].job_ids.discard(job.job_id)
+        job.worker_id = ""
+        if job.attempts >= self.max_attempts:
+            logger.error(f"{job.name} failed {job.attempts} times.")
+            self._jobs.pop(job.job_id, None)
+            job.future.set_exception(DistributedError(error))
+        else:
+            logger.warning(f"{job.name} is queued again: {error.splitlines()[-1:]}")
+            self._queue.appendleft(job.job_id)
+
+    def _drop_worker(self, worker: WorkerState, reason: str) -> None:
+        logger.warning(f"Worker {worker.name} was dropped: {reason}")
+        del self._workers[worker.worker_id]
+        for job_id in list(worker.job_ids):
+            self._requeue(self._jobs[job_id], f"Worker {worker.name}: {reason}")
+
+    def _reap_workers(self) -> None:
+        while not self._closed.wait(self.worker_timeout / 4):
+            deadline = time.monotonic() - self.worker_timeout
+            with self._lock:
+                for worker in list(self._workers.values()):
+                    if worker.last_seen < deadline:
+                        self._drop_worker(worker, "no heartbeat")
+
+    def _get_worker(self, worker_id: str) -> typing.Optional[WorkerState]:
+        worker = self._workers.get(worker_id)
+        if worker:
+            worker.last_seen = time.monotonic()
+        return worker
+
+    def handle(self, path: str, body: dict) -> typing.Tuple[int, dict]:
+        """Answer a worker request.
+
+        Returns:
+            typing.Tuple[int, dict]: HTTP status and json body
+        """
+        with self._lock:
+            if path == "/register":
+                return self._register(body)
+            worker = self._get_worker(str(body.get("worker_id", "")))
+            if worker is None:
+                return 404, {"error": "Unknown worker, register again."}
+            if path == "/lease":
+                return self._lease(worker)
+            if path == "/heartbeat":
+                if body.get("job_id") and body["job_id"] not in worker.job_ids:
+                    return 404, {"error": "Job isn't leased by this worker."}
+                return 200, {}
+            if path == "/result":
+                return self._complete(worker, body)
+        return 404, {"error": f"Unknown path {path}."}
+
+    def _register(self, body: dict) -> typing.Tuple[int, dict]:
+        name = str(body.get("name", ""))
+        simc_hash = str(body.get("simc_hash", ""))
+        if self.simc_hash and not is_same_build(simc_hash, self.simc_hash):
+            logger.error(
+                f"Worker {name} runs SimulationCraft {simc_hash}, {self.simc_hash} is required."
+            )
+            return 409, {"error": f"SimulationCraft {self.simc_hash} is required."}
+        worker = WorkerState(
+            worker_id=str(uuid.uuid4()),
+            name=name,
+            simc_hash=simc_hash,
+            last_seen=time.monotonic(),
+        )
+        self._workers[worker.worker_id] = worker
+        logger.info(f"Worker {name} registered.")
+        return 200, {
+            "worker_id": worker.worker_id,
+            "heartbeat_interval": self.worker_timeout / 4,
+        }
+
+    def _lease(self, worker: WorkerState) -> typing.Tuple[int, dict]:
+        if not self._queue:
+            return 204, {}
+        job = self._jobs[self._queue.popleft()]
+        job.attempts += 1
+        job.worker_id = worker.worker_id
+        worker.job_ids.add(job.job_id)
+        logger.debug(f"{job.name} was leased by {worker.name}.")
+        return 200, {"job_id": job.job_id, "name": job.name, "input": job.input}
+
+    def _complete(self, worker: WorkerState, body: dict) -> typing.Tuple[int, dict]:
+        job_id = str(body.get("job_id", ""))
+        if job_id not in worker.job_ids:
+            return 404, {"error": "Job isn't leased by this worker."}
+        job = self._jobs[job_id]
+
+        if body.get("error"):
+            self._requeue(job, str(body["error"]))
+            return 200, {}
+
+        data = body.get("data") or {}
+        simc_hash = str(data.get("git_revision") or body.get("simc_hash", ""))
+        if self.simc_hash and not is_same_build(simc_hash, self.simc_hash):
+            self._drop_worker(
+                worker,
+                f"result of SimulationCraft {simc_hash}, {self.simc_hash} is required",
+            )
+            return 409, {"error": f"SimulationCraft {self.simc_hash} is required."}
+
+        self._remove(job)
+        job.simc_hash = simc_hash
+        job.future.set_result(data)
+        logger.debug(f"{job.name} was simulated by {worker.name}.")
+        return 200, {}
+
+
+class CoordinatorHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: typing.Any) -> None:
+        logger.debug(format % args)
+
+    def do_POST(self) -> None:
+        try:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        except (KeyError, ValueError):
+            status, answer = 400, {"error": "Expected a json body."}
+        else:
+            coordinator: Coordinator = getattr(self.server, "coordinator")
+            status, answer = coordinator.handle(self.path, body)
+        content = json.dumps(answer).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class Worker:
+    def __init__(
+        self,
+        coordinator_url: str,
+        executable: str,
+        threads: str = "",
+        name: str = "",
+        simc_hash: typing.Optional[str] = None,
+        idle_interval: float = 5.0,
+    ) -> None:
+        """
+        Args:
+            coordinator_url (str): url of the coordinator
+            executable (str): path to the SimulationCraft executable
+            threads (str, optional): threads of each simulation. Defaults to "", which lets SimulationCraft decide.
+            name (str, optional): shown in logs of the coordinator. Defaults to "", which uses the host name and process id.
+            simc_hash (typing.Optional[str], optional): SimulationCraft build of executable. Defaults to None, which asks the executable.
+            idle_interval (float, optional): seconds between leases while nothing is queued. Defaults to 5.0.
+        """
+        self.coordinator_url = coordinator_url.rstrip("/")
+        self.executable = executable
+        self.threads = threads
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.simc_hash = get_simc_hash(executable) if simc_hash is None else simc_hash
+        self.idle_interval = idle_interval
+        self.heartbeat_interval = 10.0
+        # seconds before the first retry of a failed result
+        self.retry_delay = 1.0
+        self.session = requests.Session()
+        self.worker_id = ""
+
+    def run(self, stop: typing.Optional[threading.Event] = None) -> None:
+        """Simulate shards until stop is set.
+
+        Raises:
+            DistributedError: the coordinator requires a different SimulationCraft build
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                if not self.worker_id:
+                    self._register()
+                status, job = self._post("/lease", {})
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Coordinator isn't reachable: {e}")
+                stop.wait(self.idle_interval)
+                continue
+            if status == 404:
+                self.worker_id = ""
+            elif status == 200:
+                try:
+                    self._simulate(job)
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Result of {job['name']} couldn't be sent: {e}")
+                    # register anew, the coordinator queues the shards of the
+                    # silent old registration again once it times out
+                    self.worker_id = ""
+            else:
+                stop.wait(self.idle_interval)
+
+    def _post(self, path: str, body: dict) -> typing.Tuple[int, dict]:
+        response = self.session.post(
+            self.coordinator_url + path,
+            json=dict(body, worker_id=self.worker_id),
+            timeout=30,
+        )
+        if response.status_code >= 500:
+            response.raise_for_status()
+        # /lease answers 204 without a body if nothing is queued
+        if response.status_code == 204 or not response.content:
+            return response.status_code, {}
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, {
+                "error": f"Invalid answer to {path}: {response.text[:200]}"
+            }
+
+    def _post_result(self, result: dict) -> typing.Tuple[int, dict]:
+        """Post result, retry with backoff if the coordinator isn't reachable.
+        Simulations are expensive, brief network errors shouldn't waste them."""
+        delay = self.retry_delay
+        attempt = 1
+        while True:
+            try:
+                return self._post("/result", result)
+            except requests.exceptions.RequestException as e:
+                if attempt >= RESULT_ATTEMPTS:
+                    raise
+                logger.warning(
+                    f"Sending result failed, retrying in {delay:.1f} seconds: {e}"
+                )
+                time.sleep(delay)
+                delay *= 2
+                attempt += 1
+
+    def _register(self) -> None:
+        status, answer = self._post(
+            "/register", {"name": self.name, "simc_hash": self.simc_hash}
+        )
+        if status != 200:
+            raise DistributedError(
+                answer.get("error", f"Registration failed: {status}")
+            )
+        self.worker_id = answer["worker_id"]
+        self.heartbeat_interval = float(answer["heartbeat_interval"])
+        logger.info(f"Registered at {self.coordinator_url} as {self.name}.")
+
+    def _simulate(self, job: dict) -> None:
+        logger.info(f"Simulating {job['name']}.")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_path = os.path.join(tmp_dir, "input.simc")
+            json_path = os.path.join(tmp_dir, "report.json")
+            with open(input_path, "w") as f:
+                f.write(job["input"])
+
+            arguments = [self.executable, input_path, f"json={json_path}"]
+            if self.threads:
+                arguments.append(f"threads={self.threads}")
+            process = subprocess.Popen(
+                arguments,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+            )
+
+            done = threading.Event()
+            heartbeat = threading.Thread(
+                target=self._send_heartbeats, args=(job["job_id"], process, done)
+            )
+            heartbeat.start()
+            output, _ = process.communicate()
+            done.set()
+            heartbeat.join()
+
+            result: typing.Dict[str, typing.Any] = {
+                "job_id": job["job_id"],
+                "simc_hash": self.simc_hash,
+            }
+            if process.returncode == 0 and os.path.exists(json_path):
+                with open(json_path, "r") as f:
+                    result["data"] = extract_profileset_report(f)
+            else:
+                result["error"] = output or f"Exit code {process.returncode}"
+
+        status, answer = self._post_result(result)
+        if status == 409:
+            raise DistributedError(answer.get("error", "Result was rejected."))
+        if status == 404:
+            logger.warning(f"{job['name']} was given to another worker.")
+
+    def _send_heartbeats(
+        self, job_id: str, process: subprocess.Popen, done: threading.Event
+    ) -> None:
+        while not done.wait(self.heartbeat_interval):
+            try:
+                status, _ = self._post("/heartbeat", {"job_id": job_id})
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Heartbeat failed: {e}")
+                continue
+            if status == 404:
+                logger.warning("Job was given to another worker, stopping it.")
+                process.kill()
+                return
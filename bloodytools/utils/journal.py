@@ -0,0 +1,137 @@
+"""Append-only journal of the jobs of a run, used to resume crashed runs.
+
+Each line is one json record of a job's state change. The last record of a
+job wins. Finished jobs record their result file and its hash, so a job
+only counts as done while its result file is unchanged and was simulated
+with the current SimulationCraft build.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import typing
+
+from bloodytools.utils.config import Config
+
+if typing.TYPE_CHECKING:
+    from bloodytools.utils.scheduler import Job
+
+logger = logging.getLogger(__name__)
+
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def get_job_key(job: "Job") -> str:
+    return "|".join(
+        (
+            job.simulator_name,
+            job.wow_spec.wow_class.simc_name,
+            job.wow_spec.simc_name,
+            job.fight_style,
+        )
+    )
+
+
+def get_file_hash(path: str) -> str:
+    """sha256 of the file content, empty if the file doesn't exist."""
+    file_hash = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024**2), b""):
+                file_hash.update(chunk)
+    except FileNotFoundError:
+        return ""
+    return file_hash.hexdigest()
+
+
+class JobJournal:
+    def __init__(self, path: str, simc_hash: str = "", resume: bool = False) -> None:
+        """
+        Args:
+            path (str): journal file
+            simc_hash (str, optional): SimulationCraft build of this run. Defaults to "".
+            resume (bool, optional): keep records of the previous run, otherwise the journal starts empty. Defaults to False.
+        """
+        self.path = path
+        self.simc_hash = simc_hash
+        self._lock = threading.Lock()
+        self._records: typing.Dict[str, dict] = {}
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        if resume:
+            self._load()
+        else:
+            open(path, "w").close()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # line of a crashed write
+                        continue
+                    self._records[record["job"]] = record
+        except FileNotFoundError:
+            logger.warning(f"No job journal found at {self.path}, nothing to resume.")
+            return
+        logger.info(f"Loaded {len(self._records)} jobs from {self.path}.")
+
+    def _append(self, job: "Job", state: str, **values: typing.Any) -> None:
+        record = {
+            "job": get_job_key(job),
+            "state": state,
+            "time": datetime.datetime.utcnow().isoformat(),
+            **values,
+        }
+        with self._lock:
+            self._records[record["job"]] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def start(self, job: "Job") -> None:
+        self._append(job, RUNNING)
+
+    def finish(self, job: "Job", output_path: str) -> None:
+        self._append(
+            job,
+            DONE,
+            output=output_path,
+            output_hash=get_file_hash(output_path),
+            simc_hash=self.simc_hash,
+        )
+
+    def fail(self, job: "Job", error: BaseException) -> None:
+        self._append(job, FAILED, error=repr(error))
+
+    def is_done(self, job: "Job") -> bool:
+        """Job finished with the same SimulationCraft build and its result
+        file wasn't changed or removed since."""
+        with self._lock:
+            record = self._records.get(get_job_key(job))
+        if not record or record["state"] != DONE:
+            return False
+        if record.get("simc_hash") != self.simc_hash:
+            return False
+        return bool(record["output_hash"]) and record["output_hash"] == get_file_hash(
+            record["output"]
+        )
+
+
+def get_job_journal(settings: Config) -> typing.Optional[JobJournal]:
+    if not settings.job_journal:
+        return None
+    return JobJournal(
+        settings.job_journal, simc_hash=settings.simc_hash, resume=settings.resume
+    )
@@ -3,9 +3,12 @@ import enum
 import logging
 import os
 import re
+import threading
 import typing
 
+from bloodytools.utils.cache import ResultCache
 from bloodytools.utils.config import Config
+from bloodytools.utils.tracing import span
 from simc_support.game_data.WowClass import WowClass
 from simc_support.game_data.WowSpec import WowSpec
 
@@ -328,80 +331,259 @@ def create_custom_profiles_path(wow_spec: WowSpec) -> str:
     return custom_profiles_path
 
 
+MINIMAL_PROFILE_KEYS: typing.Dict[str, typing.Dict[str, typing.Any]] = {
+    "character": {
+        "class": "",
+        "level": "",
+        # "position": "",  # optional
+        "race": "",
+        "role": "",
+        "spec": "",
+        "# source": "",
+    },
+    "items": {
+        "back": {},
+        "chest": {},
+        "feet": {},
+        "finger1": {},
+        "finger2": {},
+        "hands": {},
+        "head": {},
+        "legs": {},
+        "main_hand": {},
+        "neck": {},
+        "off_hand": {},
+        "shoulders": {},
+        "trinket1": {},
+        "trinket2": {},
+        "waist": {},
+        "wrists": {},
+    },
+}
+
+ITEM_SLOTS = [
+    "head",
+    "neck",
+    "shoulders",
+    "shoulder",
+    "back",
+    "chest",
+    "wrists",
+    "wrist",
+    "hands",
+    "waist",
+    "legs",
+    "feet",
+    "finger1",
+    "finger2",
+    "trinket1",
+    "trinket2",
+    "main_hand",
+    "off_hand",
+]
+OFFICIAL_SLOT_NAMES = {
+    "shoulder": "shoulders",
+    "wrist": "wrists",
+}
+
+# item defining attributes
+ITEM_ELEMENTS = [
+    "id",
+    "bonus_id",
+    # "azerite_powers",
+    "enchant",
+    # "azerite_level",  # neck
+    "ilevel",
+    "gem_id",
+    "enchant_id",
+    "crafted_stats",
+    "drop_level",
+]
+
+SET_BONUSES = [
+    "tier28_2pc",
+    "tier28_4pc",
+    "tier29_2pc",
+    "tier29_4pc",
+    "tier30_2pc",
+    "tier30_4pc",
+    "tier31_2pc",
+    "tier31_4pc",
+    "thewarwithin_season_1_2pc",
+    "thewarwithin_season_1_4pc",
+    "thewarwithin_season_2_2pc",
+    "thewarwithin_season_2_4pc",
+    "thewarwithin_season_3_2pc",
+    "thewarwithin_season_3_4pc",
+    "thewarwithin_season_4_2pc",
+    "thewarwithin_season_4_4pc",
+]
+"""Set bonuses are saved as "set_bonus=<name>" in the character part of a profile."""
+
+# character defining information. like spec
+CHARACTER_SPECIFICS = [
+    "level",
+    "race",
+    "role",
+    "position",
+    "talents",
+    "class_talents",
+    "spec_talents",
+    "hero_talents",
+    "spec",
+    "default_pet",
+    "gear_agility",
+    "gear_intellect",
+    "gear_strength",
+    "gear_crit_rating",
+    "gear_haste_rating",
+    "gear_mastery_rating",
+    "gear_versatility_rating",
+    "deathknight.ams_absorb_percent",
+    "deathknight.amz_absorb_percent",
+    "dragonflight.ominous_chromatic_essence_dragonflight",
+    "dragonflight.ominous_chromatic_essence_allies",
+]
+
+_CHARACTER_KEYS = frozenset(CHARACTER_SPECIFICS)
+_SET_BONUSES = frozenset(SET_BONUSES)
+_SLOT_NAMES = {slot: OFFICIAL_SLOT_NAMES.get(slot, slot) for slot in ITEM_SLOTS}
+_ITEM_ELEMENTS = frozenset(ITEM_ELEMENTS)
+_QUOTES = "\"'"
+_ELEMENT_VALUE_PATTERN = re.compile(r"[a-zA-Z0-9_/:]*")
+
+PROFILE_FORMAT_VERSION = "2"
+"""Bump to invalidate parsed profiles in the cache after changing how profiles are extracted."""
+
+_parsed_profiles: typing.Dict[typing.Tuple[str, int, int, str, str], dict] = {}
+_parsed_profiles_lock = threading.Lock()
+
+
+def _remove_quotes(text: str) -> str:
+    return text.replace('"', "").replace("'", "")
+
+
+def _copy_profile(profile: dict) -> dict:
+    """Faster deepcopy of the nested str dicts of a profile."""
+    return {
+        part: {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in values.items()
+        }
+        for part, values in profile.items()
+    }
+
+
+def _parse_set_bonus(value: str) -> typing.Optional[typing.Tuple[str, str]]:
+    """Split the value of a `set_bonus=<name>=<information>` line. The name
+    may be quoted.
+
+    Returns:
+        typing.Optional[typing.Tuple[str, str]]: name, information, or None if the set bonus is unknown
+    """
+    name, separator, information = value.partition("=")
+    if name[:1] in _QUOTES:
+        name = name[1:]
+    if name[-1:] in _QUOTES:
+        name = name[:-1]
+    if not separator or name not in _SET_BONUSES:
+        return None
+    return name, _remove_quotes(information)
+
+
+def _parse_item(value: str) -> typing.Dict[str, str]:
+    """Get all item elements of the unquoted value of an item line, e.g.
+    `,id=1,bonus_id=2/3`. The first occurrence of each element is used.
+    """
+    item: typing.Dict[str, str] = {}
+    # the first part is the optional item name
+    for option in value.split(",")[1:]:
+        element, separator, element_value = option.partition("=")
+        if separator and element in _ITEM_ELEMENTS and element not in item:
+            item[element] = _ELEMENT_VALUE_PATTERN.match(element_value).group()  # type: ignore[union-attr]
+    # keep the order of ITEM_ELEMENTS, it's the order of generated simc input
+    return {element: item[element] for element in ITEM_ELEMENTS if element in item}
+
+
+def get_profile_cache(settings: Config) -> typing.Optional[ResultCache]:
+    """On-disk cache of parsed profiles. Unlike simulation results parsed
+    profiles don't depend on the SimulationCraft build.
+    """
+    if not settings.result_cache:
+        return None
+    return ResultCache(settings.cache_dir, settings.cache_max_size)
+
+
 def extract_profile(
-    path: str, wow_class: WowClass, character_source: CharacterSource
+    path: str,
+    wow_class: WowClass,
+    character_source: CharacterSource,
+    cache: typing.Optional[ResultCache] = None,
 ) -> dict:
     """Extract all character specific data from a given file.
     These options are expansion specific, so be careful when using this with other SimulatonCraft versions.
 
+    Parsed profiles are kept in memory as long as the file's modification time
+    and size don't change. If cache is given, they are also stored on disk
+    keyed by the file content.
+
     Arguments:
         path {str} -- path to file, relative or absolute
         wow_class {WowClass} -- expected wow class in `path`
+        cache {ResultCache} -- optional on-disk cache of parsed profiles
 
     Returns:
         dict -- all known character data
     """
-    minimal_profile_keys: typing.Dict[
-        str,
-        typing.Dict[
-            str,
-            typing.Union[
-                str, typing.Dict[str, typing.Union[str, typing.Dict[str, str]]]
-            ],
-        ],
-    ] = {
-        "character": {
-            "class": "",
-            "level": "",
-            # "position": "",  # optional
-            "race": "",
-            "role": "",
-            "spec": "",
-            "# source": "",
-        },
-        "items": {
-            "back": {},
-            "chest": {},
-            "feet": {},
-            "finger1": {},
-            "finger2": {},
-            "hands": {},
-            "head": {},
-            "legs": {},
-            "main_hand": {},
-            "neck": {},
-            "off_hand": {},
-            "shoulders": {},
-            "trinket1": {},
-            "trinket2": {},
-            "waist": {},
-            "wrists": {},
-        },
-    }
-
-    if os.stat(path).st_size == 0:
+    stat = os.stat(path)
+    if stat.st_size == 0:
         raise EmptyFileError("Empty file")
+
+    memo_key = (
+        os.path.abspath(path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        wow_class.simc_name,
+        character_source.name,
+    )
+    with _parsed_profiles_lock:
+        profile = _parsed_profiles.get(memo_key)
+    if profile is not None:
+        return _copy_profile(profile)
+
     with open(path, "r") as f:
         file_content = f.read()
     if file_content.strip() == "":
         raise EmptyFileError("Empty file")
 
-    profile: typing.Dict[
-        str,
-        typing.Dict[
-            str,
-            typing.Union[
-                str,
-                typing.Dict[
-                    str,
-                    typing.Union[
-                        str,
-                        typing.Dict[str, str],
-                    ],
-                ],
-            ],
-        ],
-    ] = {
+    cache_key = ""
+    cached = None
+    if cache:
+        cache_key = ResultCache.create_key(
+            "profile",
+            PROFILE_FORMAT_VERSION,
+            wow_class.simc_name,
+            character_source.name,
+            file_content,
+        )
+        cached = cache.get(cache_key)
+    if cached:
+        profile = cached
+        logger.debug(f"Using cached profile of '{path}'.")
+    else:
+        profile = _parse_profile(file_content, path, wow_class, character_source)
+        if cache:
+            cache.put(cache_key, profile)
+
+    with _parsed_profiles_lock:
+        _parsed_profiles[memo_key] = profile
+    return _copy_profile(profile)
+
+
+def _parse_profile(
+    file_content: str, path: str, wow_class: WowClass, character_source: CharacterSource
+) -> dict:
+    profile: typing.Dict[str, typing.Dict[str, typing.Any]] = {
         "character": {
             "class": wow_class.simc_name,
             "# source": character_source.name.lower(),
@@ -409,166 +591,34 @@ def extract_profile(
         "items": {},
     }
 
-    # prepare regex for each extractable item slot
-    item_slots = [
-        "head",
-        "neck",
-        "shoulders",
-        "shoulder",
-        "back",
-        "chest",
-        "wrists",
-        "wrist",
-        "hands",
-        "waist",
-        "legs",
-        "feet",
-        "finger1",
-        "finger2",
-        "trinket1",
-        "trinket2",
-        "main_hand",
-        "off_hand",
-    ]
-    official_name = {
-        "shoulder": "shoulders",
-        "wrist": "wrists",
-    }
-    pattern_slots: typing.Dict[str, re.Pattern] = {}
-    for element in item_slots:
-        pattern_slots[element] = re.compile(
-            r'^{}=["\']?(?P<information>.*)["\']?$'.format(element)
-        )
+    for line in file_content.split("\n"):
+        if line.lstrip().startswith("#"):
+            continue
 
-    # prepare regex for item defining attributes
-    item_elements = [
-        "id",
-        "bonus_id",
-        # "azerite_powers",
-        "enchant",
-        # "azerite_level",  # neck
-        "ilevel",
-        "gem_id",
-        "enchant_id",
-        "crafted_stats",
-        "drop_level",
-    ]
-    pattern_element: typing.Dict[str, re.Pattern] = {}
-    # don't recompile this for each slot
-    for element in item_elements:
-        pattern_element[element] = re.compile(
-            r',{}=["\']?(?P<information>[a-zA-Z0-9_/:]*)["\']?'.format(element)
-        )
+        key, separator, value = line.partition("=")
+        if not separator:
+            continue
 
-    # prepare regex for character defining information. like spec
-    character_specifics = [
-        "level",
-        "race",
-        "role",
-        "position",
-        "talents",
-        "class_talents",
-        "spec_talents",
-        "hero_talents",
-        "spec",
-        "default_pet",
-        r"set_bonus=[\"']?tier28_2pc[\"']?",
-        r"set_bonus=[\"']?tier28_4pc[\"']?",
-        r"set_bonus=[\"']?tier29_2pc[\"']?",
-        r"set_bonus=[\"']?tier29_4pc[\"']?",
-        r"set_bonus=[\"']?tier30_2pc[\"']?",
-        r"set_bonus=[\"']?tier30_4pc[\"']?",
-        r"set_bonus=[\"']?tier31_2pc[\"']?",
-        r"set_bonus=[\"']?tier31_4pc[\"']?",
-        r"set_bonus=[\"']?thewarwithin_season_1_2pc[\"']?",
-        r"set_bonus=[\"']?thewarwithin_season_1_4pc[\"']?",
-        r"set_bonus=[\"']?thewarwithin_season_2_2pc[\"']?",
-        r"set_bonus=[\"']?thewarwithin_season_2_4pc[\"']?",
-        r"set_bonus=[\"']?thewarwithin_season_3_2pc[\"']?",
-        r"set_bonus=[\"']?thewarwithin_season_3_4pc[\"']?",
-        r"set_bonus=[\"']?thewarwithin_season_4_2pc[\"']?",
-        r"set_bonus=[\"']?thewarwithin_season_4_4pc[\"']?",
-        "gear_agility",
-        "gear_intellect",
-        "gear_strength",
-        "gear_crit_rating",
-        "gear_haste_rating",
-        "gear_mastery_rating",
-        "gear_versatility_rating",
-        "deathknight.ams_absorb_percent",
-        "deathknight.amz_absorb_percent",
-        "dragonflight.ominous_chromatic_essence_dragonflight",
-        "dragonflight.ominous_chromatic_essence_allies",
-    ]
-    clean_character_specifics = {
-        r"set_bonus=[\"']?tier28_2pc[\"']?": "set_bonus=tier28_2pc",
-        r"set_bonus=[\"']?tier28_4pc[\"']?": "set_bonus=tier28_4pc",
-        r"set_bonus=[\"']?tier29_2pc[\"']?": "set_bonus=tier29_2pc",
-        r"set_bonus=[\"']?tier29_4pc[\"']?": "set_bonus=tier29_4pc",
-        r"set_bonus=[\"']?tier30_2pc[\"']?": "set_bonus=tier30_2pc",
-        r"set_bonus=[\"']?tier30_4pc[\"']?": "set_bonus=tier30_4pc",
-        r"set_bonus=[\"']?tier31_2pc[\"']?": "set_bonus=tier31_2pc",
-        r"set_bonus=[\"']?tier31_4pc[\"']?": "set_bonus=tier31_4pc",
-        r"set_bonus=[\"']?thewarwithin_season_1_2pc[\"']?": "set_bonus=thewarwithin_season_1_2pc",
-        r"set_bonus=[\"']?thewarwithin_season_1_4pc[\"']?": "set_bonus=thewarwithin_season_1_4pc",
-        r"set_bonus=[\"']?thewarwithin_season_2_2pc[\"']?": "set_bonus=thewarwithin_season_2_2pc",
-        r"set_bonus=[\"']?thewarwithin_season_2_4pc[\"']?": "set_bonus=thewarwithin_season_2_4pc",
-        r"set_bonus=[\"']?thewarwithin_season_3_2pc[\"']?": "set_bonus=thewarwithin_season_3_2pc",
-        r"set_bonus=[\"']?thewarwithin_season_3_4pc[\"']?": "set_bonus=thewarwithin_season_3_4pc",
-        r"set_bonus=[\"']?thewarwithin_season_4_2pc[\"']?": "set_bonus=thewarwithin_season_4_2pc",
-        r"set_bonus=[\"']?thewarwithin_season_4_4pc[\"']?": "set_bonus=thewarwithin_season_4_4pc",
-    }
-    pattern_specifics: typing.Dict[str, re.Pattern] = {}
-    for element in character_specifics:
-        pattern_specifics[element] = re.compile(
-            r'^{}=["\']?(?P<information>.*)["\']?'.format(element)
-        )
+        if key in _CHARACTER_KEYS:
+            profile["character"][key] = _remove_quotes(value)
 
-    with open(path, "r") as f:
-        for line in f:
-            if line.lstrip().startswith("#"):
-                continue
-
-            if not line.strip():
-                continue
-
-            for specific in character_specifics:
-                matches = pattern_specifics[specific].search(line)
-                if matches:
-                    profile["character"][
-                        clean_character_specifics.get(specific, specific)
-                    ] = (matches.group("information").replace('"', "").replace("'", ""))
-
-            for slot in item_slots:
-                matches = pattern_slots[slot].search(line)
-
-                slot_name = official_name.get(slot, slot)
-
-                if matches:
-                    new_line = (
-                        matches.group("information").replace('"', "").replace("'", "")
-                    )
-                    if not slot_name in profile["items"]:
-                        profile["items"][slot_name] = {}
-
-                    # check for all elements
-                    for element in item_elements:
-                        new_matches: typing.Union[re.Match, None] = pattern_element[
-                            element
-                        ].search(new_line)
-
-                        if new_matches:
-                            profile["items"][slot_name][element] = (  # type: ignore[index]
-                                new_matches.group("information")
-                                .replace('"', "")
-                                .replace("'", "")
-                            )
-
-    logger.debug(f"extracted profile from '{path}' : {profile}")
+        elif key == "set_bonus":
+            set_bonus = _parse_set_bonus(value)
+            if set_bonus:
+                profile["character"][f"set_bonus={set_bonus[0]}"] = set_bonus[1]
+
+        elif key in _SLOT_NAMES:
+            slot_name = _SLOT_NAMES[key]
+            if not slot_name in profile["items"]:
+                profile["items"][slot_name] = {}
+            profile["items"][slot_name].update(_parse_item(_remove_quotes(value)))
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"extracted profile from '{path}' : {profile}")
 
     # validate profile
     missing_character_keys = []
-    for key in minimal_profile_keys["character"].keys():
+    for key in MINIMAL_PROFILE_KEYS["character"].keys():
         if key not in profile["character"]:
             missing_character_keys.append(key)
     if missing_character_keys:
@@ -576,7 +626,6 @@ def extract_profile(
             f"'{path}' does not contain a complete profile. Missing keys: {missing_character_keys}"
         )
 
-    logger.debug(f"extracted profile: {profile}")
     return profile
 
 
@@ -586,9 +635,13 @@ def _get_profile(
     wow_class: WowClass,
     *,
     accepted_errors: typing.Tuple[typing.Type[Exception], ...] = (FileNotFoundError,),
+    cache: typing.Optional[ResultCache] = None,
 ) -> dict:
     try:
-        profile = extract_profile(path, wow_class, character_source=character_source)
+        with span("extract_profile", source=character_source.name.lower()):
+            profile = extract_profile(
+                path, wow_class, character_source=character_source, cache=cache
+            )
     except accepted_errors:
         profile = {}
         logger.info(
@@ -620,12 +673,15 @@ def get_profile(wow_spec: WowSpec, fight_style: str, settings: Config) -> dict:
         dict: [description]
     """
 
+    cache = get_profile_cache(settings)
+
     if settings.custom_profile:
         custom_profile = _get_profile(
             CharacterSource.CUSTOM_PROFILE,
             "custom_profile.txt",
             wow_spec.wow_class,
             accepted_errors=(FileNotFoundError, EmptyFileError),
+            cache=cache,
         )
         if custom_profile and custom_profile["character"]["spec"] != wow_spec.simc_name:
             logger.warning(
@@ -638,6 +694,7 @@ def get_profile(wow_spec: WowSpec, fight_style: str, settings: Config) -> dict:
         CharacterSource.FALLBACK_PROFILE,
         create_fallback_profile_path(wow_spec, settings.tier, fight_style),
         wow_spec.wow_class,
+        cache=cache,
     )
     if fallback_profile:
         return fallback_profile
@@ -646,6 +703,7 @@ def get_profile(wow_spec: WowSpec, fight_style: str, settings: Config) -> dict:
         CharacterSource.SIMULATIONCRAFT,
         create_simc_profile_path(wow_spec, settings.tier, settings.executable),
         wow_spec.wow_class,
+        cache=cache,
     )
     if simc_profile:
         return simc_profile
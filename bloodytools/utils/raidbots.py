@@ -0,0 +1,282 @@
+"""Simulate Simulation_Groups with the Raidbots.com API.
+
+All groups are submitted concurrently. Outstanding jobs are polled from a
+single loop with jittered backoff, each group gets its results as soon as its
+job is complete. HTTP requests are blocking and run in worker threads, the
+event loop only coordinates them.
+"""
+
+import asyncio
+import dataclasses
+import io
+import json
+import logging
+import random
+import time
+import typing
+
+import requests
+
+from bloodytools.utils.request import RAIDBOTS_URL, request
+from bloodytools.utils.simc_json import extract_profileset_report
+from bloodytools.utils.simulation_objects import SimulationError, Simulation_Group
+
+logger = logging.getLogger(__name__)
+
+
+class RaidbotsError(SimulationError):
+    """A Raidbots job failed or didn't finish in time."""
+
+
+@dataclasses.dataclass
+class RaidbotsJob:
+    group: Simulation_Group
+    sim_id: str
+    advanced_input: str
+    done: asyncio.Future
+    deadline: float
+    progress: int = 0
+    poll_errors: int = 0
+
+
+class RaidbotsClient:
+    def __init__(
+        self,
+        apikey: str,
+        base_url: str = RAIDBOTS_URL,
+        poll_interval: float = 10.0,
+        max_poll_interval: float = 60.0,
+        job_timeout: float = 3600.0,
+        max_poll_errors: int = 10,
+        max_concurrent_requests: int = 8,
+    ) -> None:
+        """
+        Args:
+            apikey (str): Raidbots api key
+            base_url (str, optional): Raidbots or a compatible server. Defaults to RAIDBOTS_URL.
+            poll_interval (float, optional): seconds between polls while jobs make progress. Defaults to 10.0.
+            max_poll_interval (float, optional): polls slow down up to this many seconds while no job makes progress. Defaults to 60.0.
+            job_timeout (float, optional): seconds a job may take. Defaults to 3600.0.
+            max_poll_errors (int, optional): consecutive failed polls after which a job is given up. Defaults to 10.
+            max_concurrent_requests (int, optional): Defaults to 8.
+        """
+        self.apikey = apikey
+        self.base_url = base_url.rstrip("/")
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.job_timeout = job_timeout
+        self.max_poll_errors = max_poll_errors
+        self.max_concurrent_requests = max_concurrent_requests
+        self.session = requests.Session()
+        self._jobs: typing.Dict[str, RaidbotsJob] = {}
+        self._poller: typing.Optional[asyncio.Task] = None
+        self._semaphore: typing.Optional[asyncio.Semaphore] = None
+
+    def simulate_groups(
+        self,
+        groups: typing.Sequence[Simulation_Group],
+        on_complete: typing.Optional[
+            typing.Callable[[Simulation_Group, typing.Union[str, Exception]], None]
+        ] = None,
+    ) -> typing.List[typing.Union[str, Exception]]:
+        """Simulate all groups, blocks until all are done.
+
+        Args:
+            groups (typing.Sequence[Simulation_Group]): groups to simulate
+            on_complete (typing.Optional[typing.Callable[[Simulation_Group, typing.Union[str, Exception]], None]], optional): called with each group and its simc hash or error as soon as it's done. Defaults to None.
+
+        Returns:
+            typing.List[typing.Union[str, Exception]]: simc hash or error of each group
+        """
+        return asyncio.run(self.simulate_all(groups, on_complete))
+
+    async def simulate_all(
+        self,
+        groups: typing.Sequence[Simulation_Group],
+        on_complete: typing.Optional[
+            typing.Callable[[Simulation_Group, typing.Union[str, Exception]], None]
+        ] = None,
+    ) -> typing.List[typing.Union[str, Exception]]:
+        async def simulate(group: Simulation_Group) -> typing.Union[str, Exception]:
+            result: typing.Union[str, Exception]
+            try:
+                result = await self.simulate(group)
+            except Exception as e:
+                logger.error(f"Raidbots simulation of {group.name} failed.")
+                result = e
+            if on_complete:
+                on_complete(group, result)
+            return result
+
+        return list(await asyncio.gather(*(simulate(group) for group in groups)))
+
+    async def simulate(self, group: Simulation_Group) -> str:
+        """Simulate group on Raidbots and set the dps of its profiles.
+
+        Raises:
+            RaidbotsError: job failed or timed out
+
+        Returns:
+            str: git hash of the SimulationCraft build Raidbots used
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        advanced_input = group.create_raidbots_input()
+        if not advanced_input:
+            return ""
+
+        response = await self._call(
+            request,
+            f"{self.base_url}/sim",
+            apikey=self.apikey,
+            data=advanced_input,
+            session=self.session,
+        )
+        sim_id = str(response["simId"])
+        logger.info(f"Simulation of {group.name} is underway as {sim_id}.")
+
+        job = RaidbotsJob(
+            group=group,
+            sim_id=sim_id,
+            advanced_input=advanced_input,
+            done=asyncio.get_running_loop().create_future(),
+            deadline=time.monotonic() + self.job_timeout,
+        )
+        self._jobs[sim_id] = job
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        progress = await job.done
+
+        if progress["job"]["state"] == "failed":
+            await self._write_error(job)
+            raise RaidbotsError(
+                f"Simulating with Raidbots failed. Please check out {sim_id}.error file."
+            )
+
+        logger.info(f"Simulating {group.name} is done. Fetching data.")
+        data = await self._call(self._get_report, sim_id, group.full_json)
+        logger.info(f"Fetching data for {group.name} succeeded.")
+
+        return group.apply_raidbots_report(data)
+
+    async def _call(self, function: typing.Callable, *args, **kwargs) -> typing.Any:
+        assert self._semaphore
+        async with self._semaphore:
+            return await asyncio.to_thread(function, *args, **kwargs)
+
+    async def _poll(self) -> None:
+        """Poll all outstanding jobs until none are left."""
+        interval = self.poll_interval
+        while self._jobs:
+            await asyncio.sleep(interval * random.uniform(0.75, 1.25))
+
+            jobs = list(self._jobs.values())
+            progressed = await asyncio.gather(*(self._poll_job(job) for job in jobs))
+
+            # slow down while nothing happens, speed up again on progress
+            if any(progressed):
+                interval = self.poll_interval
+            else:
+                interval = min(interval * 1.5, self.max_poll_interval)
+
+    async def _poll_job(self, job: RaidbotsJob) -> bool:
+        """Poll job once, resolve it if it's done.
+
+        Returns:
+            bool: True if the job made progress
+        """
+        try:
+            progress = await self._call(
+                request,
+                f"{self.base_url}/api/job/{job.sim_id}",
+                session=self.session,
+            )
+        except (requests.exceptions.RequestException, ValueError) as e:
+            job.poll_errors += 1
+            logger.error(e)
+            if job.poll_errors >= self.max_poll_errors:
+                self._finish(job, error=RaidbotsError(f"Polling {job.sim_id} failed."))
+            return False
+        job.poll_errors = 0
+        logger.debug(progress)
+
+        state = progress.get("job", {}).get("state", "")
+        if state == "complete" or (
+            state == "failed" and int(progress.get("retriesRemaining", 0)) <= 0
+        ):
+            self._finish(job, progress=progress)
+            return True
+        if time.monotonic() > job.deadline:
+            self._finish(
+                job, error=RaidbotsError(f"{job.sim_id} didn't finish in time.")
+            )
+            return False
+
+        job_progress = int(progress["job"].get("progress", 0))
+        if job_progress != job.progress:
+            logger.info(f"{job.group.name} progress {job_progress}%")
+            job.progress = job_progress
+            return True
+        return False
+
+    def _finish(
+        self,
+        job: RaidbotsJob,
+        progress: typing.Optional[dict] = None,
+        error: typing.Optional[Exception] = None,
+    ) -> None:
+        del self._jobs[job.sim_id]
+        if error:
+            job.done.set_exception(error)
+        else:
+            job.done.set_result(progress)
+
+    def _get_report(self, sim_id: str, full_json: bool) -> dict:
+        data = request(
+            f"{self.base_url}/reports/{sim_id}/data.json", session=self.session
+        )
+        if not data.get("simbot", {}).get("hasFullJson"):
+            return data
+
+        # too many profilesets were simulated, get the full json
+        url = f"{self.base_url}/reports/{sim_id}/data.full.json"
+        if full_json:
+            return request(url, session=self.session)
+        # full reports can be hundreds of MB, only read what's needed
+        with self.session.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return extract_profileset_report(
+                io.TextIOWrapper(
+                    typing.cast(typing.BinaryIO, response.raw), encoding="utf-8"
+                )
+            )
+
+    def _get_text(self, url: str) -> str:
+        response = self.session.get(url, timeout=30)
+        response.raise_for_status()
+        return response.text
+
+    async def _write_error(self, job: RaidbotsJob) -> None:
+        logger.info("Job failed. Collecting information.")
+        texts = []
+        for part in ("input.txt", "output.txt", "data.json"):
+            try:
+                texts.append(
+                    await self._call(
+                        self._get_text, f"{self.base_url}/reports/{job.sim_id}/{part}"
+                    )
+                )
+            except requests.exceptions.RequestException as e:
+                texts.append(f"Not available: {e}")
+        raidbots_input, raidbots_output, data = texts
+
+        with open("{}.error".format(job.sim_id), "w") as f:
+            f.write("############## INPUT #############\n")
+            f.write(json.dumps(job.advanced_input))
+            f.write("\n\n############# RECEIVED ###########\n")
+            f.write(json.dumps(raidbots_input))
+            f.write("\n\n############# OUTPUT #############\n")
+            f.write(json.dumps(raidbots_output))
+            f.write("\n\n############## DATA ##############\n{}".format(data))
@@ -0,0 +1,172 @@
+"""Adaptive target_error refinement of simulation groups.
+
+All profiles of a group are simulated at a coarse target_error first. Only
+profiles whose confidence interval overlaps a neighbour in the dps ranking
+are simulated again, each round at a tighter target_error, until no
+neighbours overlap or the final target_error is reached. The amount of work
+scales with how contested a ranking is instead of with the number of
+profiles.
+"""
+
+import copy
+import logging
+import math
+import typing
+
+from bloodytools.utils.simc_json import CONFIDENCE_FACTOR
+from bloodytools.utils.simulation_objects import Simulation_Data, Simulation_Group
+
+logger = logging.getLogger(__name__)
+
+
+def get_target_error_schedule(start: str, final: str) -> typing.List[str]:
+    """Halve start until final is reached.
+
+    Args:
+        start (str): coarse target_error of the first round
+        final (str): target_error of the last round
+
+    Returns:
+        typing.List[str]: target_error of each round, e.g. ["0.4", "0.2", "0.1"]
+    """
+    schedule = []
+    error = float(start)
+    while error > float(final):
+        schedule.append(str(error))
+        error /= 2
+    schedule.append(str(float(final)))
+    return schedule
+
+
+def get_confidence_intervals(
+    group: Simulation_Group,
+) -> typing.Dict[str, typing.Tuple[float, float]]:
+    """Confidence interval of the dps of each profile of a simulated group.
+
+    The error is derived from the standard error SimulationCraft reports.
+    If the report lacks it, target_error of the profile is used as the
+    relative error.
+
+    Returns:
+        typing.Dict[str, typing.Tuple[float, float]]: profile name -> (low, high)
+    """
+    std_errors: typing.Dict[str, float] = {}
+    if group.json_data:
+        sim = group.json_data["sim"]
+        dps = sim["players"][0].get("collected_data", {}).get("dps", {})
+        if "mean_std_dev" in dps:
+            std_errors[group.profiles[0].name] = dps["mean_std_dev"]
+        for result in sim.get("profilesets", {}).get("results", []):
+            if result.get("stddev") and result.get("iterations"):
+                std_errors[result["name"]] = result["stddev"] / math.sqrt(
+                    result["iterations"]
+                )
+
+    intervals = {}
+    for profile in group.profiles:
+        mean = profile.get_dps()
+        if profile.name in std_errors:
+            error = CONFIDENCE_FACTOR * std_errors[profile.name]
+        else:
+            error = mean * float(profile.target_error) / 100
+        intervals[profile.name] = (mean - error, mean + error)
+    return intervals
+
+
+def get_contested_profiles(
+    intervals: typing.Dict[str, typing.Tuple[float, float]],
+) -> typing.Set[str]:
+    """Names of all profiles whose interval overlaps a neighbour in the ranking."""
+    ranking = sorted(intervals, key=lambda name: sum(intervals[name]), reverse=True)
+    contested: typing.Set[str] = set()
+    for higher, lower in zip(ranking, ranking[1:]):
+        if intervals[higher][0] <= intervals[lower][1]:
+            contested.update((higher, lower))
+    return contested
+
+
+def _merge_json_data(json_data: dict, refined_json_data: dict) -> None:
+    """Replace results in json_data by the results of a refinement round."""
+    sim = json_data["sim"]
+    refined_sim = refined_json_data["sim"]
+    sim["players"][0]["collected_data"] = refined_sim["players"][0].get(
+        "collected_data", {}
+    )
+    sim["statistics"] = refined_sim["statistics"]
+
+    refined_results = {
+        result["name"]: result
+        for result in refined_sim.get("profilesets", {}).get("results", [])
+    }
+    results = sim.get("profilesets", {}).get("results", [])
+    for i, result in enumerate(results):
+        results[i] = refined_results.get(result["name"], result)
+
+
+def refine_simulation_group(
+    group: Simulation_Group,
+    create_group: typing.Callable[[str], Simulation_Group],
+    start_target_error: str,
+) -> int:
+    """Simulate group with adaptive target_error refinement. Afterwards all
+    profiles of group have their dps set, their target_error is the one of
+    their last simulation, and group.json_data holds the most precise result
+    of each profile.
+
+    Args:
+        group (Simulation_Group): group to simulate, target_error of its profiles is the final target_error
+        create_group (typing.Callable[[str], Simulation_Group]): creates an empty group for each refinement round
+        start_target_error (str): target_error of the first round
+
+    Returns:
+        int: number of simulation rounds
+    """
+    final_target_error = group.profiles[0].target_error
+    schedule = get_target_error_schedule(start_target_error, final_target_error)
+    if len(group.profiles) < 3:
+        schedule = schedule[-1:]
+
+    for profile in group.profiles:
+        profile.target_error = schedule[0]
+    logger.info(
+        f"Simulating {len(group.profiles)} profiles of {group.name} at target_error {schedule[0]}"
+    )
+    group.simulate()
+    intervals = get_confidence_intervals(group)
+
+    profiles_by_name = {profile.name: profile for profile in group.profiles}
+    rounds = 1
+    for target_error in schedule[1:]:
+        contested = get_contested_profiles(intervals)
+        contested.discard(group.profiles[0].name)
+        if not contested:
+            break
+
+        logger.info(
+            f"Refining {len(contested)} of {len(group.profiles)} contested profiles of {group.name} at target_error {target_error}"
+        )
+        round_group = create_group(f"{group.name}_refinement_{rounds}")
+        for profile in group.profiles:
+            if profile is group.profiles[0] or profile.name in contested:
+                round_profile: Simulation_Data = copy.copy(profile)
+                round_profile.target_error = target_error
+                round_profile.dps = -1
+                round_group.add(round_profile)
+        round_group.simulate()
+        rounds += 1
+
+        for profile in round_group.profiles:
+            original = profiles_by_name[profile.name]
+            original.target_error = target_error
+            original.dps = -1
+            original.set_dps(profile.get_dps(), external=False)
+            original.set_simc_statistics(
+                profile.iterations_run,
+                profile.stddev,
+                original.cpu_seconds + profile.cpu_seconds,
+            )
+        intervals.update(get_confidence_intervals(round_group))
+        if group.json_data and round_group.json_data:
+            _merge_json_data(group.json_data, round_group.json_data)
+
+    return rounds
@@ -1,9 +1,25 @@
+import logging
+import random
 import time
 
 import requests
 import requests.adapters
 import requests.packages.urllib3
 
+logger = logging.getLogger(__name__)
+
+RAIDBOTS_URL = "https://www.raidbots.com"
+
+
+def get_retry_delay(response: requests.Response, attempt: int) -> float:
+    """Seconds to wait before retrying a rate limited request. Uses the
+    Retry-After header if present, otherwise jittered exponential backoff.
+    """
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return min(60.0, 2.0**attempt) * random.uniform(0.5, 1.5)
+
 
 def request(
     url: str,
@@ -47,7 +63,7 @@ def request(
         )
         adapter = requests.adapters.HTTPAdapter(max_retries=retries_adapter)
         # register adapter for target
-        s.mount("https://www.raidbots.com/", adapter)
+        s.mount(f"{RAIDBOTS_URL}/", adapter)
 
     headers = {
         "Content-Type": "application/json",
@@ -67,8 +83,12 @@ def request(
 
         response = s.post(url, json=body, headers=headers, timeout=timeout)
 
-        while response.status_code == 429:
-            time.sleep(10)
+        attempt = 0
+        while response.status_code == 429 and attempt < retries:
+            delay = get_retry_delay(response, attempt)
+            logger.info(f"Rate limited by '{url}'. Retrying in {delay:.1f}s.")
+            time.sleep(delay)
+            attempt += 1
             response = s.post(url, json=body, headers=headers, timeout=timeout)
 
     # get
@@ -0,0 +1,266 @@
+"""Run the spec x simulator x fight style job matrix concurrently.
+
+Each job is one `Simulator.run()`. Jobs share a global core budget which is
+split between the number of concurrent jobs and SimulationCraft's own
+`threads`/`profileset_work_threads`.
+"""
+
+import concurrent.futures
+import copy
+import dataclasses
+import datetime
+import logging
+import os
+import typing
+
+from bloodytools.utils.config import Config
+from bloodytools.utils.journal import JobJournal
+from bloodytools.utils.tracing import propagate, span
+from simc_support.game_data.WowSpec import WowSpec
+
+if typing.TYPE_CHECKING:
+    from bloodytools.simulations.simulator import SimulatorFactory
+
+logger = logging.getLogger(__name__)
+
+MIN_THREADS_PER_SIMULATION = 4
+"""Small simulations don't scale beyond a few threads, concurrent simulations split the cores instead."""
+
+T = typing.TypeVar("T")
+
+
+class JobsFailedError(Exception):
+    """At least one job of the job matrix failed."""
+
+    def __init__(self, failed_results: typing.List["JobResult"]) -> None:
+        self.failed_results = failed_results
+        names = ", ".join(str(result.job) for result in failed_results)
+        super().__init__(f"{len(failed_results)} job(s) failed: {names}")
+
+
+@dataclasses.dataclass(frozen=True)
+class Job:
+    """One cell of the job matrix."""
+
+    simulator_name: str
+    wow_spec: WowSpec
+    fight_style: str
+
+    def __str__(self) -> str:
+        return f"{self.simulator_name} of {self.wow_spec} fighting {self.fight_style}"
+
+
+@dataclasses.dataclass
+class JobResult:
+    job: Job
+    success: bool
+    duration: datetime.timedelta
+    error: typing.Optional[BaseException] = None
+    skipped: bool = False
+    """Job was done by a previous run or its result is up to date."""
+
+
+def create_job_matrix(config: Config) -> typing.List[Job]:
+    """Create all jobs up front, in the same order the old nested loops used."""
+    return [
+        Job(simulator_name=simulator_name, wow_spec=wow_spec, fight_style=fight_style)
+        for wow_spec in config.wow_specs
+        for simulator_name in config.simulator_type_names
+        for fight_style in config.fight_styles
+    ]
+
+
+def get_core_budget(config: Config) -> int:
+    """Number of cores all jobs may use together."""
+    if config.core_budget > 0:
+        return config.core_budget
+    return os.cpu_count() or 1
+
+
+def get_threads_per_job(core_budget: int, concurrent_jobs: int) -> int:
+    return max(1, core_budget // max(1, concurrent_jobs))
+
+
+def get_concurrent_simulations(threads: int, simulations: int) -> int:
+    """Number of simulations to run at once with threads, each gets at least
+    MIN_THREADS_PER_SIMULATION threads.
+    """
+    return max(1, min(simulations, threads // MIN_THREADS_PER_SIMULATION))
+
+
+def run_concurrently(
+    function: typing.Callable[[T], typing.Any],
+    items: typing.Iterable[T],
+    workers: int,
+) -> typing.List[typing.Optional[Exception]]:
+    """Call function with each item using up to workers threads.
+
+    A failing call doesn't stop the others.
+
+    Returns:
+        typing.List[typing.Optional[Exception]]: error of each item in order of items, None on success
+    """
+    items = list(items)
+
+    def call(item: T) -> typing.Optional[Exception]:
+        try:
+            function(item)
+        except Exception as e:
+            return e
+        return None
+
+    if workers <= 1 or len(items) <= 1:
+        return [call(item) for item in items]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(propagate(call), items))
+
+
+def create_job_config(config: Config, job_index: int, threads: int) -> Config:
+    """Create an independent copy of config for a concurrently running job.
+
+    Each job gets its own base_filename so simc input and output files of
+    parallel jobs don't collide, and its share of the core budget. Dict and
+    list settings are copied too, so a job can't change the settings of
+    another job. dataclasses.replace isn't used because __post_init__ would
+    reset target_error and run the simc executable again.
+    """
+    job_config = copy.copy(config)
+    for field in dataclasses.fields(config):
+        value = getattr(config, field.name)
+        if isinstance(value, (dict, list)):
+            setattr(job_config, field.name, copy.copy(value))
+    job_config.base_filename = f"{config.base_filename}_{job_index}"
+    job_config.threads = str(threads)
+    try:
+        profileset_work_threads = int(config.profileset_work_threads)
+    except ValueError:
+        profileset_work_threads = threads
+    job_config.profileset_work_threads = str(min(profileset_work_threads, threads))
+    return job_config
+
+
+class JobScheduler:
+    """Runs jobs of the job matrix with `config.concurrent_jobs` workers.
+
+    A failing job is logged and recorded in its JobResult, remaining jobs
+    continue. With a journal, job states are recorded and jobs the journal
+    knows as done are skipped.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        simulator_factory: "SimulatorFactory",
+        journal: typing.Optional[JobJournal] = None,
+    ) -> None:
+        self.config = config
+        self.simulator_factory = simulator_factory
+        self.journal = journal
+
+    @property
+    def concurrent_jobs(self) -> int:
+        return max(1, self.config.concurrent_jobs)
+
+    def run(
+        self, jobs: typing.Optional[typing.List[Job]] = None
+    ) -> typing.List[JobResult]:
+        if jobs is None:
+            jobs = create_job_matrix(self.config)
+
+        results: typing.Dict[Job, JobResult] = {}
+        if self.journal:
+            results = {
+                job: JobResult(
+                    job=job,
+                    success=True,
+                    duration=datetime.timedelta(),
+                    skipped=True,
+                )
+                for job in jobs
+                if self.journal.is_done(job)
+            }
+            if results:
+                logger.info(
+                    f"Skipping {len(results)} of {len(jobs)} jobs finished by a previous run."
+                )
+        pending_jobs = [job for job in jobs if job not in results]
+
+        if self.concurrent_jobs == 1 or len(pending_jobs) <= 1:
+            for job in pending_jobs:
+                results[job] = self._run_job(job, self.config)
+            return [results[job] for job in jobs]
+
+        workers = min(self.concurrent_jobs, len(pending_jobs))
+        threads = get_threads_per_job(get_core_budget(self.config), workers)
+        logger.info(
+            f"Running {len(pending_jobs)} jobs with {workers} concurrent jobs using {threads} threads each."
+        )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    self._run_job,
+                    job,
+                    create_job_config(self.config, i, threads),
+                ): job
+                for i, job in enumerate(pending_jobs)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+
+        return [results[job] for job in jobs]
+
+    def _run_job(self, job: Job, config: Config) -> JobResult:
+        with span(
+            "job",
+            simulator=job.simulator_name,
+            spec=str(job.wow_spec),
+            fight_style=job.fight_style,
+        ) as tags:
+            result = self._run_simulator(job, config)
+            tags["success"] = result.success
+            tags["skipped"] = result.skipped
+        return result
+
+    def _run_simulator(self, job: Job, config: Config) -> JobResult:
+        start_time = datetime.datetime.utcnow()
+        if self.journal:
+            self.journal.start(job)
+        try:
+            simulator_class = self.simulator_factory.get_simulator(job.simulator_name)
+            logger.info(
+                f"Starting {simulator_class.name()} simulation for {job.wow_spec} fighting {job.fight_style}."
+            )
+            simulator = simulator_class(
+                wow_spec=job.wow_spec,
+                fight_style=job.fight_style,
+                settings=config,
+            )
+            if config.skip_fresh and simulator.is_result_fresh():
+                logger.info(f"Result of {job} is up to date.")
+                if self.journal:
+                    self.journal.finish(job, simulator.get_output_path())
+                return JobResult(
+                    job=job,
+                    success=True,
+                    duration=datetime.datetime.utcnow() - start_time,
+                    skipped=True,
+                )
+            simulator.run()
+        except Exception as e:
+            logger.exception(f"Job {job} failed.")
+            if self.journal:
+                self.journal.fail(job, e)
+            return JobResult(
+                job=job,
+                success=False,
+                duration=datetime.datetime.utcnow() - start_time,
+                error=e,
+            )
+        logger.info(f"{job} finished.")
+        if self.journal:
+            self.journal.finish(job, simulator.get_output_path())
+        return JobResult(
+            job=job, success=True, duration=datetime.datetime.utcnow() - start_time
+        )
@@ -0,0 +1,302 @@
+"""Helpers to work with SimulationCraft's json reports.
+
+Bloodytools only reads a small part of a report. `trim_json_data` reduces a
+report to exactly that part, which keeps cached and transferred results small.
+`extract_profileset_report` reads the same part directly from a report file
+without loading the whole report into memory.
+"""
+
+import json
+import math
+import re
+import typing
+
+PLAYER_KEYS = (
+    "name",
+    "race",
+    "level",
+    "role",
+    "specialization",
+    "talents",
+)
+"""Keys of sim.players[*] that are kept when trimming."""
+
+
+def _scalars(data: dict) -> dict:
+    return {
+        key: value for key, value in data.items() if not isinstance(value, (dict, list))
+    }
+
+
+def trim_player(player: dict) -> dict:
+    """Reduce a sim.players[*] entry to name, talents, and its dps."""
+    trimmed = {key: player[key] for key in PLAYER_KEYS if key in player}
+    collected_data = player.get("collected_data", {})
+    if "dps" in collected_data:
+        trimmed["collected_data"] = {"dps": collected_data["dps"]}
+    return trimmed
+
+
+def trim_json_data(json_data: dict) -> dict:
+    """Reduce a SimulationCraft json report to the parts bloodytools uses.
+
+    Kept are top level scalars (e.g. version, git_revision), scalar
+    sim.options, trimmed sim.players, sim.statistics, and sim.profilesets.
+    The result can be used everywhere a full report is expected by
+    Simulation_Group.set_dps_from_profiletset_data.
+
+    Args:
+        json_data (dict): full json report
+
+    Returns:
+        dict: trimmed report
+    """
+    sim = json_data.get("sim", {})
+
+    trimmed_sim: typing.Dict[str, typing.Any] = {
+        "players": [trim_player(player) for player in sim.get("players", [])],
+        "statistics": sim.get("statistics", {}),
+    }
+    if "options" in sim:
+        trimmed_sim["options"] = _scalars(sim["options"])
+    if "profilesets" in sim:
+        trimmed_sim["profilesets"] = sim["profilesets"]
+
+    trimmed = _scalars(json_data)
+    trimmed["sim"] = trimmed_sim
+    return trimmed
+
+
+CONFIDENCE_FACTOR = 1.96
+"""Standard errors of a 95% confidence interval, matches SimulationCraft's target_error."""
+
+
+def get_sample_statistics(
+    sample: dict, iterations: int = 0
+) -> typing.Tuple[int, float]:
+    """Iterations and standard deviation of single iterations of a sample of
+    a report, e.g. sim.statistics.raid_dps or a profileset result.
+
+    Args:
+        sample (dict): sample of the report
+        iterations (int, optional): used if the sample doesn't name its own iterations. Defaults to 0.
+
+    Returns:
+        typing.Tuple[int, float]: iterations, standard deviation (0.0 if unknown)
+    """
+    iterations = int(sample.get("iterations", sample.get("count", iterations)) or 0)
+    if "stddev" in sample:
+        return iterations, float(sample["stddev"])
+    if "std_dev" in sample:
+        return iterations, float(sample["std_dev"])
+    if "mean_std_dev" in sample:
+        return iterations, float(sample["mean_std_dev"]) * math.sqrt(iterations)
+    return iterations, 0.0
+
+
+def get_achieved_error(mean: float, stddev: float, iterations: int) -> float:
+    """Error of mean in percent, comparable to target_error.
+
+    Args:
+        mean (float): mean dps
+        stddev (float): standard deviation of single iterations
+        iterations (int): number of iterations
+
+    Returns:
+        float: error, 0.0 if it can't be determined
+    """
+    if mean <= 0 or iterations <= 0:
+        return 0.0
+    return CONFIDENCE_FACTOR * stddev / math.sqrt(iterations) / mean * 100
+
+
+SCALARS = "__scalars__"
+"""Selection key to keep all scalar values of an object."""
+
+REPORT_SELECTION: typing.Dict[str, typing.Any] = {
+    SCALARS: True,
+    "sim": {
+        "options": {SCALARS: True},
+        "players": [
+            {
+                **{key: True for key in PLAYER_KEYS},
+                "collected_data": {"dps": True},
+            }
+        ],
+        "statistics": True,
+        "profilesets": True,
+    },
+}
+"""Parts of a report read by extract_profileset_report. True reads the whole
+value, a dict reads the listed keys of an object, a list applies its only
+element to all elements of an array."""
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r"[^,\]}\s]+")
+_STRUCTURE = re.compile(r'["\[\]{}]')
+
+
+class _JsonStream:
+    """Minimal pull parser over a text stream. Only the value that is
+    currently read and one chunk are kept in memory."""
+
+    def __init__(self, stream: typing.TextIO, chunk_size: int) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, min_size: int = 0) -> bool:
+        """Read at least one more chunk. Returns False at the end of the stream."""
+        if self.eof:
+            return False
+        self.buffer = self.buffer[self.pos :]
+        self.pos = 0
+        target_size = len(self.buffer) + max(self.chunk_size, min_size)
+        while len(self.buffer) < target_size:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                self.eof = True
+                break
+            self.buffer += chunk
+        return True
+
+    def _match(self, pattern: typing.Pattern) -> typing.Optional[typing.Match]:
+        """Match pattern at the current position. Matches touching the end of
+        the buffer are retried with more data."""
+        while True:
+            match = pattern.match(self.buffer, self.pos)
+            if match and (match.end() < len(self.buffer) or self.eof):
+                return match
+            # values grow geometrically to keep retries linear
+            if not self._fill(len(self.buffer) - self.pos):
+                return match
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, empty at the end of the stream."""
+        match = self._match(_WHITESPACE)
+        if match:
+            self.pos = match.end()
+        return self.buffer[self.pos : self.pos + 1]
+
+    def next_char(self) -> str:
+        char = self.peek()
+        if not char:
+            raise ValueError("Unexpected end of json report.")
+        self.pos += 1
+        return char
+
+    def expect(self, char: str) -> None:
+        found = self.next_char()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' in json report.")
+
+    def read_value(self) -> typing.Any:
+        if self.peek() not in ('"', "[", "{"):
+            # numbers and literals might continue in the next chunk
+            self._match(_SCALAR)
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(len(self.buffer) - self.pos):
+                    raise
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self) -> None:
+        char = self.peek()
+        if char == '"':
+            self._skip_string()
+            return
+        if char not in ("[", "{"):
+            match = self._match(_SCALAR)
+            if not match:
+                raise ValueError("Invalid value in json report.")
+            self.pos = match.end()
+            return
+
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(self.buffer, self.pos)
+            if not match:
+                self.pos = len(self.buffer)
+                if not self._fill():
+                    raise ValueError("Unexpected end of json report.")
+                continue
+            if match.group() == '"':
+                self.pos = match.start()
+                self._skip_string()
+                continue
+            self.pos = match.end()
+            if match.group() in ("[", "{"):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _skip_string(self) -> None:
+        match = self._match(_STRING)
+        if not match:
+            raise ValueError("Unterminated string in json report.")
+        self.pos = match.end()
+
+
+def _read_selection(stream: _JsonStream, selection: typing.Any) -> typing.Any:
+    if selection is True:
+        return stream.read_value()
+
+    if isinstance(selection, list):
+        if stream.peek() != "[":
+            return stream.read_value()
+        stream.expect("[")
+        values: typing.List[typing.Any] = []
+        if stream.peek() == "]":
+            stream.expect("]")
+            return values
+        while True:
+            values.append(_read_selection(stream, selection[0]))
+            if stream.next_char() == "]":
+                return values
+
+    if stream.peek() != "{":
+        return stream.read_value()
+    stream.expect("{")
+    data: typing.Dict[str, typing.Any] = {}
+    if stream.peek() == "}":
+        stream.expect("}")
+        return data
+    while True:
+        key = stream.read_value()
+        stream.expect(":")
+        if key in selection:
+            data[key] = _read_selection(stream, selection[key])
+        elif selection.get(SCALARS) and stream.peek() not in ("[", "{"):
+            data[key] = stream.read_value()
+        else:
+            stream.skip_value()
+        if stream.next_char() == "}":
+            return data
+
+
+def extract_profileset_report(stream: typing.TextIO, chunk_size: int = 1024**2) -> dict:
+    """Read the parts of a json report bloodytools uses from a text stream.
+
+    The result equals trim_json_data of the fully parsed report, but only
+    one chunk and the currently read value are kept in memory.
+
+    Args:
+        stream (typing.TextIO): json report, e.g. an opened file
+        chunk_size (int, optional): characters read at once. Defaults to 1024**2.
+
+    Returns:
+        dict: trimmed report
+    """
+    return trim_json_data(
+        _read_selection(_JsonStream(stream, chunk_size), REPORT_SELECTION)
+    )
@@ -1,24 +1,76 @@
+import collections
+import copy
 import datetime
 import json
 import logging
 import json
 import os
-import requests
 import subprocess
 import sys
+import time
 import typing
 import threading
-import time
 import uuid as uuid_mod
+from concurrent.futures import ThreadPoolExecutor
 
 # wow game data and simc input checks
 from simc_support.simc_data import FightStyle
 from simc_support.game_data.WowClass import WOWCLASSES
 from typing import List, Union
-from bloodytools.utils.request import request as r
+from bloodytools.utils.cache import ResultCache
+from bloodytools.utils.request import RAIDBOTS_URL
+from bloodytools.utils.simc_json import (
+    extract_profileset_report,
+    get_achieved_error,
+    get_sample_statistics,
+    trim_json_data,
+    trim_player,
+)
+from bloodytools.utils.tracing import propagate, span
+
+if typing.TYPE_CHECKING:
+    from bloodytools.utils.backends import SimulationBackend
 
 logger = logging.getLogger(__name__)
 
+AUTO_SHARD_THREADS = 8
+"""Threads per shard if the shard count is picked automatically. SimulationCrafts profileset parallelism stops scaling around this value."""
+
+OUTPUT_BUFFER_LINES = 500
+"""Last lines of SimulationCraft output a Simulation_Group keeps for error reports."""
+
+PROGRESS_INTERVAL = 0.5
+"""Seconds between progress updates on the command line."""
+
+PROFILESET_BASE_ATTRIBUTES = frozenset(
+    (
+        "calculate_scale_factors",
+        "default_actions",
+        "default_skill",
+        "executable",
+        "fight_style",
+        "fixed_time",
+        "iterations",
+        "log",
+        "optimize_expressions",
+        "ptr",
+        "ready_trigger",
+        "target_error",
+        "threads",
+        "remove_files",
+        "generate_html",
+        "custom_apl",
+        "custom_fight_style",
+        "_raw_profile",
+    )
+)
+"""Attributes a Profileset_Data reads from its base."""
+
+SIMC_WOW_CLASS_NAMES = frozenset(
+    wow_class.simc_name.replace("_", "") for wow_class in WOWCLASSES
+)
+"""Names of class declarations in simc input, e.g. "deathknight"."""
+
 
 class Error(Exception):
     """Base class for exceptions in this module."""
@@ -61,6 +113,12 @@ class SimulationWasNotRunError(Error):
     pass
 
 
+class DuplicateProfileNameError(Error):
+    """A profile with the same name is already part of the simulation group."""
+
+    pass
+
+
 class Simulation_Data:
     """Manages all META-information for a single simulation and the result.
 
@@ -230,6 +288,11 @@ class Simulation_Data:
         self.so_creation_time = datetime.datetime.utcnow()
         # simulation dps result
         self.dps: int = -1
+        # statistics of the simulation reported by SimulationCraft, see set_simc_statistics
+        self.iterations_run: int = 0
+        self.stddev: float = 0.0
+        self.cpu_seconds: float = 0.0
+        self.achieved_error: float = 0.0
         # flag to know whether data was generated with external simulation function
         self.external_simulation = False
         # simulation full report (command line print out)
@@ -282,7 +345,7 @@ class Simulation_Data:
             bool -- True if equallity between mentioned data is guaranteed.
         """
 
-        if not isinstance(simulation_instance, Simulation_Data):
+        if not isinstance(simulation_instance, (Simulation_Data, Profileset_Data)):
             raise TypeError(
                 f"Expected Simulation_Data, got <{type(simulation_instance)}> instead."
             )
@@ -360,6 +423,23 @@ class Simulation_Data:
             raise e
         logger.debug("Set DPS of profile '{}' to {}.".format(self.name, self.get_dps()))
 
+    def set_simc_statistics(
+        self, iterations: int, stddev: float, cpu_seconds: float = 0.0
+    ) -> None:
+        """Set the statistics SimulationCraft reported for this profile. Set dps first, achieved_error depends on it.
+
+        Arguments:
+            iterations {int} -- iterations that were run
+            stddev {float} -- standard deviation of the dps of single iterations
+
+        Keyword Arguments:
+            cpu_seconds {float} -- CPU time spent on this profile (default: {0.0})
+        """
+        self.iterations_run = iterations
+        self.stddev = stddev
+        self.cpu_seconds = cpu_seconds
+        self.achieved_error = get_achieved_error(self.dps, stddev, iterations)
+
     def get_simulation_duration(self) -> datetime.timedelta:
         """Return the simulation duration.
 
@@ -475,39 +555,40 @@ class Simulation_Data:
 
         fail_counter = 0
         simulation_output: typing.Optional[subprocess.CompletedProcess] = None
-        # should prevent additional empty windows popping up...on win32 systems without breaking different OS
-        if sys.platform == "win32":
-            # call simulationcraft in the background. Save output for processing
-            startupinfo = subprocess.STARTUPINFO()  # type: ignore
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # type: ignore
+        with span("simc", profiles=1):
+            # should prevent additional empty windows popping up...on win32 systems without breaking different OS
+            if sys.platform == "win32":
+                # call simulationcraft in the background. Save output for processing
+                startupinfo = subprocess.STARTUPINFO()  # type: ignore
+                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # type: ignore
 
-            while not hasattr(self, "success") and fail_counter < 5:
-                simulation_output = subprocess.run(
-                    argument,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    startupinfo=startupinfo,
-                )
+                while not hasattr(self, "success") and fail_counter < 5:
+                    simulation_output = subprocess.run(
+                        argument,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        universal_newlines=True,
+                        startupinfo=startupinfo,
+                    )
 
-                if simulation_output.returncode != 0:
-                    fail_counter += 1
-                else:
-                    self.success = True
+                    if simulation_output.returncode != 0:
+                        fail_counter += 1
+                    else:
+                        self.success = True
 
-        else:
-            while not hasattr(self, "success") and fail_counter < 5:
-                simulation_output = subprocess.run(
-                    argument,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                )
+            else:
+                while not hasattr(self, "success") and fail_counter < 5:
+                    simulation_output = subprocess.run(
+                        argument,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        universal_newlines=True,
+                    )
 
-                if simulation_output.returncode != 0:
-                    fail_counter += 1
-                else:
-                    self.success = True
+                    if simulation_output.returncode != 0:
+                        fail_counter += 1
+                    else:
+                        self.success = True
 
         if simulation_output is None:
             raise SimulationWasNotRunError(
@@ -571,6 +652,10 @@ class Simulation_Data:
 
         new_sim_data.so_creation_time = self.so_creation_time
         new_sim_data.dps = self.dps
+        new_sim_data.iterations_run = self.iterations_run
+        new_sim_data.stddev = self.stddev
+        new_sim_data.cpu_seconds = self.cpu_seconds
+        new_sim_data.achieved_error = self.achieved_error
         new_sim_data.external_simulation = self.external_simulation
         new_sim_data.full_report = self.full_report
         new_sim_data.so_simulation_end_time = self.so_simulation_end_time
@@ -589,11 +674,84 @@ class Simulation_Data:
         #     data["sim"]["players"][0]["collected_data"]["dps"]["mean"],
         #     external=False,
         # )
+        statistics = data["sim"]["statistics"]
         self.set_dps(
-            data["sim"]["statistics"]["raid_dps"]["mean"],
+            statistics["raid_dps"]["mean"],
             external=False,
         )
         logger.debug("Set dps for profile.")
+        self.set_simc_statistics(
+            *get_sample_statistics(
+                statistics["raid_dps"],
+                data["sim"].get("options", {}).get("iterations", 0),
+            ),
+            cpu_seconds=statistics.get("elapsed_cpu_seconds", 0.0),
+        )
+
+
+class Profileset_Data:
+    """Lightweight profileset of a Simulation_Group. Holds its name, its own
+    simc_arguments, and the results. Everything else (profile, fight style,
+    precision, custom apl, ...) is read from base, a Simulation_Data that all
+    profilesets of a group share and that isn't changed by them. Use it for
+    groups with thousands of profiles.
+
+    simc_arguments are the arguments of base followed by the own arguments,
+    so the own arguments need to override every argument base adds on top of
+    its profile.
+    """
+
+    __slots__ = (
+        "base",
+        "name",
+        "arguments",
+        "comment",
+        "target_error",
+        "dps",
+        "iterations_run",
+        "stddev",
+        "cpu_seconds",
+        "achieved_error",
+        "external_simulation",
+    )
+
+    def __init__(
+        self,
+        base: Simulation_Data,
+        name: str,
+        simc_arguments: typing.Iterable[str] = (),
+        comment: str = "",
+    ) -> None:
+        self.base = base
+        self.name = name
+        self.arguments = tuple(simc_arguments)
+        self.comment = comment
+        # target_error isn't set, it's read from base until a refinement changes it
+        self.dps: int = -1
+        self.iterations_run: int = 0
+        self.stddev: float = 0.0
+        self.cpu_seconds: float = 0.0
+        self.achieved_error: float = 0.0
+        self.external_simulation = False
+
+    def __getattr__(self, name: str) -> typing.Any:
+        # only called for attributes that aren't set, e.g. while copying
+        if name == "base" or name.startswith("__"):
+            raise AttributeError(name)
+        if name not in PROFILESET_BASE_ATTRIBUTES:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        return getattr(self.base, name)
+
+    @property
+    def simc_arguments(self) -> typing.List[str]:
+        return self.base.simc_arguments + list(self.arguments)
+
+    get_dps = Simulation_Data.get_dps
+    set_dps = Simulation_Data.set_dps
+    set_simc_statistics = Simulation_Data.set_simc_statistics
+    is_equal = Simulation_Data.is_equal
 
 
 class Simulation_Group:
@@ -609,6 +767,16 @@ class Simulation_Group:
         executable: str = "",
         remove_files: bool = True,
         generate_html: bool = False,
+        cache: typing.Optional[ResultCache] = None,
+        simc_hash: str = "",
+        incremental: bool = False,
+        shards: int = 1,
+        shard_threads: int = 0,
+        full_json: bool = False,
+        hoist_keys: typing.Iterable[str] = (),
+        backend: typing.Optional["SimulationBackend"] = None,
+        output_log: bool = False,
+        output_buffer_lines: int = OUTPUT_BUFFER_LINES,
     ) -> None:
         logger.debug("simulation_group initiated.")
 
@@ -627,7 +795,32 @@ class Simulation_Group:
         # simulationcrafts own multithreading
         self.profileset_work_threads = profileset_work_threads
         self.executable = executable
+        # skips simulations that were already done with the same input and simc build
+        self.cache = cache
+        self.simc_hash = simc_hash
+        # only simulates profiles whose results aren't cached individually
+        self.incremental = incremental
+        # number of simc processes the profilesets are split across, 0 picks a count based on available cores
+        self.shards = shards
+        # threads of each shard, 0 splits threads evenly
+        self.shard_threads = shard_threads
+        # keep the whole json report instead of only the parts needed to set dps
+        self.full_json = full_json
+        # profileset arguments with these keys are only written if they differ from the baseline
+        self.hoist_keys = frozenset(hoist_keys)
+        # runs the simulation, None simulates right here
+        self.backend = backend
+        # stream the whole SimulationCraft output to <base_filename>.log
+        self.output_log = output_log
+        # only the last lines of the output are kept in memory
+        self._output_lines: typing.Deque[str] = collections.deque(
+            maxlen=output_buffer_lines
+        )
         self.profiles: List[Simulation_Data]
+        # name -> profile, see get_profile
+        self._profiles_by_name: typing.Dict[str, Simulation_Data] = {}
+        self._indexed_profiles: typing.Optional[List[Simulation_Data]] = None
+        self._indexed_count = 0
         self.sg_simulation_start_time: typing.Optional[datetime.datetime] = None
         self.sg_simulation_end_time: typing.Optional[datetime.datetime] = None
 
@@ -637,8 +830,10 @@ class Simulation_Group:
         elif type(simulation_instance) == list:
             correct_type = True
             for data in simulation_instance:  # type: ignore
-                if type(data) != Simulation_Data:
+                if type(data) not in (Simulation_Data, Profileset_Data):
                     correct_type = False
+            if type(simulation_instance[0]) != Simulation_Data:  # type: ignore
+                correct_type = False
             if correct_type:
                 self.profiles = simulation_instance  # type: ignore
             else:
@@ -657,8 +852,13 @@ class Simulation_Group:
         # check input values
         if not self.selfcheck():
             raise ValueError("Selfcheck of the simulation_group failed.")
-
-        self.simulation_output = ""
+        self._index_profiles()
+        if len(self._profiles_by_name) < len(self.profiles):
+            raise DuplicateProfileNameError(
+                "Profile names of simulation_group '{}' aren't unique.".format(
+                    self.name
+                )
+            )
 
     def selfcheck(self) -> bool:
         """Compares the base content of all profiles. All profiles need to
@@ -694,8 +894,18 @@ class Simulation_Group:
         """Set sg_simulation_start_time. Can be done multiple times."""
         self.sg_simulation_start_time = datetime.datetime.utcnow()
 
+    @property
+    def simulation_output(self) -> str:
+        """Last lines of the SimulationCraft output."""
+        return "\n".join(self._output_lines)
+
+    @simulation_output.setter
+    def simulation_output(self, output: str) -> None:
+        self._output_lines.clear()
+        self._output_lines.extend(output.splitlines())
+
     def monitor_simulation(self, process) -> None:
-        """Monitors and prints the most recent output from the simc subprocess to command line. Additionally saves the line to simulation_output of the simulation_group.
+        """Monitors the output of the simc subprocess. The most recent line is shown on the command line at most every PROGRESS_INTERVAL seconds, the last lines are kept in simulation_output. With output_log the whole output is written to <base_filename>.log.
 
         Arguments:
             process {subprocess.Popen} -- the ongoing simulation subprocess
@@ -703,21 +913,35 @@ class Simulation_Group:
         Returns:
             None --
         """
-        self.simulation_output = ""
-
-        for line in iter(process.stdout.readline, ""):
-            # shorten output, this console print is not intended to replace the log
-            output_length = 100
-
-            print_line = line.strip()
-            print_line = print_line[:output_length]
-            logger.debug(print_line)
-            # save line for later use
-            self.simulation_output += print_line + "\n"
-            # remove previously printed line
-            print(" " * output_length, end="\r", flush=True)
-            # write current output
-            print("{}".format(print_line), end="\r", flush=True)  # kill line break
+        # shorten output, this console print is not intended to replace the log
+        output_length = 100
+        debug = logger.isEnabledFor(logging.DEBUG)
+        self._output_lines.clear()
+        next_progress = 0.0
+
+        log_file = (
+            open(f"{self.base_filename}.log", "a", encoding="utf-8")
+            if self.output_log
+            else None
+        )
+        try:
+            for line in iter(process.stdout.readline, ""):
+                if log_file:
+                    log_file.write(line)
+                print_line = line.strip()[:output_length]
+                if debug:
+                    logger.debug(print_line)
+                self._output_lines.append(print_line)
+
+                now = time.monotonic()
+                if now >= next_progress:
+                    next_progress = now + PROGRESS_INTERVAL
+                    # overwrite previously printed line, kill line break
+                    sys.stdout.write(print_line.ljust(output_length) + "\r")
+                    sys.stdout.flush()
+        finally:
+            if log_file:
+                log_file.close()
 
     def simulate(self) -> bool:
         """Triggers the simulation of all profiles.
@@ -729,127 +953,154 @@ class Simulation_Group:
         Returns:
             bool -- True if simulations ended successfully.
         """
-        return self.simulate_with_profilesets()
+        if self.backend is None:
+            return self.simulate_with_profilesets()
+
+        if not self.profiles:
+            return False
+        simc_hash = self.backend.simulate(self)
+        if simc_hash:
+            self.simc_hash = simc_hash
+        return True
+
+    def __getstate__(self) -> dict:
+        # backends hold threads and executors, groups are pickled without theirs
+        state = self.__dict__.copy()
+        state["backend"] = None
+        return state
 
     def write_profileset_file(
         self, fight_style: str, special_remark: str, local_simulation: bool = True
     ) -> None:
-        # write arguments to file
-        with open(self.filename, "w") as f:
-            # write the equal values to file
-            # local
-            if local_simulation:
-                f.write("json={}\n".format(self.json_filename))
-                if self.generate_html:
-                    f.write("html={}\n".format(self.html_filename))
-                f.write("log={}\n".format(self.profiles[0].log))
-                f.write(
-                    "calculate_scale_factors={}\n".format(
-                        self.profiles[0].calculate_scale_factors
-                    )
-                )
-                if (
-                    self.profiles[0]._raw_profile["character"]["class"] == "evoker"
-                    and self.profiles[0]._raw_profile["character"]["spec"]
-                    == "augmentation"
-                ):
-                    f.write("profileset_metric={}\n".format(",".join(["raid_dps"])))
-                else:
-                    f.write("profileset_metric={}\n".format(",".join(["dps"])))
-                f.write(
-                    "calculate_scale_factors={}\n".format(
-                        self.profiles[0].calculate_scale_factors
-                    )
-                )
-                f.write("threads={}\n".format(self.threads))
-                f.write(
-                    "profileset_work_threads={}\n".format(self.profileset_work_threads)
-                )
-
-            # general
-            f.write("default_actions={}\n".format(self.profiles[0].default_actions))
-            f.write("default_skill={}\n".format(self.profiles[0].default_skill))
-            f.write(f"fight_style={fight_style}\n")
-            f.write(f"{special_remark}\n")
-            f.write("fixed_time={}\n".format(self.profiles[0].fixed_time))
-            f.write("iterations={}\n".format(self.profiles[0].iterations))
-            f.write(
-                "optimize_expressions={}\n".format(
-                    self.profiles[0].optimize_expressions
+        with span(
+            "write_profileset_file", group=self.name, profiles=len(self.profiles)
+        ):
+            content = "".join(
+                self.create_profileset_lines(
+                    fight_style, special_remark, local_simulation
                 )
             )
-            if int(self.profiles[0].ptr) == 1:
-                f.write("ptr={}\n".format(self.profiles[0].ptr))
-            f.write("target_error={}\n".format(self.profiles[0].target_error))
-
-            # write first profile
-            logger.debug("simc_arguments of first profile of simulation_group")
-            logger.debug(self.profiles[0].simc_arguments)
-            if self.profiles[0].comment:
-                f.write(f"# {self.profiles[0].comment}\n")
-            for argument in self.profiles[0].simc_arguments:
-                f.write("{}\n".format(argument))
-            f.write('name="{}"\n'.format(self.profiles[0].name))
-
-            f.write("\n# custom apl\n")
-            if self.profiles[0].custom_apl:
-                f.write(self.profiles[0].custom_apl)
-            else:
-                f.write("# none\n")
-
-            f.write("\n# Profileset start\n")
-            # or else in wrong scope
-            f.write("ready_trigger={}\n".format(self.profiles[0].ready_trigger))
-
-            # write all specific arguments to file
-            for profile in self.profiles[1:]:
-                simc_wow_class_names = [
-                    wow_class.simc_name.replace("_", "") for wow_class in WOWCLASSES
-                ]
-                # remove class declaration, profilesets are allergic
-                filtered_arguments = [
-                    arg
-                    for arg in profile.simc_arguments
-                    if arg.split("=")[0] not in simc_wow_class_names
-                ]
-                # remove comments
-                filtered_arguments = [
-                    arg for arg in filtered_arguments if not arg.startswith("#")
-                ]
-
-                unique_arguments: typing.Dict[str, str] = {}
-                for arg in filtered_arguments:
-                    identifier = arg.split("=")[0]
-                    unique_arguments[identifier] = arg
-
-                if profile.comment:
-                    f.write(f"# {profile.comment}\n")
-                for argument in unique_arguments.values():
-                    f.write(
-                        'profileset."{profile_name}"+={argument}\n'.format(
-                            profile_name=profile.name,
-                            argument=argument,
-                        )
-                    )
+            with open(self.filename, "w") as f:
+                f.write(content)
 
-                # add iterations hack
-                # if not local_simulation:
-                #     f.write(
-                #         'profileset."{profile_name}"+=iterations={iterations}\n'.format(
-                #             profile_name=profile.name,
-                #             iterations=self.profiles[0].iterations,
-                #         )
-                #     )
-
-            # custom fight style
-            f.write("\n# custom fight style\n")
-            if self.profiles[0].custom_fight_style:
-                f.write(self.profiles[0].custom_fight_style)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(content)
+
+    def create_profileset_lines(
+        self, fight_style: str, special_remark: str, local_simulation: bool = True
+    ) -> typing.Iterator[str]:
+        """Content of the profileset file of this group, line by line.
+
+        Args:
+            fight_style (str): fight style of the simulation
+            special_remark (str): written as its own line into the file
+            local_simulation (bool, optional): add options of local simulations like json and threads. Defaults to True.
+
+        Yields:
+            typing.Iterator[str]: lines including line endings, custom apl and fight style as a whole
+        """
+        base_profile = self.profiles[0]
+
+        # write the equal values to file
+        # local
+        if local_simulation:
+            yield f"json={self.json_filename}\n"
+            if self.generate_html:
+                yield f"html={self.html_filename}\n"
+            yield f"log={base_profile.log}\n"
+            yield f"calculate_scale_factors={base_profile.calculate_scale_factors}\n"
+            if (
+                base_profile._raw_profile["character"]["class"] == "evoker"
+                and base_profile._raw_profile["character"]["spec"] == "augmentation"
+            ):
+                yield "profileset_metric=raid_dps\n"
             else:
-                f.write("# none")
+                yield "profileset_metric=dps\n"
+            yield f"calculate_scale_factors={base_profile.calculate_scale_factors}\n"
+            yield f"threads={self.threads}\n"
+            yield f"profileset_work_threads={self.profileset_work_threads}\n"
+
+        # general
+        yield f"default_actions={base_profile.default_actions}\n"
+        yield f"default_skill={base_profile.default_skill}\n"
+        yield f"fight_style={fight_style}\n"
+        yield f"{special_remark}\n"
+        yield f"fixed_time={base_profile.fixed_time}\n"
+        yield f"iterations={base_profile.iterations}\n"
+        yield f"optimize_expressions={base_profile.optimize_expressions}\n"
+        if int(base_profile.ptr) == 1:
+            yield f"ptr={base_profile.ptr}\n"
+        yield f"target_error={base_profile.target_error}\n"
+
+        # write first profile
+        logger.debug("simc_arguments of first profile of simulation_group")
+        logger.debug(base_profile.simc_arguments)
+        if base_profile.comment:
+            yield f"# {base_profile.comment}\n"
+        for argument in base_profile.simc_arguments:
+            yield f"{argument}\n"
+        yield f'name="{base_profile.name}"\n'
+
+        yield "\n# custom apl\n"
+        if base_profile.custom_apl:
+            yield base_profile.custom_apl
+        else:
+            yield "# none\n"
+
+        yield "\n# Profileset start\n"
+        # or else in wrong scope
+        yield f"ready_trigger={base_profile.ready_trigger}\n"
+
+        # profilesets start as a copy of the baseline, arguments it already has are redundant
+        baseline_arguments = self.get_hoisted_arguments()
+
+        # write all specific arguments to file
+        for profile in self.profiles[1:]:
+            unique_arguments: typing.Dict[str, str] = {}
+            for argument in profile.simc_arguments:
+                identifier = argument.partition("=")[0]
+                # remove class declaration, profilesets are allergic. and comments
+                if identifier in SIMC_WOW_CLASS_NAMES or argument.startswith("#"):
+                    continue
+                unique_arguments[identifier] = argument
+
+            arguments = [
+                argument
+                for identifier, argument in unique_arguments.items()
+                if baseline_arguments.get(identifier) != argument
+            ]
+            # a profileset without any argument doesn't exist for SimulationCraft
+            if not arguments and unique_arguments:
+                arguments = list(unique_arguments.values())[-1:]
+
+            if profile.comment:
+                yield f"# {profile.comment}\n"
+            prefix = f'profileset."{profile.name}"+='
+            for argument in arguments:
+                yield f"{prefix}{argument}\n"
+
+        # custom fight style
+        yield "\n# custom fight style\n"
+        if base_profile.custom_fight_style:
+            yield base_profile.custom_fight_style
+        else:
+            yield "# none"
 
-        with open(self.filename, "r") as f:
-            logger.debug(f.read())
+    def get_hoisted_arguments(self) -> typing.Dict[str, str]:
+        """Last argument of the baseline for each key of hoist_keys. Profilesets
+        don't need to repeat these arguments.
+
+        Returns:
+            typing.Dict[str, str] -- key -> argument, e.g. {"potion": "potion=tempered_potion_3"}
+        """
+        hoisted_arguments: typing.Dict[str, str] = {}
+        if not self.hoist_keys:
+            return hoisted_arguments
+        for argument in self.profiles[0].simc_arguments:
+            identifier = argument.partition("=")[0]
+            if identifier in self.hoist_keys:
+                hoisted_arguments[identifier] = argument
+        return hoisted_arguments
 
     def write_error_to_file(self) -> None:
         with open(self.filename, "a") as f:
@@ -858,172 +1109,520 @@ class Simulation_Group:
             f.write("# SimulationCraft Output:")
             f.write(self.error)
 
-    def simulate_with_profilesets(self) -> bool:
-        """Triggers the simulation of all profiles.
-
-        Raises:
-            e -- Raised if simulation of a single profile failed.
-            NotSetYetError -- No data available to simulate.
+    def get_cache_key(self) -> str:
+        """Key of the result cache for the written profileset file. Empty if results of this group can't be cached.
 
         Returns:
-            bool -- True if simulations ended successfully.
+            str -- cache key
         """
-        if not self.profiles:
-            return False
+        if not self.cache or not self.simc_hash or self.generate_html:
+            return ""
 
-        self.set_simulation_start_time()
+        # drop comments and local-only options, they don't influence results
+        local_only_options = ("json=", "html=", "threads=", "profileset_work_threads=")
+        with open(self.filename, "r") as f:
+            normalized_lines = [
+                line.strip()
+                for line in f
+                if line.strip()
+                and not line.lstrip().startswith("#")
+                and not line.strip().startswith(local_only_options)
+            ]
+
+        return self.cache.create_key(
+            "\n".join(normalized_lines),
+            self.simc_hash,
+            self.profiles[0].iterations,
+            self.profiles[0].target_error,
+        )
 
-        if len(self.profiles) == 1:
-            # if only one profile is in the group this profile is simulated normally
-            try:
-                self.profiles[0].simulate()
-            except Exception as e:
-                raise e
+    def _run_profilesets(self) -> None:
+        """Run SimulationCraft on the written profileset file. Retries failed runs up to five times.
 
-        elif len(self.profiles) >= 2:
-            # check for a path to executable
-            if not self.executable:
-                raise ValueError(
-                    "No path_to_executable was set. Simulation can't start."
+        Raises:
+            SimulationError -- Raised if all attempts failed.
+        """
+        # counter of failed simulation attempts
+        fail_counter = 0
+        simulation_output: typing.Optional[subprocess.Popen] = None
+        # should prevent additional empty windows popping up...on win32 systems without breaking different OS
+        if sys.platform == "win32":
+            # call simulationcraft in the background. Save output for processing
+            startupinfo = subprocess.STARTUPINFO()  # type: ignore
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # type: ignore
+
+            while not hasattr(self, "success") and fail_counter < 5:
+                try:
+                    simulation_output = subprocess.Popen(
+                        [self.executable, self.filename],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        universal_newlines=True,
+                        startupinfo=startupinfo,
+                    )
+                except FileNotFoundError as e:
+                    raise e
+
+                watcher = threading.Thread(
+                    target=self.monitor_simulation,
+                    args=(simulation_output,),
                 )
+                watcher.start()
+
+                simulation_output.wait()
+                watcher.join()
 
-            # write data to file, create file name
-            if self.filename:
-                raise AlreadySetError(
-                    "Filename '{}' was already set for the simulation_group. You probably tried to simulate the same group twice.".format(
-                        self.filename
+                if simulation_output.returncode != 0:
+                    fail_counter += 1
+                else:
+                    self.success = True
+
+        else:
+            while not hasattr(self, "success") and fail_counter < 5:
+                try:
+                    simulation_output = subprocess.Popen(
+                        [self.executable, self.filename],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        universal_newlines=True,
                     )
+                except FileNotFoundError as e:
+                    raise e
+
+                watcher = threading.Thread(
+                    target=self.monitor_simulation,
+                    args=(simulation_output,),
                 )
+                watcher.start()
 
-            # temporary file names
-            self.filename = "{}.simc".format(self.base_filename)
-            self.json_filename = "{}.json".format(self.base_filename)
-            self.html_filename = "{}.html".format(self.base_filename)
+                simulation_output.wait()
+                watcher.join()
 
-            if (
-                FightStyle.CASTINGPATCHWERK in self.profiles[0].fight_style
-                and FightStyle.CASTINGPATCHWERK != self.profiles[0].fight_style
-            ):
-                simc_fight_style = FightStyle.CASTINGPATCHWERK
-                special_remark = "desired_targets=" + self.profiles[
-                    0
-                ].fight_style.replace(FightStyle.CASTINGPATCHWERK, "")
-            else:
-                simc_fight_style = self.profiles[0].fight_style
-                special_remark = ""
+                if simulation_output.returncode != 0:
+                    fail_counter += 1
+                else:
+                    self.success = True
 
-            # write arguments to file
-            self.write_profileset_file(
-                fight_style=simc_fight_style, special_remark=special_remark
+        if simulation_output is None:
+            raise SimulationWasNotRunError(
+                "Programming logic allowed a simulation to be skipped. Aborting"
             )
 
-            logger.info(f"Simulating {len(self.profiles)} profiles")
+        # handle broken simulations
+        if fail_counter >= 5:
+            logger.debug("ERROR: An Error occured during simulation.")
+            logger.debug("args: " + str(simulation_output.args))
+            logger.debug("stdout: " + str(self.simulation_output))
+            logger.debug(
+                "'name=value error's can occur when relative paths are wrong. They need to be relative paths from <bloodytools> to your SimulationCraft directory."
+            )
+            self.error = self.simulation_output
 
-            # counter of failed simulation attempts
-            fail_counter = 0
-            simulation_output: typing.Optional[subprocess.Popen] = None
-            # should prevent additional empty windows popping up...on win32 systems without breaking different OS
-            if sys.platform == "win32":
-                # call simulationcraft in the background. Save output for processing
-                startupinfo = subprocess.STARTUPINFO()  # type: ignore
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW  # type: ignore
+            # add error to remaining profile
+            self.write_error_to_file()
 
-                while not hasattr(self, "success") and fail_counter < 5:
-                    try:
-                        simulation_output = subprocess.Popen(
-                            [self.executable, self.filename],
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT,
-                            universal_newlines=True,
-                            startupinfo=startupinfo,
-                        )
-                    except FileNotFoundError as e:
-                        raise e
-
-                    watcher = threading.Thread(
-                        target=self.monitor_simulation,
-                        args=(simulation_output,),
-                    )
-                    watcher.start()
+            raise SimulationError(self.error)
 
-                    simulation_output.wait()
-                    watcher.join()
+        logger.debug(self.simulation_output)
 
-                    if simulation_output.returncode != 0:
-                        fail_counter += 1
-                    else:
-                        self.success = True
+    def get_profile_fingerprint(self, profile: Simulation_Data) -> str:
+        """Key of the result cache for a single profile of this group. The
+        result of a profileset depends on the base profile, its own
+        simc_arguments, fight style, simc build, and precision. Names are
+        not part of the fingerprint.
 
+        Arguments:
+            profile {Simulation_Data} -- profile of this group
+
+        Returns:
+            str -- cache key
+        """
+        if not self.cache:
+            return ""
+
+        base_profile = self.profiles[0]
+        return self.cache.create_key(
+            "profile",
+            "\n".join(base_profile.simc_arguments),
+            base_profile.custom_apl,
+            base_profile.custom_fight_style,
+            base_profile.default_actions,
+            base_profile.default_skill,
+            base_profile.fixed_time,
+            base_profile.optimize_expressions,
+            base_profile.ptr,
+            base_profile.ready_trigger,
+            "\n".join(profile.simc_arguments),
+            profile.fight_style,
+            self.simc_hash,
+            profile.iterations,
+            profile.target_error,
+        )
+
+    def _simulate_incrementally(self) -> None:
+        """Simulate only profiles without cached results and merge the
+        cached results of all other profiles back into json_data.
+
+        A missing baseline means the base profile changed, so all profiles
+        are simulated.
+        """
+        cache = typing.cast(ResultCache, self.cache)
+        fingerprints = {
+            profile.name: self.get_profile_fingerprint(profile)
+            for profile in self.profiles
+        }
+
+        baseline = cache.get(fingerprints[self.profiles[0].name])
+        cached_results: typing.Dict[str, dict] = {}
+        missing_profiles = [self.profiles[0]]
+        for profile in self.profiles[1:]:
+            cached_result = cache.get(fingerprints[profile.name]) if baseline else None
+            if cached_result:
+                cached_results[profile.name] = cached_result
             else:
-                while not hasattr(self, "success") and fail_counter < 5:
-                    try:
-                        simulation_output = subprocess.Popen(
-                            [self.executable, self.filename],
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT,
-                            universal_newlines=True,
-                        )
-                    except FileNotFoundError as e:
-                        raise e
-
-                    watcher = threading.Thread(
-                        target=self.monitor_simulation,
-                        args=(simulation_output,),
-                    )
-                    watcher.start()
+                missing_profiles.append(profile)
 
-                    simulation_output.wait()
-                    watcher.join()
+        logger.info(
+            f"{len(cached_results)} of {len(self.profiles) - 1} profilesets of {self.name} are cached."
+        )
 
-                    if simulation_output.returncode != 0:
-                        fail_counter += 1
-                    else:
-                        self.success = True
+        if not baseline:
+            self._simulate_profiles()
+        elif len(missing_profiles) > 1:
+            all_profiles = self.profiles
+            self.profiles = missing_profiles
+            try:
+                self._simulate_profiles()
+            finally:
+                self.profiles = all_profiles
+        else:
+            players = copy.deepcopy(baseline["players"])
+            players[0]["name"] = self.profiles[0].name
+            self.json_data = {
+                "sim": {
+                    "players": players,
+                    "statistics": baseline["statistics"],
+                    "profilesets": {"results": []},
+                }
+            }
+            self.set_dps_from_profiletset_data(self.json_data)
+
+        if not self.json_data:
+            return
+
+        # merge cached results
+        results = self.json_data["sim"].setdefault("profilesets", {"results": []})[
+            "results"
+        ]
+        profiles = {profile.name: profile for profile in self.profiles}
+        for name, cached_result in cached_results.items():
+            self.set_dps_of(name, cached_result["mean"])
+            # simulated by an earlier run, no CPU time was spent on it now
+            profiles[name].set_simc_statistics(*get_sample_statistics(cached_result))
+            results.append(dict(cached_result, name=name))
+
+        # cache new results
+        if not baseline:
+            cache.put(
+                fingerprints[self.profiles[0].name],
+                {
+                    "players": [
+                        trim_player(player)
+                        for player in self.json_data["sim"]["players"]
+                    ],
+                    "statistics": self.json_data["sim"]["statistics"],
+                },
+                evict=False,
+            )
+        for result in results:
+            if result["name"] in fingerprints and result["name"] not in cached_results:
+                cache.put(
+                    fingerprints[result["name"]],
+                    {key: value for key, value in result.items() if key != "name"},
+                    evict=False,
+                )
+        # eviction scans the whole cache, once per group
+        cache.evict()
+
+    def _get_available_threads(self) -> int:
+        try:
+            return max(1, int(self.threads))
+        except ValueError:
+            return os.cpu_count() or 1
+
+    def get_shard_count(self) -> int:
+        """Number of simc processes the profilesets of this group are split across.
 
-            if simulation_output is None:
-                raise SimulationWasNotRunError(
-                    "Programming logic allowed a simulation to be skipped. Aborting"
+        Returns:
+            int -- shard count, 1 if no sharding is done
+        """
+        profileset_count = len(self.profiles) - 1
+        if self.shards == 0:
+            shard_count = self._get_available_threads() // AUTO_SHARD_THREADS
+        else:
+            shard_count = self.shards
+        return max(1, min(shard_count, profileset_count))
+
+    def get_threads_per_shard(self, shard_count: int) -> int:
+        if self.shard_threads > 0:
+            return self.shard_threads
+        return max(1, self._get_available_threads() // shard_count)
+
+    def _simulate_profiles(self) -> None:
+        shard_count = self.get_shard_count()
+        if shard_count > 1:
+            self._simulate_shards(shard_count)
+        else:
+            self._simulate_profileset_file()
+
+    def _simulate_shards(self, shard_count: int) -> None:
+        """Split the profilesets into shard_count groups with the same
+        baseline, simulate each in its own simc process, and merge all
+        results into one json_data.
+
+        Raises:
+            SimulationError -- Raised if a shard failed all of its attempts.
+        """
+        threads = str(self.get_threads_per_shard(shard_count))
+        shard_groups = self.create_shard_groups(shard_count, threads)
+
+        logger.info(
+            f"Simulating {len(self.profiles) - 1} profilesets of {self.name} in {len(shard_groups)} shards with {threads} threads each"
+        )
+        with ThreadPoolExecutor(max_workers=len(shard_groups)) as executor:
+            list(
+                executor.map(
+                    propagate(
+                        lambda shard_group: shard_group._simulate_profileset_file()
+                    ),
+                    shard_groups,
                 )
+            )
 
-            # handle broken simulations
-            if fail_counter >= 5:
-                logger.debug("ERROR: An Error occured during simulation.")
-                logger.debug("args: " + str(simulation_output.args))
-                logger.debug("stdout: " + str(self.simulation_output))
-                logger.debug(
-                    "'name=value error's can occur when relative paths are wrong. They need to be relative paths from <bloodytools> to your SimulationCraft directory."
+        self.simulation_output = "\n".join(
+            shard_group.simulation_output for shard_group in shard_groups
+        )
+        self.merge_shard_results(shard_groups)
+
+    def create_shard_groups(
+        self, shard_count: int, threads: str = ""
+    ) -> List["Simulation_Group"]:
+        """Split the profilesets into up to shard_count groups with the same
+        baseline. Shards hold copies of the profiles, use merge_shard_results
+        to set the results on this group.
+
+        Arguments:
+            shard_count {int} -- maximum number of shards
+
+        Keyword Arguments:
+            threads {str} -- threads of each shard (default: {""}, which uses the threads of this group)
+
+        Returns:
+            List[Simulation_Group] -- shards, at least one
+        """
+        threads = threads or self.threads
+        profileset_work_threads = self.profileset_work_threads
+        if (
+            threads
+            and profileset_work_threads
+            and int(profileset_work_threads) > int(threads)
+        ):
+            profileset_work_threads = threads
+
+        profilesets = self.profiles[1:]
+        shard_count = max(1, min(shard_count, len(profilesets)))
+        shard_size = max(1, -(-len(profilesets) // shard_count))
+
+        shard_groups = []
+        for i in range(shard_count):
+            shard_profiles = profilesets[i * shard_size : (i + 1) * shard_size]
+            if not shard_profiles and i > 0:
+                break
+            # copies, each shard sets the dps of its own baseline
+            shard_groups.append(
+                Simulation_Group(
+                    [
+                        copy.copy(profile)
+                        for profile in [self.profiles[0]] + shard_profiles
+                    ],
+                    name=f"{self.name}_shard{i}",
+                    base_filename=f"{self.base_filename}_shard{i}",
+                    threads=threads,
+                    profileset_work_threads=profileset_work_threads,
+                    executable=self.executable,
+                    remove_files=self.remove_files,
+                    generate_html=self.generate_html,
+                    cache=self.cache,
+                    simc_hash=self.simc_hash,
+                    full_json=self.full_json,
+                    hoist_keys=self.hoist_keys,
+                    output_log=self.output_log,
+                    output_buffer_lines=self._output_lines.maxlen
+                    or OUTPUT_BUFFER_LINES,
+                )
+            )
+        return shard_groups
+
+    def merge_shard_results(self, shard_groups: List["Simulation_Group"]) -> None:
+        """Merge the json_data of simulated shards into json_data of this
+        group and set the dps of all profiles.
+
+        Arguments:
+            shard_groups {List[Simulation_Group]} -- shards created by create_shard_groups
+        """
+        json_data = copy.copy(shard_groups[0].json_data)
+        if not json_data:
+            return
+        json_data["sim"] = dict(json_data["sim"])
+        json_data["sim"]["statistics"] = dict(
+            json_data["sim"]["statistics"],
+            elapsed_cpu_seconds=sum(
+                shard_group.json_data["sim"]["statistics"].get(
+                    "elapsed_cpu_seconds", 0.0
+                )
+                for shard_group in shard_groups
+                if shard_group.json_data
+            ),
+        )
+        json_data["sim"]["profilesets"] = {
+            "results": [
+                result
+                for shard_group in shard_groups
+                if shard_group.json_data
+                for result in shard_group.json_data["sim"]
+                .get("profilesets", {})
+                .get("results", [])
+            ]
+        }
+        self.json_data = json_data
+        self.set_dps_from_profiletset_data(self.json_data)
+
+    def get_profileset_fight_style(self) -> typing.Tuple[str, str]:
+        """Fight style of the profileset file and a special remark line that
+        adjusts it, e.g. the number of targets of castingpatchwerk variants.
+
+        Returns:
+            typing.Tuple[str, str] -- fight style and special remark
+        """
+        if (
+            FightStyle.CASTINGPATCHWERK in self.profiles[0].fight_style
+            and FightStyle.CASTINGPATCHWERK != self.profiles[0].fight_style
+        ):
+            return FightStyle.CASTINGPATCHWERK, (
+                "desired_targets="
+                + self.profiles[0].fight_style.replace(FightStyle.CASTINGPATCHWERK, "")
+            )
+        return self.profiles[0].fight_style, ""
+
+    def create_profileset_input(self) -> str:
+        """Content of the profileset file of a local simulation, for
+        SimulationCraft running somewhere else. The runner appends its own
+        json and threads options.
+
+        Returns:
+            str -- profileset file content
+        """
+        fight_style, special_remark = self.get_profileset_fight_style()
+        return "".join(self.create_profileset_lines(fight_style, special_remark))
+
+    def _simulate_profileset_file(self) -> None:
+        """Write all profiles into one profileset file, simulate it, and set the dps of all profiles."""
+        # check for a path to executable
+        if not self.executable:
+            raise ValueError("No path_to_executable was set. Simulation can't start.")
+
+        # write data to file, create file name
+        if self.filename:
+            raise AlreadySetError(
+                "Filename '{}' was already set for the simulation_group. You probably tried to simulate the same group twice.".format(
+                    self.filename
                 )
-                self.error = self.simulation_output
+            )
 
-                # add error to remaining profile
-                self.write_error_to_file()
+        # temporary file names
+        self.filename = "{}.simc".format(self.base_filename)
+        self.json_filename = "{}.json".format(self.base_filename)
+        self.html_filename = "{}.html".format(self.base_filename)
 
-                raise SimulationError(self.error)
+        simc_fight_style, special_remark = self.get_profileset_fight_style()
 
-            logger.debug(self.simulation_output)
+        # write arguments to file
+        self.write_profileset_file(
+            fight_style=simc_fight_style, special_remark=special_remark
+        )
+
+        cache_key = self.get_cache_key()
+        cached_data = self.cache.get(cache_key) if cache_key and self.cache else None
 
-            # get dps of the first profile
-            baseline_result = False
-            profileset_results = False
+        if cached_data:
+            logger.info(
+                f"Using cached results for {len(self.profiles)} profiles of {self.name}"
+            )
+            self.json_data = cached_data
+        else:
+            logger.info(f"Simulating {len(self.profiles)} profiles")
+            with span("simc", group=self.name, profiles=len(self.profiles)):
+                self._run_profilesets()
 
             # parse results from generated json file
-            with open(self.json_filename, "r") as json_file:
-                data = json.load(json_file)
+            with span("parse_json", group=self.name, full_json=self.full_json):
+                with open(self.json_filename, "r") as json_file:
+                    if self.full_json:
+                        data = json.load(json_file)
+                    else:
+                        data = extract_profileset_report(json_file)
             if data and isinstance(data, dict):
                 self.json_data = data
-            if self.json_data:
-                self.set_dps_from_profiletset_data(self.json_data)
+            if self.json_data and cache_key and self.cache:
+                # incremental groups evict after storing their profiles
+                self.cache.put(
+                    cache_key,
+                    trim_json_data(self.json_data),
+                    evict=not self.incremental,
+                )
 
-            # remove profilesets file
-            if self.remove_files:
-                os.remove(self.filename)
-                self.filename = ""
+        if self.json_data:
+            self.set_dps_from_profiletset_data(self.json_data)
+
+        # remove profilesets file
+        if self.remove_files:
+            os.remove(self.filename)
+            self.filename = ""
+            if not cached_data:
                 # remove json file after parsing
                 if self.json_filename:
                     os.remove(self.json_filename)
                 if self.generate_html:
                     os.remove(self.html_filename)
 
+    def simulate_with_profilesets(self) -> bool:
+        """Triggers the simulation of all profiles.
+
+        Raises:
+            e -- Raised if simulation of a single profile failed.
+            NotSetYetError -- No data available to simulate.
+
+        Returns:
+            bool -- True if simulations ended successfully.
+        """
+        if not self.profiles:
+            return False
+
+        self.set_simulation_start_time()
+
+        if len(self.profiles) == 1:
+            # if only one profile is in the group this profile is simulated normally
+            try:
+                self.profiles[0].simulate()
+            except Exception as e:
+                raise e
+
+        elif len(self.profiles) >= 2:
+            if self.incremental and self.cache and self.simc_hash:
+                self._simulate_incrementally()
+            else:
+                self._simulate_profiles()
+
         else:
             raise NotSetYetError(
                 "No profiles were added to this simulation_group yet. Nothing can be simulated."
@@ -1040,7 +1639,7 @@ class Simulation_Group:
 
         return True
 
-    def simulate_with_raidbots(self, apikey) -> str:
+    def simulate_with_raidbots(self, apikey: str, base_url: str = RAIDBOTS_URL) -> str:
         """Triggers the simulation of all profiles using Raidbots.com API.
 
         Raises:
@@ -1048,13 +1647,24 @@ class Simulation_Group:
             NotSetYetError -- No data available to simulate.
 
         Returns:
-            bool, str -- Returns the git hash as a string if simulations ended successfully, otherwise False.
+            str -- Returns the git hash as a string if simulations ended successfully.
         """
-        simc_hash = ""
+        from bloodytools.utils.raidbots import RaidbotsClient
+
+        result = RaidbotsClient(apikey, base_url=base_url).simulate_groups([self])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
 
-        if not hasattr(self, "session"):
-            self.session = requests.Session()
+    def create_raidbots_input(self) -> str:
+        """Write the profileset file for a Raidbots simulation.
 
+        Raises:
+            AlreadySetError: group was simulated before
+
+        Returns:
+            str -- advanced input for Raidbots, empty if there are no profiles
+        """
         if not self.profiles:
             return ""
 
@@ -1087,145 +1697,30 @@ class Simulation_Group:
         )
 
         # create advanced input string
-        raidbots_advancedInput = ""
         with open(self.filename, "r") as f:
-            for line in f:
-                raidbots_advancedInput += line
+            raidbots_advancedInput = f.read()
 
         logger.debug(raidbots_advancedInput)
+        return raidbots_advancedInput
 
-        raidbots_response = r(
-            "https://www.raidbots.com/sim",
-            apikey=apikey,
-            data=raidbots_advancedInput,
-            session=self.session,
-        )
-
-        logger.debug(raidbots_response)
+    def apply_raidbots_report(self, raidbots_data: dict) -> str:
+        """Set results of a finished Raidbots simulation.
 
-        raidbots_sim_id = raidbots_response["simId"]
-
-        # monitor simulation progress
-        logger.info("Simulation of {} is underway. Please wait".format(self.name))
-
-        time.sleep(4)
-
-        # simulation progress
-        try:
-            progress = r(
-                f"https://www.raidbots.com/api/job/{raidbots_sim_id}",
-                session=self.session,
-            )
-        except Exception as e:
-            logger.error(e)
-            progress = {"job": {"state": ""}, "retriesRemaining": 8}
-
-        # not a proper back off in this case, due to the progress of a simulation not being properly monitorable with exponential backoff
-        backoff = 0
-        while not progress["job"]["state"] == "complete" and 10 * backoff < 3600:
-            # backoff
-            time.sleep(10)
-            backoff += 1
-
-            try:
-                progress = r(
-                    f"https://www.raidbots.com/api/job/{raidbots_sim_id}",
-                    session=self.session,
-                )
-            except requests.exceptions.HTTPError as e:
-                logger.error(e)
-                backoff += 360
-
-            logger.info(
-                "{} progress {}%".format(self.name, progress["job"]["progress"])
-            )
-            logger.debug(progress)
-
-            if (
-                progress["job"]["state"] == "failed"
-                and int(progress["retriesRemaining"]) <= 0
-            ):
-                break
-
-        if (
-            progress["job"]["state"] == "failed"
-            and int(progress["retriesRemaining"]) <= 0
-        ):
-            raise SimulationError("Simulation failed. No Retries possible.")
-
-        logger.info("Simulating {} is done. Fetching data.".format(self.name))
-
-        # simulation is done, get data
-        raidbots_data = r(
-            f"https://www.raidbots.com/reports/{raidbots_sim_id}/data.json",
-            session=self.session,
-        )
+        Arguments:
+            raidbots_data {dict} -- report of the simulation
 
-        logger.info("Fetching data for {} succeeded.".format(self.name))
+        Returns:
+            str -- git hash of the used SimulationCraft build
+        """
         logger.debug(f"{raidbots_data}")
 
-        # if too many profilesets were simulated, get the full json
-        if "hasFullJson" in raidbots_data["simbot"]:
-            if raidbots_data["simbot"]["hasFullJson"]:
-                # simulation is done, get data
-                raidbots_data = r(
-                    f"https://www.raidbots.com/reports/{raidbots_sim_id}/data.full.json",
-                    session=self.session,
-                )
-                logger.info("Fetching data for {} succeeded.".format(self.name))
-                logger.debug(f"{raidbots_data}")
-
-        # if simulation failed
-        if progress["job"]["state"] == "failed":
-            logger.info("Job failed. Collecting information.")
-
-            raidbots_input = r(
-                f"https://www.raidbots.com/reports/{raidbots_sim_id}/input.txt",
-                session=self.session,
-            )
-
-            logger.debug("Fetching input data for {} succeeded.".format(self.name))
-            logger.debug(raidbots_input)
-
-            raidbots_output = r(
-                f"https://www.raidbots.com/reports/{raidbots_sim_id}/output.txt",
-                session=self.session,
-            )
-            logger.debug("Fetching output data for {} succeeded.".format(self.name))
-            logger.debug(raidbots_output)
-
-            with open("{}.error".format(raidbots_sim_id), "w") as f:
-                f.write("############## INPUT #############\n")
-                f.write(json.dumps(raidbots_advancedInput))
-                f.write("\n\n############# RECEIVED ###########\n")
-                f.write(json.dumps(raidbots_input))
-                f.write("\n\n############# OUTPUT #############\n")
-                f.write(json.dumps(raidbots_output))
-
-                try:
-                    f.write(
-                        "\n\n############## DATA ##############\n{}".format(
-                            json.dumps(raidbots_data, sort_keys=True, indent=4)
-                        )
-                    )
-                except Exception:
-                    f.write(
-                        "\n\n############## DATA ##############\nNo data available.\n"
-                    )
-
-            raise SimulationError(
-                "Simulating with Raidbots failed. Please check out {}.error file.".format(
-                    raidbots_sim_id
-                )
-            )
-
         if self.remove_files:
             # remove profilesets file
             os.remove(self.filename)
             self.filename = ""
 
         try:
-            simc_hash = raidbots_data["git_revision"]
+            simc_hash = str(raidbots_data["git_revision"])
         except Exception:
             logger.error("'git_revision' not found in raidbots answer.")
             simc_hash = ""
@@ -1262,25 +1757,136 @@ class Simulation_Group:
                 logger.debug("Setting dps for {}".format(profile["name"]))
                 self.set_dps_of(profile["name"], profile["mean"])
 
-    def add(self, simulation_instance: Simulation_Data) -> bool:
-        """Add another simulation_instance object to the group.
+        self.set_simc_statistics_from_report(profileset_data)
+
+    def set_simc_statistics_from_report(self, profileset_data: dict) -> None:
+        """Set iterations, standard deviation, and CPU seconds of all profiles
+        of a profileset report. SimulationCraft reports the CPU time of the
+        whole run, each profile gets the share of its iterations.
 
         Arguments:
-            simulation_instance {simulation_data} -- instance of simulation_data
+          profileset_data {dict} -- json data from SimulationCraft json report
+        """
+        sim = profileset_data["sim"]
+        iterations = sim.get("options", {}).get("iterations", 0)
+        samples = [
+            (
+                sim["players"][0]["name"],
+                get_sample_statistics(sim["statistics"]["raid_dps"], iterations),
+            )
+        ] + [
+            (result["name"], get_sample_statistics(result, iterations))
+            for result in sim.get("profilesets", {}).get("results", [])
+        ]
+        total_iterations = sum(sample[0] for _, sample in samples)
+        cpu_seconds = sim["statistics"].get("elapsed_cpu_seconds", 0.0)
+
+        profiles = {profile.name: profile for profile in self.profiles}
+        for name, (profile_iterations, stddev) in samples:
+            if name not in profiles:
+                continue
+            profiles[name].set_simc_statistics(
+                profile_iterations,
+                stddev,
+                (
+                    cpu_seconds * profile_iterations / total_iterations
+                    if total_iterations
+                    else 0.0
+                ),
+            )
+
+    def _index_profiles(self) -> None:
+        """Rebuild the name index of profiles. The first of several profiles
+        with the same name is indexed."""
+        self._profiles_by_name = {}
+        for profile in self.profiles or []:
+            self._profiles_by_name.setdefault(profile.name, profile)
+        self._indexed_profiles = self.profiles
+        self._indexed_count = len(self.profiles or [])
+
+    def _get_profile_index(self) -> typing.Dict[str, Simulation_Data]:
+        """Name index of profiles, rebuilt if profiles was replaced or changed
+        its length outside of add."""
+        if (
+            self.profiles is not self._indexed_profiles
+            or len(self.profiles) != self._indexed_count
+        ):
+            self._index_profiles()
+        return self._profiles_by_name
+
+    def get_profile(self, profile_name: str) -> typing.Optional[Simulation_Data]:
+        """Returns the profile named profile_name. Profiles of the group need
+        to be renamed with rename_profile to be found under their new name.
+
+        Arguments:
+            profile_name {str} -- Name of the profile. e.g. 'baseline'
+
+        Returns:
+            typing.Optional[Simulation_Data] -- profile, None if no profile has this name
+        """
+        profile = self._get_profile_index().get(profile_name)
+        if profile is not None and profile.name != profile_name:
+            # renamed without rename_profile
+            self._index_profiles()
+            profile = self._profiles_by_name.get(profile_name)
+        return profile
+
+    def rename_profile(
+        self, profile: Union[Simulation_Data, Profileset_Data], new_name: str
+    ) -> None:
+        """Rename a profile of the group and update the name index.
+
+        Arguments:
+            profile {Union[Simulation_Data, Profileset_Data]} -- profile of this group
+            new_name {str} -- new name of the profile
+
+        Raises:
+            DuplicateProfileNameError -- Raised if another profile of the group is named new_name.
+        """
+        existing = self.get_profile(new_name)
+        if existing is not None and existing is not profile:
+            raise DuplicateProfileNameError(
+                "Profile '{}' is already part of simulation_group '{}'.".format(
+                    new_name, self.name
+                )
+            )
+        index = self._profiles_by_name
+        if index.get(profile.name) is profile:
+            del index[profile.name]
+        profile.name = new_name
+        index[new_name] = profile  # type: ignore
+
+    def add(self, simulation_instance: Union[Simulation_Data, Profileset_Data]) -> bool:
+        """Add another simulation_instance object to the group. The first
+        profile of a group needs to be a simulation_data.
+
+        Arguments:
+            simulation_instance {simulation_data} -- instance of simulation_data or profileset_data
 
         Raises:
             e -- Raised if appending a list element files.
-            TypeError -- Raised if simulation_instance is not of type simulation_data
+            TypeError -- Raised if simulation_instance is not of type simulation_data or profileset_data
+            DuplicateProfileNameError -- Raised if a profile with the same name is already part of the group.
 
         Returns:
             bool -- True if added.
         """
-        if type(simulation_instance) == Simulation_Data:
+        if type(simulation_instance) == Simulation_Data or (
+            type(simulation_instance) == Profileset_Data and self.profiles
+        ):
+            if self.get_profile(simulation_instance.name) is not None:
+                raise DuplicateProfileNameError(
+                    "Profile '{}' is already part of simulation_group '{}'.".format(
+                        simulation_instance.name, self.name
+                    )
+                )
             try:
-                self.profiles.append(simulation_instance)
+                self.profiles.append(simulation_instance)  # type: ignore
             except Exception as e:
                 raise e
             else:
+                self._profiles_by_name[simulation_instance.name] = simulation_instance  # type: ignore
+                self._indexed_count += 1
                 return True
         else:
             raise TypeError(
@@ -1299,9 +1905,9 @@ class Simulation_Group:
             int -- dps
         """
 
-        for profile in self.profiles:
-            if profile.name == profile_name:
-                return profile.get_dps()
+        profile = self.get_profile(profile_name)
+        if profile is not None:
+            return profile.get_dps()
         raise KeyError(
             "Profile_name '{}' wasn't found in the simulation_group.".format(
                 profile_name
@@ -1310,9 +1916,9 @@ class Simulation_Group:
 
     def set_dps_of(self, profile_name: str, dps: Union[int, float, str]) -> bool:
         try:
-            for profile in self.profiles:
-                if profile.name == profile_name:
-                    profile.set_dps(dps, external=False)
+            profile = self.get_profile(profile_name)
+            if profile is not None:
+                profile.set_dps(dps, external=False)
         except Exception as e:
             logger.error(
                 "Setting dps for profile {} failed. {}".format(profile_name, e)
@@ -0,0 +1,139 @@
+"""Resolve the talent strings SimulationCraft derives from talent arguments.
+
+Talent simulators need the full talent string of each build. Instead of one
+throwaway simulation per build, all unknown builds are resolved in a single
+batched SimulationCraft run with one iteration per actor. Results are
+memoized per process and, if the result cache is available, persisted to
+disk across runs.
+"""
+
+import logging
+import os
+import threading
+import typing
+
+from bloodytools.utils.cache import ResultCache, get_result_cache
+from bloodytools.utils.config import Config
+from bloodytools.utils.simulation_objects import Simulation_Data
+
+logger = logging.getLogger(__name__)
+
+
+class TalentResolver:
+    _memo: typing.ClassVar[typing.Dict[str, str]] = {}
+    _lock: typing.ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, settings: Config) -> None:
+        self.settings = settings
+        self.cache = get_result_cache(settings)
+
+    def create_key(self, spec: str, actor_arguments: typing.List[str]) -> str:
+        return ResultCache.create_key(
+            "talents",
+            spec,
+            self.settings.simc_hash,
+            self.settings.ptr,
+            "\n".join(actor_arguments),
+        )
+
+    @staticmethod
+    def get_actor_arguments(
+        profile: dict, simc_arguments: typing.List[str]
+    ) -> typing.List[str]:
+        """All arguments of one actor of the batched simulation. The class
+        declaration comes first, it starts a new actor in SimulationCraft.
+        """
+        profile_arguments = Simulation_Data().get_simc_arguments_from_profile(profile)
+        class_declaration = "{}=baseline".format(
+            profile["character"]["class"].replace("_", "")
+        )
+        return (
+            [class_declaration]
+            + [
+                argument
+                for argument in profile_arguments
+                if argument != class_declaration
+            ]
+            + list(simc_arguments)
+        )
+
+    def resolve(
+        self, spec: str, profile: dict, builds: typing.List[typing.List[str]]
+    ) -> typing.List[str]:
+        """Resolve the talent string of each build.
+
+        Args:
+            spec (str): spec of profile, part of the cache key
+            profile (dict): base profile of all builds
+            builds (typing.List[typing.List[str]]): simc_arguments of each build
+
+        Returns:
+            typing.List[str]: talent string of each build, empty if SimulationCraft didn't report one
+        """
+        actors = [self.get_actor_arguments(profile, build) for build in builds]
+        keys = [self.create_key(spec, actor) for actor in actors]
+
+        talents: typing.Dict[str, str] = {}
+        missing: typing.Dict[str, typing.List[str]] = {}
+        for key, actor in zip(keys, actors):
+            if key in talents or key in missing:
+                continue
+            with self._lock:
+                memoized = self._memo.get(key)
+            if memoized is None and self.cache:
+                cached = self.cache.get(key)
+                if cached:
+                    memoized = cached["talents"]
+            if memoized is None:
+                missing[key] = actor
+            else:
+                talents[key] = memoized
+
+        logger.debug(
+            f"Resolving talents of {len(builds)} builds, {len(missing)} unknown."
+        )
+        if missing:
+            resolved = self._simulate(missing)
+            with self._lock:
+                self._memo.update(resolved)
+            if self.cache:
+                for key, talent_string in resolved.items():
+                    self.cache.put(key, {"talents": talent_string})
+            talents.update(resolved)
+
+        return [talents.get(key, "") for key in keys]
+
+    def _simulate(
+        self, actors: typing.Dict[str, typing.List[str]]
+    ) -> typing.Dict[str, str]:
+        """Simulate all actors with one iteration each in a single SimulationCraft run."""
+        names = {f"talents_{i}": key for i, key in enumerate(actors)}
+        batch = Simulation_Data(
+            # the batch name is applied to the last actor
+            name=list(names)[-1],
+            iterations="1",
+            ptr=self.settings.ptr,
+            default_actions=self.settings.default_actions,
+            executable=self.settings.executable,
+            remove_files=not self.settings.keep_files,
+        )
+        filename = f"{batch.base_filename}_actors.simc"
+        with open(filename, "w") as f:
+            for name, key in names.items():
+                for argument in actors[key]:
+                    f.write(f"{argument}\n")
+                f.write(f'name="{name}"\n')
+        batch.simc_arguments = ["single_actor_batch=1", filename]
+
+        try:
+            batch.simulate()
+        finally:
+            if batch.remove_files:
+                os.remove(filename)
+
+        resolved: typing.Dict[str, str] = {}
+        if batch.json_data:
+            for player in batch.json_data["sim"]["players"]:
+                if player.get("name") in names and player.get("talents"):
+                    resolved[names[player["name"]]] = str(player["talents"])
+        return resolved
@@ -0,0 +1,177 @@
+"""Timing spans of the simulation pipeline written to a trace file.
+
+Spans are written as complete events ("ph": "X") of the Chrome trace event
+format. Trace files ending in .jsonl get one event per line, any other
+trace file is a json array that chrome://tracing and ui.perfetto.dev open
+directly, even if the run crashed before the array was closed.
+
+Tags of a span are inherited by all spans opened inside of it. Functions
+run by thread pools need propagate() to inherit the tags of the thread that
+submitted them. Without an active tracer span() does nothing.
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+
+_tags: contextvars.ContextVar[typing.Dict[str, typing.Any]] = contextvars.ContextVar(
+    "tracing_tags", default={}
+)
+
+
+class Tracer:
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): trace file, .jsonl writes one event per line, anything else a Chrome trace json array
+        """
+        self.path = path
+        self.jsonl = path.endswith(".jsonl")
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._thread_ids: typing.Set[int] = set()
+        self._event_count = 0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._file = open(path, "w", encoding="utf-8")
+        if not self.jsonl:
+            self._file.write("[\n")
+
+    def _write_event(self, event: dict) -> None:
+        if not self.jsonl and self._event_count:
+            self._file.write(",\n")
+        self._file.write(json.dumps(event, default=str))
+        if self.jsonl:
+            self._file.write("\n")
+        self._event_count += 1
+
+    def add_span(
+        self,
+        name: str,
+        start: float,
+        duration: float,
+        tags: typing.Dict[str, typing.Any],
+    ) -> None:
+        """Write a finished span.
+
+        Args:
+            name (str): name of the span
+            start (float): unix timestamp of the start in seconds
+            duration (float): duration in seconds
+            tags (typing.Dict[str, typing.Any]): tags of the span
+        """
+        thread = threading.current_thread()
+        thread_id = threading.get_ident()
+        with self._lock:
+            if self._file.closed:
+                return
+            if thread_id not in self._thread_ids:
+                self._thread_ids.add(thread_id)
+                self._write_event(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": self._pid,
+                        "tid": thread_id,
+                        "args": {"name": thread.name},
+                    }
+                )
+            self._write_event(
+                {
+                    "name": name,
+                    "cat": "bloodytools",
+                    "ph": "X",
+                    "ts": round(start * 1_000_000),
+                    "dur": round(duration * 1_000_000),
+                    "pid": self._pid,
+                    "tid": thread_id,
+                    "args": tags,
+                }
+            )
+            # spans are coarse, flushing keeps the trace of crashed runs
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            if not self.jsonl:
+                self._file.write("\n]\n")
+            self._file.close()
+
+
+_tracer: typing.Optional[Tracer] = None
+
+
+def start_tracing(path: str) -> Tracer:
+    """Write all spans of this process to path until stop_tracing is called."""
+    global _tracer
+    stop_tracing()
+    _tracer = Tracer(path)
+    logger.info(f"Writing trace to {path}")
+    return _tracer
+
+
+def stop_tracing() -> None:
+    global _tracer
+    if _tracer:
+        _tracer.close()
+        _tracer = None
+
+
+@contextlib.contextmanager
+def span(
+    name: str, **tags: typing.Any
+) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+    """Time the enclosed block.
+
+    Args:
+        name (str): name of the span, e.g. the phase of the pipeline
+        tags: tags of this span and all spans opened inside of it
+
+    Yields:
+        typing.Dict[str, typing.Any]: tags of this span, add values that are only known at the end of the block
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield {}
+        return
+
+    inherited_tags = {**_tags.get(), **tags}
+    span_tags = dict(inherited_tags)
+    token = _tags.set(inherited_tags)
+    start = time.time()
+    counter = time.perf_counter()
+    try:
+        yield span_tags
+    except BaseException as e:
+        span_tags["error"] = repr(e)
+        raise
+    finally:
+        duration = time.perf_counter() - counter
+        _tags.reset(token)
+        tracer.add_span(name, start, duration, span_tags)
+
+
+def propagate(function: typing.Callable[..., T]) -> typing.Callable[..., T]:
+    """Wrap function to run with the span tags of the calling thread. Use
+    this for functions that are executed by thread pools."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(function)
+    def wrapper(*args: typing.Any, **kwargs: typing.Any) -> T:
+        return context.copy().run(function, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Minimal stand-in for the SimulationCraft executable used by tests.
+
+Understands the subset of simc input bloodytools writes: options given as
+arguments or in .simc files, actors started by class declarations,
+`name=`, `talents=` and `profileset."<name>"+=<argument>` lines. Writes a
+json report with deterministic results derived from each actor's input.
+"""
+
+import hashlib
+import json
+import sys
+
+CLASSES = (
+    "deathknight",
+    "demonhunter",
+    "druid",
+    "evoker",
+    "hunter",
+    "mage",
+    "monk",
+    "paladin",
+    "priest",
+    "rogue",
+    "shaman",
+    "warlock",
+    "warrior",
+)
+
+
+def read_lines(arguments):
+    for argument in arguments:
+        if argument.endswith(".simc") and "=" not in argument:
+            with open(argument) as f:
+                yield from read_lines(line.strip() for line in f)
+        elif argument and not argument.startswith("#"):
+            yield argument
+
+
+def get_dps(arguments):
+    digest = hashlib.sha256("\n".join(arguments).encode("utf-8")).hexdigest()
+    return 10000 + int(digest[:8], 16) % 1000
+
+
+def get_gear(arguments):
+    """Secondary stats of two items, derived from the actor's dps."""
+    dps = get_dps(arguments)
+    return {
+        slot: {
+            "crit_rating": dps % 300 + offset,
+            "haste_rating": dps % 200 + offset,
+            "mastery_rating": dps % 100 + offset,
+            "versatility_rating": offset,
+        }
+        for slot, offset in (("head", 100), ("chest", 200))
+    }
+
+
+def get_talents(arguments):
+    talents = [a.split("=", 1)[1] for a in arguments if a.startswith("talents=")]
+    return talents[-1] if talents and talents[-1] else "DEFAULT"
+
+
+def main(arguments):
+    options = {}
+    actors = []
+    profilesets = {}
+    for line in read_lines(arguments):
+        if "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        if key.startswith("profileset."):
+            name = key[len("profileset.") :].rstrip("+").strip('"')
+            profilesets.setdefault(name, []).append(value)
+        elif key in CLASSES:
+            actors.append({"name": value, "arguments": [line]})
+        elif key == "name" and actors:
+            actors[-1]["name"] = value.strip('"')
+        elif actors and key not in ("json", "threads", "iterations"):
+            actors[-1]["arguments"].append(line)
+        else:
+            options[key] = value
+
+    if not actors:
+        print("No actor found.")
+        return 1
+
+    iterations = 1000
+    players = []
+    for actor in actors:
+        dps = get_dps(actor["arguments"])
+        players.append(
+            {
+                "name": actor["name"],
+                "talents": get_talents(actor["arguments"]),
+                "gear": get_gear(actor["arguments"]),
+                "collected_data": {"dps": {"mean": dps, "mean_std_dev": 1.0}},
+            }
+        )
+
+    base_arguments = actors[0]["arguments"]
+    report = {
+        "version": "fake",
+        "sim": {
+            "options": {"iterations": iterations},
+            "players": players,
+            "statistics": {
+                "elapsed_cpu_seconds": 0.001 * iterations * (1 + len(profilesets)),
+                "raid_dps": {
+                    "mean": players[0]["collected_data"]["dps"]["mean"],
+                    "mean_std_dev": 1.0,
+                    "count": iterations,
+                },
+            },
+            "profilesets": {
+                "results": [
+                    {
+                        "name": name,
+                        "mean": get_dps(base_arguments + arguments),
+                        "stddev": 30.0,
+                        "iterations": iterations,
+                    }
+                    for name, arguments in profilesets.items()
+                ]
+            },
+        },
+    }
+
+    if "json" in options:
+        with open(options["json"], "w") as f:
+            json.dump(report, f)
+    print(f"Simulated {len(actors)} actors and {len(profilesets)} profilesets.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
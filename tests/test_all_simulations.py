@@ -1,4 +1,5 @@
 import dataclasses
+import typing
 from simc_support.game_data import WowSpec
 from bloodytools.main import main
 import unittest
@@ -41,18 +42,40 @@ DONT_TEST = (
 class ParsedInput:
     executable: str
     target_error: str
+    adaptive_target_error: bool = False
     all: bool = False
+    backend: str = ""
+    cache_dir: str = ""
+    coarse_target_error: str = ""
+    coordinator_host: str = ""
+    coordinator_port: int = 0
     custom_apl: bool = False
     custom_fight_style: bool = False
     custom_profile: bool = False
     debug: bool = False
+    hoist_keys: typing.Optional[str] = None
+    incremental: bool = False
+    cores: int = 0
+    jobs: int = 0
+    journal: typing.Optional[str] = None
     keep_files: bool = False
+    no_cache: bool = False
     pretty: bool = False
     ptr: bool = False
     raidbots: bool = False
+    resume: bool = False
+    screening_margin: typing.Optional[float] = None
+    screening_top_k: int = 0
+    shards: typing.Optional[int] = None
+    shard_threads: int = 0
     profileset_work_threads: str = ""
+    simc_log: bool = False
     single_sim: str = ""
+    skip_fresh: bool = False
+    target_scaling_single_group: bool = False
     threads: str = ""
+    trace_file: str = ""
+    trinket_screening: bool = False
 
 
 class TestAll(unittest.TestCase):
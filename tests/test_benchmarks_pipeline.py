@@ -0,0 +1,73 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from benchmarks import bench_pipeline
+
+
+def create_entry(machine: str, overhead: float) -> dict:
+    return {"machine": machine, "results": {"potions": {"overhead": overhead}}}
+
+
+class TestBenchPipeline(unittest.TestCase):
+    def test_union_duration(self):
+        self.assertEqual(bench_pipeline.get_union_duration([]), 0.0)
+        self.assertEqual(
+            bench_pipeline.get_union_duration([(0.0, 2.0), (1.0, 3.0), (5.0, 6.0)]),
+            4.0,
+        )
+        self.assertEqual(bench_pipeline.get_union_duration([(0, 4), (1, 2)]), 4)
+
+    def test_find_regressions(self):
+        history = [create_entry("a", 0.1)] * 3 + [create_entry("b", 0.01)]
+        results = {"potions": {"overhead": 0.2}, "trinkets": {"overhead": 1.0}}
+
+        self.assertEqual(
+            bench_pipeline.find_regressions(results, history, "a", 0.25),
+            {"potions": (0.1, 0.2)},
+        )
+        self.assertEqual(
+            bench_pipeline.find_regressions(results, history, "a", 1.5), {}
+        )
+        self.assertEqual(bench_pipeline.find_regressions(results, [], "a", 0.25), {})
+        # differences below MIN_REGRESSION are noise
+        results = {"potions": {"overhead": 0.014}}
+        self.assertEqual(
+            bench_pipeline.find_regressions(results, history, "b", 0.25), {}
+        )
+
+    @unittest.skipIf(os.name != "posix", "fake_simc.py needs to be executable")
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            history = os.path.join(tmp_dir, "history.jsonl")
+            arguments = ["--simulators", "potions", "--repeat", "1"]
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(
+                    bench_pipeline.main(arguments + ["--history", history]), 0
+                )
+            with open(history) as f:
+                entry = json.loads(f.read())
+            result = entry["results"]["potions"]
+            self.assertTrue(result["success"])
+            self.assertGreater(result["profiles"], 1)
+            self.assertGreater(result["phases"]["write_profileset_file"], 0)
+
+            # a much faster previous run makes this one a regression
+            entry["results"]["potions"]["overhead"] = 0.0
+            with open(history, "w") as f:
+                f.write(json.dumps(entry) + "\n")
+            with redirect_stdout(io.StringIO()) as output, mock.patch.object(
+                bench_pipeline, "MIN_REGRESSION", 0.0
+            ):
+                self.assertEqual(
+                    bench_pipeline.main(arguments + ["--history", history]), 1
+                )
+            self.assertIn("Regression of potions", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
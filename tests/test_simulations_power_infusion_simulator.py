@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bloodytools.simulations import power_infusion_simulator
+from bloodytools.simulations.power_infusion_simulator import PowerInfusionSimulator
+from bloodytools.simulations.simulator import Simulator
+from bloodytools.utils import tracing
+from bloodytools.utils.config import Config
+from simc_support.game_data.WowSpec import WOWSPECS
+from tests.test_utils_tracing import read_spans
+
+FAKE_SIMC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_simc.py")
+SPECS = WOWSPECS[:3]
+
+
+def get_profile(wow_spec, fight_style, settings):
+    if wow_spec == SPECS[1]:
+        # breaks the simulation of this spec
+        return {"character": {"class": "broken"}}
+    return {
+        "character": {
+            "level": "80",
+            "class": wow_spec.wow_class.simc_name,
+            "spec": wow_spec.simc_name,
+        },
+        "items": {"head": {"id": "1"}},
+    }
+
+
+@unittest.skipIf(os.name != "posix", "fake_simc.py needs to be executable")
+class TestPowerInfusionSimulator(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        Simulator._profiles.clear()
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+        Simulator._profiles.clear()
+
+    @mock.patch.object(power_infusion_simulator, "WOWSPECS", SPECS)
+    @mock.patch("bloodytools.simulations.simulator.get_profile", get_profile)
+    @mock.patch("bloodytools.utils.utils.get_profile", get_profile)
+    def test_run(self):
+        simulator = PowerInfusionSimulator(
+            wow_spec=SPECS[0],
+            fight_style="patchwerk",
+            settings=Config(executable=FAKE_SIMC, threads="8", result_cache=False),
+        )
+        tracing.start_tracing("trace.jsonl")
+        try:
+            with mock.patch.object(simulator, "_write") as write:
+                simulator.run()
+        finally:
+            tracing.stop_tracing()
+        data_dict = write.call_args[0][0]
+
+        # phases of overridden pipelines are traced too
+        names = {span["name"] for span in read_spans("trace.jsonl")}
+        for name in [
+            "create_base_json_dict",
+            "pre_processing",
+            "add_simulation_data",
+            "_collect_data",
+            "post_processing",
+        ]:
+            self.assertIn(name, names)
+
+        self.assertEqual(data_dict["failed_specs"], [str(SPECS[1])])
+        names = [" ".join([s.full_name, s.wow_class.full_name]) for s in SPECS]
+        self.assertEqual(
+            sorted(data_dict["sorted_data_keys"]), sorted([names[0], names[2]])
+        )
+        self.assertIn(f"{{{names[2]}}}", data_dict["data"])
+
+    def test_profiles_are_loaded_once(self):
+        simulator = PowerInfusionSimulator(
+            wow_spec=SPECS[0], fight_style="patchwerk", settings=Config()
+        )
+        with mock.patch(
+            "bloodytools.simulations.simulator.get_profile", side_effect=get_profile
+        ) as loader:
+            simulator.load_profiles(SPECS)
+            profiles = simulator.load_profiles(SPECS)
+        self.assertEqual(loader.call_count, len(SPECS))
+        self.assertEqual(list(profiles), SPECS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import dataclasses
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bloodytools.simulations.power_infusion_simulator import PowerInfusionSimulator
+from bloodytools.simulations.simulator import (
+    Simulator,
+    SimulatorFactory,
+    get_simulator_version,
+)
+from bloodytools.simulations.windfury_totem_simulator import WindfuryTotemSimulator
+from tests.test_utils_tracing import FAKE_SIMC, PotionSimulator
+from bloodytools.utils import scheduler
+from bloodytools.utils.config import Config
+from simc_support.game_data.WowSpec import get_wow_spec
+
+PROFILE = {"character": {"class": "shaman", "spec": "elemental", "level": "80"}}
+
+
+class FreshSimulator(Simulator):
+    runs = 0
+
+    @classmethod
+    def name(cls) -> str:
+        return "Fresh"
+
+    def add_simulation_data(self, simulation_group, data_dict) -> None:
+        pass
+
+    def run(self) -> None:
+        FreshSimulator.runs += 1
+        self._write({"metadata": {}, "data": {}})
+
+
+class RemoteHashSimulator(Simulator):
+    @classmethod
+    def name(cls) -> str:
+        return "Remote Hash"
+
+    def add_simulation_data(self, simulation_group, data_dict) -> None:
+        pass
+
+    def _run(self) -> None:
+        # remote backends report the full hash of the build of their workers
+        self.settings.simc_hash += "1234567"
+        self._write({"metadata": {}, "data": {}})
+
+
+@mock.patch("bloodytools.simulations.simulator.get_profile", lambda *args: PROFILE)
+class TestInputFingerprint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        FreshSimulator.runs = 0
+        self.factory = SimulatorFactory()
+        self.factory.register_simulator(FreshSimulator)
+        self.config = Config(
+            executable="not_a_simc",
+            simc_hash="abc",
+            skip_fresh=True,
+            job_journal="",
+            wow_class_spec_names=[("shaman", "elemental")],
+            simulator_type_names=["fresh"],
+            fight_styles=["patchwerk"],
+        )
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def _run(self) -> bool:
+        return scheduler.JobScheduler(self.config, self.factory).run()[0].skipped
+
+    def test_skip_fresh(self):
+        self.assertFalse(self._run())
+        self.assertTrue(self._run())
+        self.assertEqual(FreshSimulator.runs, 1)
+
+        simulator = FreshSimulator(
+            get_wow_spec("shaman", "elemental"), "patchwerk", self.config
+        )
+        with open(simulator.get_output_path()) as f:
+            fingerprint = json.load(f)["metadata"]["input_fingerprint"]
+        self.assertEqual(fingerprint, simulator.get_input_fingerprint())
+
+        self.config.iterations = "1"
+        self.assertFalse(self._run())
+        self.config.simc_hash = "def"
+        self.assertFalse(self._run())
+        self.assertEqual(FreshSimulator.runs, 3)
+
+        # without known build nothing is fresh
+        self.config.simc_hash = ""
+        self.assertFalse(self._run())
+        self.assertFalse(self._run())
+
+    def test_remote_simc_hash(self):
+        elemental = get_wow_spec("shaman", "elemental")
+        RemoteHashSimulator(
+            elemental, "patchwerk", dataclasses.replace(self.config)
+        ).run()
+        self.assertTrue(
+            RemoteHashSimulator(elemental, "patchwerk", self.config).is_result_fresh()
+        )
+
+    def test_profiles_of_other_specs(self):
+        profiles: dict = {}
+        self.addCleanup(Simulator._profiles.clear)
+
+        def get_profile(wow_spec, fight_style, settings):
+            return profiles.get(str(wow_spec), PROFILE)
+
+        simulator = PowerInfusionSimulator(
+            get_wow_spec("shaman", "elemental"), "patchwerk", self.config
+        )
+        with mock.patch("bloodytools.simulations.simulator.get_profile", get_profile):
+            Simulator._profiles.clear()
+            fingerprint = simulator.get_input_fingerprint()
+            profiles[str(get_wow_spec("mage", "frost"))] = {"character": {}}
+            Simulator._profiles.clear()
+            self.assertNotEqual(fingerprint, simulator.get_input_fingerprint())
+
+    def test_simulator_version(self):
+        # only bloodytools modules count
+        self.assertEqual(
+            get_simulator_version(FreshSimulator), get_simulator_version(Simulator)
+        )
+        self.assertNotEqual(
+            get_simulator_version(PowerInfusionSimulator),
+            get_simulator_version(Simulator),
+        )
+        self.assertNotEqual(
+            get_simulator_version(PowerInfusionSimulator),
+            get_simulator_version(WindfuryTotemSimulator),
+        )
+
+
+@unittest.skipIf(os.name != "posix", "fake_simc.py needs to be executable")
+@mock.patch("bloodytools.utils.utils.get_profile", lambda **kwargs: PROFILE)
+@mock.patch("bloodytools.simulations.simulator.get_profile", lambda *args: PROFILE)
+class TestSimcStatistics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def test_metadata(self):
+        simulator = PotionSimulator(
+            get_wow_spec("shaman", "elemental"),
+            "patchwerk",
+            Config(executable=FAKE_SIMC, result_cache=False, profileset_shards=2),
+        )
+        simulator.run()
+        with open(simulator.get_output_path()) as f:
+            statistics = json.load(f)["metadata"]["simc_statistics"]
+
+        # fake simc runs 1000 iterations, each shard simulates the baseline
+        self.assertEqual(statistics["profiles"], 4)
+        self.assertEqual(statistics["iterations"], 4000)
+        self.assertEqual(statistics["iterations_min"], 1000)
+        # shards of 2 and 1 profilesets
+        self.assertAlmostEqual(statistics["cpu_seconds"], 3.0 + 2.0)
+        self.assertEqual(statistics["target_error"], "0.1")
+        self.assertGreater(statistics["achieved_error_max"], 0)
+        self.assertEqual(simulator.get_simc_statistics(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+
+from bloodytools.simulations import talent_target_scaling_simulator
+from bloodytools.utils.config import Config
+from bloodytools.utils.simulation_objects import Simulation_Data
+from simc_support.game_data.WowSpec import get_wow_spec
+
+PROFILE = {
+    "character": {"class": "shaman", "spec": "elemental", "level": "80"},
+    "items": {"head": {"id": "1"}},
+}
+
+
+class BuildsSimulator(talent_target_scaling_simulator.TalentTargetScalingSimulator):
+    def add_simulation_data(self, simulation_group, data_dict) -> None:
+        simulation_group.add(
+            Simulation_Data(name="a", profile=PROFILE, simc_arguments=["talents=A"])
+        )
+        simulation_group.add(Simulation_Data(name="b", simc_arguments=["talents=B"]))
+
+
+class TestTargetScalingGroup(unittest.TestCase):
+    def test_single_group(self):
+        simulator = BuildsSimulator(
+            get_wow_spec("Shaman", "Elemental"),
+            "patchwerk",
+            Config(executable="Not_a_correct_value", result_cache=False),
+        )
+        group = simulator.create_target_scaling_group({})
+        target_counts = talent_target_scaling_simulator.TARGET_COUNTS
+
+        self.assertEqual(len(group.profiles), 2 * len(target_counts))
+        self.assertEqual(group.profiles[0].name, "a|||1")
+        self.assertEqual(group.profiles[0].simc_arguments[-1], "desired_targets=1")
+        last = group.profiles[-1]
+        self.assertEqual(last.name, f"b|||{target_counts[-1]}")
+        self.assertEqual(
+            last.simc_arguments, ["talents=B", f"desired_targets={target_counts[-1]}"]
+        )
+        self.assertEqual(
+            len(
+                [
+                    argument
+                    for argument in group.profiles[2].simc_arguments
+                    if argument.startswith("desired_targets=")
+                ]
+            ),
+            1,
+        )
+
+    def test_single_group_uses_base_pipeline(self):
+        simulator = BuildsSimulator(
+            get_wow_spec("Shaman", "Elemental"),
+            "patchwerk",
+            Config(
+                executable="Not_a_correct_value",
+                result_cache=False,
+                target_scaling_single_group=True,
+            ),
+        )
+        with mock.patch.object(
+            simulator, "_create_base_json_dict", return_value={}
+        ), mock.patch.object(
+            simulator, "_pre_processing", side_effect=lambda data_dict: data_dict
+        ), mock.patch.object(
+            simulator, "_simulate_and_write"
+        ) as simulate_and_write:
+            simulator._run()
+
+        simulate_and_write.assert_called_once()
+        group, data_dict = simulate_and_write.call_args.args
+        self.assertEqual(
+            len(group.profiles), 2 * len(talent_target_scaling_simulator.TARGET_COUNTS)
+        )
+        self.assertEqual(data_dict, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import types
+import unittest
+from unittest import mock
+
+from bloodytools.simulations import trinket_simulator
+from bloodytools.utils.config import Config
+from bloodytools.utils.simulation_objects import Simulation_Data
+from simc_support.game_data.WowSpec import get_wow_spec
+
+PROFILE = {
+    "character": {"class": "shaman", "spec": "elemental", "level": "80"},
+    "items": {"head": {"id": "1"}},
+}
+# screening dps of each trinket
+SCREENING_DPS = {"1": 100, "2": 300, "3": 400, "4 [Haste]": 200}
+
+
+class TestSelectScreenedTrinkets(unittest.TestCase):
+    def test_top_k(self):
+        dps = {"a": 100, "b": 200, "c": 300, "d": 400}
+        self.assertEqual(
+            trinket_simulator._select_screened_trinkets(dps, 2, 0.0), {"c", "d"}
+        )
+
+    def test_margin(self):
+        dps = {"a": 100, "b": 295, "c": 300, "d": 400}
+        self.assertEqual(
+            trinket_simulator._select_screened_trinkets(dps, 2, 2.0), {"b", "c", "d"}
+        )
+
+    def test_fewer_trinkets_than_top_k(self):
+        dps = {"a": 100}
+        self.assertEqual(
+            trinket_simulator._select_screened_trinkets(dps, 5, 1.0), {"a"}
+        )
+
+
+class TestScreenTrinkets(unittest.TestCase):
+    def setUp(self):
+        self.simulator = trinket_simulator.TrinketSimulator(
+            get_wow_spec("Shaman", "Elemental"),
+            "patchwerk",
+            Config(
+                executable="Not_a_correct_value",
+                result_cache=False,
+                trinket_screening=True,
+                screening_top_k=2,
+                screening_margin=0.0,
+                screening_target_error="0.5",
+            ),
+        )
+        self.group = self.simulator.create_simulation_group()
+        self.group.add(
+            Simulation_Data(name="baseline|||600", profile=PROFILE, target_error="0.1")
+        )
+        for trinket in SCREENING_DPS:
+            for itemlevel in ["600", "610"]:
+                self.group.add(
+                    Simulation_Data(
+                        name=f"{trinket}|||{itemlevel}",
+                        simc_arguments=[f"trinket1={trinket},ilevel={itemlevel}"],
+                        target_error="0.1",
+                    )
+                )
+        self.screening_groups = []
+
+    def _simulate(self, simulation_group):
+        self.screening_groups.append(simulation_group)
+        for profile in simulation_group.profiles[1:]:
+            trinket = profile.name.split("|||")[0]
+            profile.set_dps(SCREENING_DPS[trinket], external=False)
+
+    def test_screening(self):
+        data_dict: dict = {}
+        with mock.patch.object(self.simulator, "_simulate", self._simulate):
+            self.simulator._screen_trinkets(self.group, data_dict)
+
+        # each trinket is screened once at its highest itemlevel
+        (screening_group,) = self.screening_groups
+        self.assertEqual(
+            [profile.name for profile in screening_group.profiles],
+            ["baseline|||600"] + [f"{trinket}|||610" for trinket in SCREENING_DPS],
+        )
+        self.assertTrue(
+            all(profile.target_error == "0.5" for profile in screening_group.profiles)
+        )
+
+        # all itemlevels of pruned trinkets are removed
+        self.assertEqual(
+            [profile.name for profile in self.group.profiles],
+            ["baseline|||600", "2|||600", "2|||610", "3|||600", "3|||610"],
+        )
+        self.assertTrue(
+            all(profile.target_error == "0.1" for profile in self.group.profiles)
+        )
+        self.assertEqual(data_dict["screened_out"], ["1", "4 [Haste]"])
+
+    def test_fewer_trinkets_than_top_k(self):
+        self.simulator.settings.screening_top_k = len(SCREENING_DPS)
+        profiles = list(self.group.profiles)
+        data_dict: dict = {}
+        with mock.patch.object(self.simulator, "_simulate", self._simulate):
+            self.simulator._screen_trinkets(self.group, data_dict)
+
+        self.assertEqual(self.screening_groups, [])
+        self.assertEqual(self.group.profiles, profiles)
+        self.assertNotIn("screened_out", data_dict)
+
+    def test_screened_out_names(self):
+        trinkets = [
+            types.SimpleNamespace(item_id=1, full_name="One"),
+            types.SimpleNamespace(item_id=2, full_name="Two"),
+            types.SimpleNamespace(item_id=4, full_name="Four"),
+        ]
+        data_dict = {
+            "data": {"baseline": {"600": 1000}, "2": {"600": 1100, "610": 1200}},
+            "screened_out": ["1", "4 [Haste]"],
+        }
+        with mock.patch.object(
+            trinket_simulator, "_get_trinkets", return_value=trinkets
+        ):
+            data_dict = self.simulator.post_processing(data_dict)
+
+        self.assertEqual(data_dict["screened_out"], ["Four [Haste]", "One"])
+        self.assertEqual(list(data_dict["data"]), ["baseline", "Two"])
+
+
+if __name__ == "__main__":
+    unittest.main()
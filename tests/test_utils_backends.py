@@ -0,0 +1,183 @@
+import concurrent.futures
+import os
+import tempfile
+import threading
+import typing
+import unittest
+
+from bloodytools.utils import backends
+from bloodytools.utils.backends import (
+    LocalBackend,
+    LocalPoolBackend,
+    RemoteBackend,
+    SimulationBackend,
+    get_simulation_backend,
+    register_backend,
+)
+from bloodytools.utils.config import Config
+from bloodytools.utils.simulation_objects import (
+    SimulationError,
+    Simulation_Data,
+    Simulation_Group,
+)
+from tests.test_utils_raidbots import PROFILE, FakeRaidbots
+
+FAKE_SIMC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_simc.py")
+
+
+class FakeBackend(SimulationBackend):
+    """Sets the dps of each profile to its position in the group."""
+
+    def __init__(self) -> None:
+        self.jobs: typing.Dict[str, Simulation_Group] = {}
+        self.polls = 0
+
+    def submit(self, group: Simulation_Group) -> str:
+        job_id = str(len(self.jobs))
+        self.jobs[job_id] = group
+        return job_id
+
+    def poll(self, job_id: str, timeout: float = 0.0) -> bool:
+        self.polls += 1
+        return self.polls % 2 == 0
+
+    def result(self, job_id: str) -> str:
+        group = self.jobs.pop(job_id)
+        if group.name == "fail":
+            raise SimulationError("failed")
+        for i, profile in enumerate(group.profiles):
+            group.set_dps_of(profile.name, 1000 + i)
+        return "fakehash"
+
+
+def create_group(name: str = "group", **kwargs) -> Simulation_Group:
+    group = Simulation_Group(name=name, base_filename=name, **kwargs)
+    for profile_name in ["baseline", "a", "b"]:
+        group.add(
+            Simulation_Data(
+                name=profile_name,
+                profile=PROFILE,
+                simc_arguments=[f"potion={profile_name}"],
+                executable=FAKE_SIMC,
+            )
+        )
+    return group
+
+
+class TestSimulationBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        FakeBackend.poll_interval = 0.0
+        register_backend("fake", lambda settings: FakeBackend())
+
+    def tearDown(self) -> None:
+        backends._backend_factories.pop("fake")
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def test_group_dispatches_to_backend(self):
+        backend = get_simulation_backend(Config(simulation_backend="fake"))
+        self.assertIsInstance(backend, FakeBackend)
+        self.assertIs(
+            backend, get_simulation_backend(Config(simulation_backend="fake"))
+        )
+
+        group = create_group(backend=backend)
+        self.assertTrue(group.simulate())
+        self.assertEqual(group.get_dps_of("b"), 1002)
+        self.assertEqual(group.simc_hash, "fakehash")
+        self.assertEqual(backend.polls, 2)
+
+        with self.assertRaises(SimulationError):
+            create_group("fail", backend=backend).simulate()
+
+    def test_selection(self):
+        with self.assertRaises(ValueError):
+            get_simulation_backend(Config(simulation_backend="unknown"))
+        with self.assertRaises(ValueError):
+            get_simulation_backend(Config(simulation_backend="remote"))
+        self.assertIsInstance(get_simulation_backend(Config()), LocalBackend)
+        self.assertIsInstance(
+            get_simulation_backend(Config(use_raidbots=True, apikey="key")),
+            RemoteBackend,
+        )
+
+
+@unittest.skipIf(os.name != "posix", "fake_simc.py needs to be executable")
+class TestLocalBackends(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def _simulate(self, backend: SimulationBackend) -> Simulation_Group:
+        group = create_group(executable=FAKE_SIMC, backend=backend)
+        profiles = list(group.profiles)
+        self.assertTrue(group.simulate())
+        self.assertEqual(group.profiles, profiles)
+        return group
+
+    def test_same_results(self):
+        local_group = self._simulate(LocalBackend())
+        pool_backend = LocalPoolBackend(max_workers=2)
+        try:
+            pool_group = self._simulate(pool_backend)
+        finally:
+            pool_backend.close()
+
+        for profile in local_group.profiles:
+            self.assertGreater(profile.get_dps(), 0)
+            self.assertEqual(
+                profile.get_dps(), pool_group.get_dps_of(profile.name), profile.name
+            )
+        self.assertIs(pool_group.backend, pool_backend)
+        self.assertEqual(os.listdir(), [])
+
+    def test_pool_error(self):
+        backend = LocalPoolBackend(max_workers=1)
+        try:
+            with self.assertRaises(ValueError):
+                create_group(backend=backend).simulate()
+        finally:
+            backend.close()
+
+
+class TestRemoteBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.server = FakeRaidbots()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.backend = RemoteBackend(
+            "apikey", base_url=self.server.url, poll_interval=0.05
+        )
+
+    def tearDown(self) -> None:
+        self.backend.close()
+        self.server.shutdown()
+        self.server.server_close()
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def test_concurrent_jobs(self):
+        groups = [create_group(f"group_{i}", backend=self.backend) for i in range(3)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            self.assertEqual(
+                list(executor.map(lambda g: g.simulate(), groups)), [True] * 3
+            )
+
+        for group in groups:
+            self.assertEqual(group.simc_hash, "abcdef")
+            self.assertEqual(group.get_dps_of("a"), 1001)
+        self.assertEqual(self.server.max_outstanding, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
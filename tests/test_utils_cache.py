@@ -0,0 +1,209 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from bloodytools.utils import simulation_objects
+from bloodytools.utils.cache import ResultCache
+from bloodytools.utils.simc_json import trim_json_data
+
+PROFILE = {
+    "character": {"class": "shaman", "spec": "elemental", "level": "80"},
+    "items": {"head": {"id": "1"}},
+}
+
+
+def _create_json_data(names):
+    return {
+        "version": "1.0",
+        "sim": {
+            "options": {"iterations": 100, "dbc": {"huge": "object"}},
+            "players": [
+                {
+                    "name": names[0],
+                    "talents": "ABC",
+                    "gear": {"head": {}},
+                    "collected_data": {"dps": {"mean": 100.0}, "dtps": {}},
+                }
+            ],
+            "statistics": {"raid_dps": {"mean": 100.0}},
+            "profilesets": {
+                "results": [
+                    {"name": name, "mean": 100.0 + i}
+                    for i, name in enumerate(names[1:], 1)
+                ]
+            },
+        },
+    }
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.tmp_dir.name, 0)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_key(self):
+        self.assertEqual(
+            self.cache.create_key("a", "b"), self.cache.create_key("a", "b")
+        )
+        self.assertNotEqual(
+            self.cache.create_key("ab", ""), self.cache.create_key("a", "b")
+        )
+
+    def test_get_put(self):
+        key = self.cache.create_key("input")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {"answer": 42})
+        self.assertEqual(self.cache.get(key), {"answer": 42})
+
+    def test_corrupted_entry(self):
+        key = self.cache.create_key("input")
+        self.cache.put(key, {"answer": 42})
+        with open(self.cache._path(key), "w") as f:
+            f.write("{")
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(os.path.exists(self.cache._path(key)))
+
+    def test_lru_eviction(self):
+        keys = [self.cache.create_key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, {"data": "x" * 100})
+            past = time.time() - 100 + i
+            os.utime(self.cache._path(key), (past, past))
+        entry_size = os.path.getsize(self.cache._path(keys[0]))
+
+        # reading marks the oldest entry as recently used
+        self.cache.get(keys[0])
+
+        self.cache.max_size = entry_size * 2
+        self.cache.evict()
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+
+class TestSimulationGroupCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.tmp_dir.name, 0)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _create_group(self) -> simulation_objects.Simulation_Group:
+        group = simulation_objects.Simulation_Group(
+            executable="Not_a_correct_value",
+            cache=self.cache,
+            simc_hash="abcdef",
+            base_filename=os.path.join(self.tmp_dir.name, "group"),
+        )
+        for name in ["base", "a", "b"]:
+            group.add(
+                simulation_objects.Simulation_Data(
+                    name=name, profile=PROFILE, simc_arguments=[f"potion={name}"]
+                )
+            )
+        return group
+
+    def test_cache_hit_skips_simulation(self):
+        group = self._create_group()
+        group.filename = group.base_filename + ".simc"
+        group.write_profileset_file(fight_style="patchwerk", special_remark="")
+        key = group.get_cache_key()
+        self.assertTrue(key)
+        self.cache.put(key, trim_json_data(_create_json_data(["base", "a", "b"])))
+
+        group = self._create_group()
+        self.assertTrue(group.simulate())
+        self.assertEqual(group.get_dps_of("base"), 100)
+        self.assertEqual(group.get_dps_of("b"), 102)
+        self.assertFalse(os.path.exists(group.base_filename + ".simc"))
+
+    def test_cache_miss_runs_simulation(self):
+        group = self._create_group()
+        with self.assertRaises(FileNotFoundError):
+            group.simulate()
+
+
+class TestIncrementalSimulation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.tmp_dir.name, 0)
+        self.simulated_names: list = []
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _create_group(self, names) -> simulation_objects.Simulation_Group:
+        group = simulation_objects.Simulation_Group(
+            executable="Not_a_correct_value",
+            cache=self.cache,
+            simc_hash="abcdef",
+            incremental=True,
+            base_filename=os.path.join(self.tmp_dir.name, "group"),
+        )
+        for i, name in enumerate(names):
+            group.add(
+                simulation_objects.Simulation_Data(
+                    name=name,
+                    profile=PROFILE,
+                    simc_arguments=[f"potion={name}"] if i else [],
+                )
+            )
+
+        def run_profilesets() -> None:
+            names = [profile.name for profile in group.profiles]
+            self.simulated_names.append(names)
+            with open(group.json_filename, "w") as f:
+                json.dump(_create_json_data(names), f)
+
+        group._run_profilesets = run_profilesets  # type: ignore
+        return group
+
+    def test_only_misses_are_simulated(self):
+        group = self._create_group(["base", "a", "b"])
+        group.simulate()
+        self.assertEqual(self.simulated_names, [["base", "a", "b"]])
+
+        group = self._create_group(["base", "a", "c", "b"])
+        group.simulate()
+        self.assertEqual(self.simulated_names[-1], ["base", "c"])
+        self.assertEqual(len(group.profiles), 4)
+        self.assertEqual(group.get_dps_of("a"), 101)
+        self.assertEqual(group.get_dps_of("b"), 102)
+        self.assertEqual(group.get_dps_of("c"), 101)
+        results = group.json_data["sim"]["profilesets"]["results"]
+        self.assertEqual({result["name"] for result in results}, {"a", "b", "c"})
+
+    def test_all_cached(self):
+        self._create_group(["base", "a", "b"]).simulate()
+
+        group = self._create_group(["renamed_base", "a", "b"])
+        group.simulate()
+        self.assertEqual(len(self.simulated_names), 1)
+        self.assertEqual(group.get_dps_of("renamed_base"), 100)
+        self.assertEqual(group.get_dps_of("b"), 102)
+        self.assertEqual(
+            group.json_data["sim"]["players"][0]["collected_data"]["dps"]["mean"], 100
+        )
+
+    def test_cache_is_scanned_once_per_group(self):
+        self.cache.max_size = 10**9
+        group = self._create_group(["base"] + [str(i) for i in range(50)])
+        with mock.patch.object(
+            ResultCache, "evict", autospec=True, side_effect=ResultCache.evict
+        ) as evict:
+            group.simulate()
+        self.assertEqual(evict.call_count, 1)
+        self.assertIsNotNone(
+            self.cache.get(group.get_profile_fingerprint(group.profiles[50]))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
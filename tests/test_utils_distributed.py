@@ -0,0 +1,198 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import requests
+
+from bloodytools.utils.backends import DistributedBackend, LocalBackend
+from bloodytools.utils.distributed import Coordinator, DistributedError, Worker
+from bloodytools.utils.simulation_objects import (
+    SimulationError,
+    Simulation_Data,
+    Simulation_Group,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_SIMC = os.path.join(ROOT, "tests", "fake_simc.py")
+PROFILE = {
+    "character": {"class": "shaman", "spec": "elemental", "level": "80"},
+    "items": {"head": {"id": "1"}},
+}
+
+
+def create_group(name: str = "group", profile: dict = PROFILE) -> Simulation_Group:
+    group = Simulation_Group(name=name, base_filename=name, executable=FAKE_SIMC)
+    for i in range(7):
+        group.add(
+            Simulation_Data(
+                name="baseline" if i == 0 else f"profile_{i}",
+                profile=profile,
+                simc_arguments=[f"potion=potion_{i}"],
+                executable=FAKE_SIMC,
+            )
+        )
+    return group
+
+
+def wait_for(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError()
+        time.sleep(0.01)
+
+
+@unittest.skipIf(os.name != "posix", "fake_simc.py needs to be executable")
+class TestDistributed(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.coordinator = Coordinator(
+            simc_hash="fakehash", worker_timeout=0.4, max_attempts=2
+        ).start()
+        self.backend = DistributedBackend(self.coordinator)
+        self.backend.poll_interval = 0.05
+        self.stop = threading.Event()
+        self.threads: list = []
+
+    def tearDown(self) -> None:
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+        self.coordinator.close()
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def start_worker(self, name: str, simc_hash: str = "fakehash") -> Worker:
+        worker = Worker(
+            self.coordinator.url,
+            FAKE_SIMC,
+            name=name,
+            simc_hash=simc_hash,
+            idle_interval=0.02,
+        )
+        thread = threading.Thread(target=worker.run, args=(self.stop,))
+        thread.start()
+        self.threads.append(thread)
+        return worker
+
+    def post(self, path: str, body: dict) -> requests.Response:
+        return requests.post(self.coordinator.url + path, json=body, timeout=5)
+
+    def test_same_results_as_local(self):
+        self.start_worker("thread_worker")
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "bloodytools",
+                "worker",
+                "--coordinator",
+                self.coordinator.url,
+                "--executable",
+                FAKE_SIMC,
+                "--simc_hash",
+                "fakehash",
+            ],
+            env=dict(os.environ, PYTHONPATH=ROOT),
+        )
+        try:
+            wait_for(lambda: self.coordinator.worker_count == 2)
+            group = create_group()
+            group.backend = self.backend
+            self.assertTrue(group.simulate())
+        finally:
+            process.terminate()
+            process.wait()
+
+        local_group = create_group("local")
+        local_group.backend = LocalBackend()
+        local_group.simulate()
+
+        self.assertEqual(group.simc_hash, "fakehash")
+        self.assertEqual(len(group.json_data["sim"]["profilesets"]["results"]), 6)
+        for profile in local_group.profiles:
+            self.assertEqual(
+                group.get_dps_of(profile.name), profile.get_dps(), profile.name
+            )
+
+    def test_lost_worker(self):
+        worker_id = self.post("/register", {"name": "lost", "simc_hash": "fakehash"})
+        worker_id = worker_id.json()["worker_id"]
+        job = self.coordinator.submit("shard", create_group().create_profileset_input())
+        self.assertEqual(self.post("/lease", {"worker_id": worker_id}).status_code, 200)
+
+        # lost workers are dropped and their shards are queued again
+        wait_for(lambda: self.coordinator.worker_count == 0)
+        self.assertEqual(
+            self.post("/heartbeat", {"worker_id": worker_id}).status_code, 404
+        )
+        self.start_worker("worker")
+        data = job.future.result(timeout=10)
+
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(len(data["sim"]["profilesets"]["results"]), 6)
+
+    def test_simc_hash_check(self):
+        with self.assertRaises(DistributedError):
+            Worker(self.coordinator.url, FAKE_SIMC, simc_hash="other").run()
+
+        worker_id = self.post("/register", {"name": "w", "simc_hash": "fakehash"})
+        worker_id = worker_id.json()["worker_id"]
+        job = self.coordinator.submit("shard", "input")
+        job_id = self.post("/lease", {"worker_id": worker_id}).json()["job_id"]
+        response = self.post(
+            "/result",
+            {
+                "worker_id": worker_id,
+                "job_id": job_id,
+                "simc_hash": "fakehash",
+                "data": {"git_revision": "other"},
+            },
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.coordinator.worker_count, 0)
+        self.assertFalse(job.future.done())
+
+    def test_idle_worker(self):
+        worker = Worker(self.coordinator.url, FAKE_SIMC, simc_hash="fakehash")
+        worker._register()
+        with self.assertNoLogs("bloodytools.utils.distributed", level="WARNING"):
+            self.assertEqual(worker._post("/lease", {}), (204, {}))
+
+    def test_result_is_retried(self):
+        worker = self.start_worker("flaky")
+        worker.retry_delay = 0.01
+        post = worker.session.post
+        failures: list = []
+
+        def flaky_post(url, **kwargs):
+            if url.endswith("/result") and len(failures) < 2:
+                failures.append(url)
+                raise requests.exceptions.ConnectionError("network is down")
+            return post(url, **kwargs)
+
+        worker.session.post = flaky_post  # type: ignore
+        job = self.coordinator.submit("shard", create_group().create_profileset_input())
+        data = job.future.result(timeout=10)
+
+        self.assertEqual(len(failures), 2)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(len(data["sim"]["profilesets"]["results"]), 6)
+
+    def test_failing_shard(self):
+        self.start_worker("worker")
+        group = create_group(profile={"character": {"class": "broken"}})
+        group.backend = self.backend
+        with self.assertRaises(SimulationError):
+            group.simulate()
+
+
+if __name__ == "__main__":
+    unittest.main()
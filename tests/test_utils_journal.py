@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bloodytools.simulations.simulator import Simulator, SimulatorFactory
+from bloodytools.utils import scheduler
+from bloodytools.utils.config import Config
+from bloodytools.utils.journal import JobJournal, get_job_journal
+
+
+class WritingSimulator(Simulator):
+    runs: list = []
+    failing_specs: list = []
+
+    @classmethod
+    def name(cls) -> str:
+        return "Writing"
+
+    def add_simulation_data(self, simulation_group, data_dict) -> None:
+        pass
+
+    def run(self) -> None:
+        self.runs.append((self.wow_spec.simc_name, self.fight_style))
+        if self.wow_spec.simc_name in self.failing_specs:
+            raise RuntimeError("simc exploded")
+        self._write({"spec": self.wow_spec.simc_name})
+
+
+@mock.patch(
+    "bloodytools.simulations.simulator.get_profile",
+    lambda *args: {"character": {"class": "shaman"}},
+)
+class TestJobJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        WritingSimulator.runs = []
+        WritingSimulator.failing_specs = ["fire"]
+        self.factory = SimulatorFactory()
+        self.factory.register_simulator(WritingSimulator)
+        self.config = Config(
+            executable="not_a_simc",
+            simc_hash="abc",
+            wow_class_spec_names=[("shaman", "elemental"), ("mage", "fire")],
+            simulator_type_names=["writing"],
+            fight_styles=["patchwerk", "dungeonslice"],
+        )
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def _run(self, config: Config) -> list:
+        return scheduler.JobScheduler(
+            config, self.factory, journal=get_job_journal(config)
+        ).run()
+
+    def test_resume(self):
+        results = self._run(self.config)
+        self.assertEqual([r.success for r in results], [True, True, False, False])
+        with open(self.config.job_journal) as f:
+            states = [json.loads(line)["state"] for line in f]
+        self.assertEqual(states.count("done"), 2)
+        self.assertEqual(states.count("failed"), 2)
+
+        # a crash leaves a partial line behind
+        with open(self.config.job_journal, "a") as f:
+            f.write('{"job": "writing|mage|fire|patch')
+
+        WritingSimulator.runs = []
+        WritingSimulator.failing_specs = []
+        self.config.resume = True
+        results = self._run(self.config)
+
+        self.assertEqual(
+            WritingSimulator.runs, [("fire", "patchwerk"), ("fire", "dungeonslice")]
+        )
+        self.assertEqual([r.skipped for r in results], [True, True, False, False])
+        self.assertTrue(all(r.success for r in results))
+
+    def test_changed_result_or_build_is_simulated_again(self):
+        WritingSimulator.failing_specs = []
+        self._run(self.config)
+        os.remove(os.path.join("results", "writing", "shaman_elemental_patchwerk.json"))
+        with open(
+            os.path.join("results", "writing", "mage_fire_patchwerk.json"), "a"
+        ) as f:
+            f.write(" ")
+
+        WritingSimulator.runs = []
+        self.config.resume = True
+        self._run(self.config)
+        self.assertEqual(
+            WritingSimulator.runs, [("elemental", "patchwerk"), ("fire", "patchwerk")]
+        )
+
+        WritingSimulator.runs = []
+        self.config.simc_hash = "def"
+        self._run(self.config)
+        self.assertEqual(len(WritingSimulator.runs), 4)
+
+    def test_new_run_starts_new_journal(self):
+        WritingSimulator.failing_specs = []
+        self._run(self.config)
+        journal = JobJournal(self.config.job_journal, simc_hash="abc")
+        job = scheduler.create_job_matrix(self.config)[0]
+        self.assertFalse(journal.is_done(job))
+        self.assertEqual(os.path.getsize(self.config.job_journal), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
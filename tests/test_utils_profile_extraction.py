@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bloodytools.utils import profile_extraction
+from bloodytools.utils.cache import ResultCache
+from bloodytools.utils.profile_extraction import (
+    CharacterSource,
+    EmptyFileError,
+    IncompleteProfileError,
+    extract_profile,
+)
+from simc_support.game_data.WowClass import SHAMAN
+
+PROFILE = """shaman="T_Shaman_Elemental"
+# level=70
+level=80
+race=orc
+role=spell
+position=ranged
+spec=elemental
+talents=ABC
+set_bonus="thewarwithin_season_2_2pc"=1
+
+head=,id=212011,bonus_id=4800/4786,gem_id=213743
+shoulder="",id=212009,enchant_id=7364
+main_hand=,id=222566,enchant=authority_of_radiant_power,crafted_stats=36/40
+"""
+
+
+class TestExtractProfile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "profile.simc")
+        with open(self.path, "w") as f:
+            f.write(PROFILE)
+        profile_extraction._parsed_profiles.clear()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        profile_extraction._parsed_profiles.clear()
+
+    def _extract(self, cache=None) -> dict:
+        return extract_profile(
+            self.path, SHAMAN, CharacterSource.FALLBACK_PROFILE, cache=cache
+        )
+
+    def test_extraction(self):
+        profile = self._extract()
+        self.assertEqual(
+            profile["character"],
+            {
+                "class": "shaman",
+                "# source": "fallback_profile",
+                "level": "80",
+                "race": "orc",
+                "role": "spell",
+                "position": "ranged",
+                "spec": "elemental",
+                "talents": "ABC",
+                "set_bonus=thewarwithin_season_2_2pc": "1",
+            },
+        )
+        self.assertEqual(
+            profile["items"],
+            {
+                "head": {"id": "212011", "bonus_id": "4800/4786", "gem_id": "213743"},
+                "shoulders": {"id": "212009", "enchant_id": "7364"},
+                "main_hand": {
+                    "id": "222566",
+                    "enchant": "authority_of_radiant_power",
+                    "crafted_stats": "36/40",
+                },
+            },
+        )
+
+    def test_line_edge_cases(self):
+        with open(self.path, "a") as f:
+            f.write("set_bonus='tier31_4pc\"=0\n")
+            f.write('set_bonus=""tier31_2pc=1\n')
+            f.write("set_bonus=unknown_2pc=1\n")
+            f.write("  race=troll\n")
+            f.write("trinket1=name,drop_level=70,id=1.5,id=2,unknown=3\n")
+            f.write("wrist=,enchant_id=1\n")
+            f.write("wrists=,id=2\n")
+        profile = self._extract()
+
+        self.assertEqual(profile["character"]["set_bonus=tier31_4pc"], "0")
+        self.assertNotIn("set_bonus=tier31_2pc", profile["character"])
+        self.assertNotIn("set_bonus=unknown_2pc", profile["character"])
+        self.assertEqual(profile["character"]["race"], "orc")
+        self.assertEqual(
+            list(profile["items"]["trinket1"].items()),
+            [("id", "1"), ("drop_level", "70")],
+        )
+        self.assertEqual(profile["items"]["wrists"], {"enchant_id": "1", "id": "2"})
+
+    def test_errors(self):
+        with open(self.path, "w") as f:
+            f.write("  \n")
+        with self.assertRaises(EmptyFileError):
+            self._extract()
+
+        with open(self.path, "w") as f:
+            f.write("level=80\n")
+        with self.assertRaises(IncompleteProfileError):
+            self._extract()
+
+    def test_memoized(self):
+        profile = self._extract()
+        profile["character"]["level"] = "1"
+        with mock.patch.object(profile_extraction, "_parse_profile") as parse:
+            self.assertEqual(self._extract()["character"]["level"], "80")
+        parse.assert_not_called()
+
+    def test_changed_file_is_parsed_again(self):
+        self._extract()
+        with open(self.path, "w") as f:
+            f.write(PROFILE.replace("race=orc", "race=troll"))
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(self._extract()["character"]["race"], "troll")
+
+    def test_on_disk_cache(self):
+        cache = ResultCache(os.path.join(self.tmp_dir.name, "cache"), 0)
+        profile = self._extract(cache)
+        profile_extraction._parsed_profiles.clear()
+
+        with mock.patch.object(profile_extraction, "_parse_profile") as parse:
+            self.assertEqual(self._extract(cache), profile)
+        parse.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import functools
+import http.server
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from bloodytools.utils import simulation_objects
+from bloodytools.utils.raidbots import RaidbotsClient, RaidbotsError
+
+PROFILE = {
+    "character": {"class": "shaman", "spec": "elemental", "level": "80"},
+    "items": {"head": {"id": "1"}},
+}
+
+
+class FakeRaidbots(http.server.ThreadingHTTPServer):
+    """Stand-in for the Raidbots endpoints used by RaidbotsClient."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeRaidbotsHandler)
+        self.lock = threading.Lock()
+        self.jobs: dict = {}
+        self.rate_limits = 0
+        self.polls = 0
+        self.max_outstanding = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeRaidbotsHandler(http.server.BaseHTTPRequestHandler):
+    server: FakeRaidbots
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: object, headers: dict = {}) -> None:
+        content = (body if isinstance(body, str) else json.dumps(body)).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            if self.server.rate_limits:
+                self.server.rate_limits -= 1
+                return self._send(429, {}, {"Retry-After": "0"})
+            sim_id = str(len(self.server.jobs))
+            self.server.jobs[sim_id] = {"input": body["advancedInput"], "polls": 0}
+        self._send(200, {"simId": sim_id})
+
+    def do_GET(self) -> None:
+        parts = self.path.strip("/").split("/")
+        with self.server.lock:
+            if parts[:2] == ["api", "job"]:
+                job = self.server.jobs[parts[2]]
+                job["polls"] += 1
+                self.server.polls += 1
+                outstanding = sum(
+                    1 for j in self.server.jobs.values() if j["polls"] < 3
+                )
+                self.server.max_outstanding = max(
+                    self.server.max_outstanding, outstanding
+                )
+                state = "complete" if job["polls"] >= 3 else "running"
+                if "fail" in job["input"] and job["polls"] >= 3:
+                    state = "failed"
+                return self._send(
+                    200,
+                    {
+                        "job": {"state": state, "progress": 30 * job["polls"]},
+                        "retriesRemaining": 0,
+                    },
+                )
+            job = self.server.jobs[parts[1]]
+
+        if parts[2] == "data.json":
+            names = [
+                line.split('"')[1]
+                for line in job["input"].splitlines()
+                if line.startswith("name=")
+            ]
+            profilesets = sorted(
+                {
+                    line.split('"')[1]
+                    for line in job["input"].splitlines()
+                    if line.startswith("profileset.")
+                }
+            )
+            return self._send(
+                200,
+                {
+                    "git_revision": "abcdef",
+                    "simbot": {},
+                    "sim": {
+                        "players": [{"name": names[0]}],
+                        "statistics": {"raid_dps": {"mean": 1000}},
+                        "profilesets": {
+                            "results": [
+                                {"name": name, "mean": 1001 + i}
+                                for i, name in enumerate(profilesets)
+                            ]
+                        },
+                    },
+                },
+            )
+        self._send(200, f"{parts[2]} of {parts[1]}")
+
+
+class TestRaidbotsClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.server = FakeRaidbots()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = RaidbotsClient(
+            "apikey", base_url=self.server.url, poll_interval=0.05
+        )
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def _create_group(self, name: str) -> simulation_objects.Simulation_Group:
+        group = simulation_objects.Simulation_Group(name=name, base_filename=name)
+        for profile_name in ["baseline", "a", "b"]:
+            group.add(
+                simulation_objects.Simulation_Data(
+                    name=profile_name,
+                    profile=PROFILE,
+                    simc_arguments=[f"potion={name}_{profile_name}"],
+                )
+            )
+        return group
+
+    def test_concurrent_groups(self):
+        groups = [self._create_group(f"group_{i}") for i in range(5)]
+        completed = []
+        results = self.client.simulate_groups(
+            groups, on_complete=lambda group, result: completed.append(group.name)
+        )
+
+        self.assertEqual(results, ["abcdef"] * 5)
+        self.assertEqual(sorted(completed), [group.name for group in groups])
+        for group in groups:
+            self.assertEqual(group.get_dps_of("baseline"), 1000)
+            self.assertEqual(group.get_dps_of("b"), 1002)
+        # all jobs were outstanding at the same time and polled together
+        self.assertEqual(self.server.max_outstanding, 5)
+        self.assertEqual(self.server.polls, 15)
+        self.assertEqual(os.listdir(), [])
+
+    def test_rate_limited_submission(self):
+        self.server.rate_limits = 2
+        self.assertEqual(
+            self.client.simulate_groups([self._create_group("group")]), ["abcdef"]
+        )
+
+    def test_failed_job(self):
+        groups = [self._create_group("group"), self._create_group("fail")]
+        results = self.client.simulate_groups(groups)
+
+        self.assertEqual(results[0], "abcdef")
+        self.assertIsInstance(results[1], RaidbotsError)
+        sim_id = [i for i, job in self.server.jobs.items() if "fail" in job["input"]][0]
+        with open(f"{sim_id}.error") as f:
+            self.assertIn(f"output.txt of {sim_id}", f.read())
+
+    def test_simulate_with_raidbots(self):
+        group = self._create_group("group")
+        fast_client = functools.partial(RaidbotsClient, poll_interval=0.01)
+        with mock.patch("bloodytools.utils.raidbots.RaidbotsClient", fast_client):
+            simc_hash = group.simulate_with_raidbots("apikey", base_url=self.server.url)
+        self.assertEqual(simc_hash, "abcdef")
+        self.assertEqual(group.get_dps_of("a"), 1001)
+
+
+if __name__ == "__main__":
+    unittest.main()
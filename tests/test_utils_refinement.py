@@ -0,0 +1,116 @@
+import json
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bloodytools.utils import refinement, simulation_objects
+
+PROFILE = {
+    "character": {"class": "shaman", "spec": "elemental", "level": "80"},
+    "items": {"head": {"id": "1"}},
+}
+DPS = {"base": 1000, "a": 1100, "b": 1101, "c": 2000, "d": 3000}
+ITERATIONS = 10000
+
+
+class TestRefinement(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.rounds: list = []
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _create_group(self, name: str) -> simulation_objects.Simulation_Group:
+        return simulation_objects.Simulation_Group(
+            name=name,
+            executable="Not_a_correct_value",
+            base_filename=os.path.join(self.tmp_dir.name, name),
+        )
+
+    def _run_profilesets(self, group):
+        """Pretend simc reached exactly the target_error of the group."""
+        target_error = float(group.profiles[0].target_error)
+        self.rounds.append((target_error, [profile.name for profile in group.profiles]))
+
+        def std_error(name):
+            return DPS[name] * target_error / 100 / refinement.CONFIDENCE_FACTOR
+
+        base_name = group.profiles[0].name
+        json_data = {
+            "sim": {
+                "players": [
+                    {
+                        "name": base_name,
+                        "collected_data": {
+                            "dps": {
+                                "mean": DPS[base_name],
+                                "mean_std_dev": std_error(base_name),
+                            }
+                        },
+                    }
+                ],
+                "statistics": {"raid_dps": {"mean": DPS[base_name]}},
+                "profilesets": {
+                    "results": [
+                        {
+                            "name": profile.name,
+                            "mean": DPS[profile.name],
+                            "stddev": std_error(profile.name) * math.sqrt(ITERATIONS),
+                            "iterations": ITERATIONS,
+                        }
+                        for profile in group.profiles[1:]
+                    ]
+                },
+            }
+        }
+        with open(group.json_filename, "w") as f:
+            json.dump(json_data, f)
+
+    def test_schedule(self):
+        self.assertEqual(
+            refinement.get_target_error_schedule("0.4", "0.1"), ["0.4", "0.2", "0.1"]
+        )
+        self.assertEqual(refinement.get_target_error_schedule("0.1", "0.1"), ["0.1"])
+
+    def test_contested_profiles(self):
+        intervals = {"a": (99, 101), "b": (100.5, 102.5), "c": (200, 202)}
+        self.assertEqual(refinement.get_contested_profiles(intervals), {"a", "b"})
+
+    def test_only_contested_profiles_are_refined(self):
+        group = self._create_group("group")
+        for name in DPS:
+            group.add(
+                simulation_objects.Simulation_Data(
+                    name=name,
+                    profile=PROFILE,
+                    target_error="0.1",
+                    simc_arguments=[f"potion={name}"],
+                )
+            )
+
+        with mock.patch.object(
+            simulation_objects.Simulation_Group,
+            "_run_profilesets",
+            autospec=True,
+            side_effect=self._run_profilesets,
+        ):
+            rounds = refinement.refine_simulation_group(
+                group, self._create_group, "0.4"
+            )
+
+        self.assertEqual(rounds, 3)
+        self.assertEqual(self.rounds[0], (0.4, list(DPS)))
+        self.assertEqual(self.rounds[1], (0.2, ["base", "a", "b"]))
+        self.assertEqual(self.rounds[2], (0.1, ["base", "a", "b"]))
+        self.assertEqual(group.get_dps_of("b"), 1101)
+        self.assertEqual(group.profiles[1].target_error, "0.1")
+        self.assertEqual(group.profiles[3].target_error, "0.4")
+        results = group.json_data["sim"]["profilesets"]["results"]
+        self.assertEqual(len(results), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
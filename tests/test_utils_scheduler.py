@@ -0,0 +1,129 @@
+import threading
+import unittest
+
+from bloodytools.simulations.simulator import Simulator, SimulatorFactory
+from bloodytools.utils import scheduler
+from bloodytools.utils.config import Config
+
+
+class RecordingSimulator(Simulator):
+    runs: list = []
+    lock = threading.Lock()
+
+    @classmethod
+    def name(cls) -> str:
+        return "Recording"
+
+    def add_simulation_data(self, simulation_group, data_dict) -> None:
+        pass
+
+    def run(self) -> None:
+        with self.lock:
+            self.runs.append(
+                (self.wow_spec, self.fight_style, self.settings.base_filename)
+            )
+
+
+class FailingSimulator(RecordingSimulator):
+    @classmethod
+    def name(cls) -> str:
+        return "Failing"
+
+    def run(self) -> None:
+        raise RuntimeError("simc exploded")
+
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        RecordingSimulator.runs = []
+        self.factory = SimulatorFactory()
+        self.factory.register_simulator(RecordingSimulator)
+        self.factory.register_simulator(FailingSimulator)
+        self.config = Config(
+            executable="not_a_simc",
+            base_filename="base",
+            wow_class_spec_names=[("shaman", "elemental"), ("mage", "fire")],
+            simulator_type_names=["recording"],
+            fight_styles=["patchwerk", "castingpatchwerk"],
+        )
+
+    def test_job_matrix(self):
+        jobs = scheduler.create_job_matrix(self.config)
+        self.assertEqual(len(jobs), 4)
+        self.assertEqual(jobs[0].fight_style, "patchwerk")
+        self.assertEqual(jobs[1].fight_style, "castingpatchwerk")
+        self.assertEqual(jobs[0].wow_spec, jobs[1].wow_spec)
+
+    def test_threads_per_job(self):
+        self.assertEqual(scheduler.get_threads_per_job(64, 4), 16)
+        self.assertEqual(scheduler.get_threads_per_job(2, 4), 1)
+
+    def test_job_config(self):
+        self.config.profileset_work_threads = "8"
+        job_config = scheduler.create_job_config(self.config, 3, 4)
+        self.assertEqual(job_config.base_filename, "base_3")
+        self.assertEqual(job_config.threads, "4")
+        self.assertEqual(job_config.profileset_work_threads, "4")
+        self.assertEqual(self.config.base_filename, "base")
+
+    def test_job_config_is_independent(self):
+        self.config.fight_styles = ["patchwerk"]
+        job_config = scheduler.create_job_config(self.config, 0, 4)
+        job_config.target_error["patchwerk"] = "1.0"
+        job_config.fight_styles.append("hecticaddcleave")
+
+        self.assertEqual(self.config.target_error["patchwerk"], "0.1")
+        self.assertEqual(self.config.fight_styles, ["patchwerk"])
+
+    def test_sequential(self):
+        results = scheduler.JobScheduler(self.config, self.factory).run()
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(len(RecordingSimulator.runs), 4)
+        self.assertEqual({run[2] for run in RecordingSimulator.runs}, {"base"})
+
+    def test_concurrent(self):
+        self.config.concurrent_jobs = 2
+        self.config.core_budget = 8
+        results = scheduler.JobScheduler(self.config, self.factory).run()
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(
+            [result.job for result in results],
+            scheduler.create_job_matrix(self.config),
+        )
+        self.assertEqual(len({run[2] for run in RecordingSimulator.runs}), 4)
+
+    def test_failure_isolation(self):
+        self.config.simulator_type_names = ["failing", "recording"]
+        self.config.concurrent_jobs = 3
+        with self.assertLogs(scheduler.logger, level="ERROR") as logs:
+            results = scheduler.JobScheduler(self.config, self.factory).run()
+        failed = [result for result in results if not result.success]
+        self.assertEqual(len(failed), 4)
+        # one record with traceback per failed job
+        self.assertEqual(len(logs.records), 4)
+        self.assertTrue(all(record.exc_info for record in logs.records))
+        self.assertTrue(all(isinstance(r.error, RuntimeError) for r in failed))
+        self.assertEqual(len(RecordingSimulator.runs), 4)
+
+
+class TestRunConcurrently(unittest.TestCase):
+    def test_errors_in_order(self):
+        def function(item):
+            if item % 2:
+                raise ValueError(item)
+
+        errors = scheduler.run_concurrently(function, range(5), 3)
+        self.assertEqual(
+            [type(error) if error else None for error in errors],
+            [None, ValueError, None, ValueError, None],
+        )
+
+    def test_concurrent_simulations(self):
+        self.assertEqual(scheduler.get_concurrent_simulations(16, 39), 4)
+        self.assertEqual(scheduler.get_concurrent_simulations(16, 2), 2)
+        self.assertEqual(scheduler.get_concurrent_simulations(2, 39), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
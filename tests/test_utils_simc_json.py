@@ -0,0 +1,92 @@
+import io
+import json
+import unittest
+
+from bloodytools.utils.simc_json import (
+    extract_profileset_report,
+    get_achieved_error,
+    get_sample_statistics,
+    trim_json_data,
+)
+
+JSON_DATA = {
+    "version": "1.0",
+    "git_revision": "abcdef",
+    "sim": {
+        "options": {"iterations": 100, "dbc": {"huge": "object"}},
+        "players": [
+            {
+                "name": "base",
+                "talents": "ABC",
+                "gear": {"head": {"name": 'quote " and brace }'}},
+                "collected_data": {
+                    "timeline_dmg": {"data": [1.5, -2e10, 3] * 100},
+                    "dps": {"mean": 100.0, "min": 90.5},
+                },
+            }
+        ],
+        "statistics": {"raid_dps": {"mean": 100.0}},
+        "profilesets": {
+            "metric": "dps",
+            "results": [
+                {"name": "a", "mean": 101.0, "stddev": 1.5},
+                {"name": 'b\\"]', "mean": 102.0, "stddev": 1.5},
+            ],
+        },
+    },
+}
+
+
+class TestTrimJsonData(unittest.TestCase):
+    def test_trim(self):
+        trimmed = trim_json_data(JSON_DATA)
+        self.assertEqual(trimmed["version"], "1.0")
+        self.assertEqual(trimmed["sim"]["options"], {"iterations": 100})
+        self.assertEqual(
+            trimmed["sim"]["players"][0],
+            {
+                "name": "base",
+                "talents": "ABC",
+                "collected_data": {"dps": {"mean": 100.0, "min": 90.5}},
+            },
+        )
+        self.assertEqual(len(trimmed["sim"]["profilesets"]["results"]), 2)
+
+
+class TestExtractProfilesetReport(unittest.TestCase):
+    def test_equals_trimmed_report(self):
+        for indent in (None, 2):
+            text = json.dumps(JSON_DATA, indent=indent)
+            # tiny chunks split every token at least once
+            for chunk_size in (1, 7, 1024**2):
+                with self.subTest(indent=indent, chunk_size=chunk_size):
+                    self.assertEqual(
+                        extract_profileset_report(io.StringIO(text), chunk_size),
+                        trim_json_data(JSON_DATA),
+                    )
+
+    def test_invalid_report(self):
+        with self.assertRaises(ValueError):
+            extract_profileset_report(io.StringIO('{"sim": {"players": [}'))
+
+
+class TestSampleStatistics(unittest.TestCase):
+    def test_sample_statistics(self):
+        self.assertEqual(
+            get_sample_statistics({"mean": 1.0, "stddev": 2.0, "iterations": 10}),
+            (10, 2.0),
+        )
+        self.assertEqual(
+            get_sample_statistics({"mean_std_dev": 2.0, "count": 16}), (16, 8.0)
+        )
+        self.assertEqual(get_sample_statistics({"std_dev": 3.0}, 7), (7, 3.0))
+        self.assertEqual(get_sample_statistics({"mean": 1.0}), (0, 0.0))
+
+    def test_achieved_error(self):
+        self.assertAlmostEqual(get_achieved_error(1000.0, 100.0, 10000), 0.196)
+        self.assertEqual(get_achieved_error(1000.0, 100.0, 0), 0.0)
+        self.assertEqual(get_achieved_error(-1, 100.0, 10), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,15 @@
+import copy
 import datetime
+import io
+import json
 import os
+import pickle
+import tempfile
 import time
+import tracemalloc
 import unittest
 import uuid
+from unittest import mock
 
 from bloodytools.utils import simulation_objects
 
@@ -412,6 +419,57 @@ class TestSimulationGroupMethods(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.sg.add("Bananana")
 
+    def test_add_duplicate_name(self):
+        new_data = simulation_objects.Simulation_Data(
+            name=self.sd2.name, target_error=1.0
+        )
+        with self.assertRaises(simulation_objects.DuplicateProfileNameError):
+            self.sg.add(new_data)
+        with self.assertRaises(simulation_objects.DuplicateProfileNameError):
+            simulation_objects.Simulation_Group([self.sd1, self.sd2, new_data])
+        self.assertEqual(len(self.sg.profiles), 2)
+
+    def test_name_index(self):
+        self.assertTrue(self.sg.set_dps_of(self.sd2.name, 1000))
+        self.assertEqual(self.sg.get_dps_of(self.sd2.name), 1000)
+        with self.assertRaises(KeyError):
+            self.sg.get_dps_of("unknown")
+
+        # profiles renamed, replaced, or appended outside of add are found too
+        old_name = self.sd1.name
+        self.sg.rename_profile(self.sd1, "renamed")
+        self.assertEqual(self.sd1.name, "renamed")
+        self.assertIs(self.sg.get_profile("renamed"), self.sd1)
+        self.assertIsNone(self.sg.get_profile(old_name))
+        self.sg.add(simulation_objects.Simulation_Data(name=old_name))
+        new_data = simulation_objects.Simulation_Data(name="appended")
+        self.sg.profiles.append(new_data)
+        self.assertIs(self.sg.get_profile("appended"), new_data)
+        self.sg.profiles = [self.sd1]
+        self.assertIsNone(self.sg.get_profile("appended"))
+        self.assertTrue(self.sg.add(new_data))
+
+    def test_add_duplicate_of_renamed_profile(self):
+        self.sg.rename_profile(self.sd2, "c")
+        with self.assertRaises(simulation_objects.DuplicateProfileNameError):
+            self.sg.add(simulation_objects.Simulation_Data(name="c"))
+        with self.assertRaises(simulation_objects.DuplicateProfileNameError):
+            self.sg.rename_profile(self.sd2, self.sd1.name)
+        self.assertEqual([profile.name for profile in self.sg.profiles][1:], ["c"])
+        self.assertTrue(self.sg.add(simulation_objects.Simulation_Data(name="b")))
+
+    def test_missing_names_keep_the_index(self):
+        with mock.patch.object(
+            self.sg, "_index_profiles", wraps=self.sg._index_profiles
+        ) as index_profiles:
+            for i in range(10):
+                self.assertIsNone(self.sg.get_profile(f"unknown {i}"))
+                self.sg.set_dps_of(f"unknown {i}", 1000)
+                with self.assertRaises(KeyError):
+                    self.sg.get_dps_of(f"unknown {i}")
+            self.sg.add(simulation_objects.Simulation_Data(name="new"))
+        index_profiles.assert_not_called()
+
     @unittest.skip(
         reason="simulating would assume a SimulationCraft executable is available. But that's not to be expected during testing."
     )
@@ -514,5 +572,302 @@ class TestSimulationGroupMethods(unittest.TestCase):
         self.assertFalse(self.sg.simulate())
 
 
+class TestSimulationGroupShards(unittest.TestCase):
+    """Test sharded profileset simulations without a SimulationCraft executable."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.sg = simulation_objects.Simulation_Group(
+            executable="Not_a_correct_value",
+            threads="8",
+            base_filename=os.path.join(self.tmp_dir.name, "group"),
+        )
+        profile = {
+            "character": {"class": "shaman", "spec": "elemental", "level": "80"},
+            "items": {"head": {"id": "1"}},
+        }
+        for i in range(7):
+            self.sg.add(
+                simulation_objects.Simulation_Data(
+                    name=str(i), profile=profile, simc_arguments=[f"potion={i}"]
+                )
+            )
+        self.shard_files = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _run_profilesets(self, group):
+        self.shard_files.append((group.filename, group.threads))
+        names = [profile.name for profile in group.profiles]
+        json_data = {
+            "sim": {
+                "options": {"iterations": 100},
+                "players": [{"name": names[0]}],
+                "statistics": {
+                    "elapsed_cpu_seconds": 3.0,
+                    "raid_dps": {"mean": 1000, "mean_std_dev": 5.0},
+                },
+                "profilesets": {
+                    "results": [
+                        {
+                            "name": name,
+                            "mean": 1000 + int(name),
+                            "stddev": 50.0,
+                            "iterations": 100 * int(name),
+                        }
+                        for name in names[1:]
+                    ]
+                },
+            }
+        }
+        with open(group.json_filename, "w") as f:
+            json.dump(json_data, f)
+
+    def test_shard_count(self):
+        self.assertEqual(self.sg.get_shard_count(), 1)
+        self.sg.shards = 4
+        self.assertEqual(self.sg.get_shard_count(), 4)
+        self.assertEqual(self.sg.get_threads_per_shard(4), 2)
+        self.sg.shards = 20
+        self.assertEqual(self.sg.get_shard_count(), 6)
+        self.sg.shards = 0
+        self.sg.threads = str(4 * simulation_objects.AUTO_SHARD_THREADS)
+        self.assertEqual(self.sg.get_shard_count(), 4)
+
+    def test_simulate_shards(self):
+        self.sg.shards = 3
+        with mock.patch.object(
+            simulation_objects.Simulation_Group,
+            "_run_profilesets",
+            autospec=True,
+            side_effect=self._run_profilesets,
+        ):
+            self.assertTrue(self.sg.simulate())
+
+        self.assertEqual(len(self.shard_files), 3)
+        self.assertEqual({threads for _, threads in self.shard_files}, {"2"})
+        self.assertEqual(self.sg.get_dps_of("0"), 1000)
+        for i in range(1, 7):
+            self.assertEqual(self.sg.get_dps_of(str(i)), 1000 + i)
+        self.assertEqual(len(self.sg.json_data["sim"]["profilesets"]["results"]), 6)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+        # CPU time of all shards is split by iterations
+        self.assertAlmostEqual(sum(p.cpu_seconds for p in self.sg.profiles), 9.0)
+        self.assertAlmostEqual(
+            self.sg.profiles[2].cpu_seconds, 2 * self.sg.profiles[1].cpu_seconds
+        )
+        self.assertEqual(self.sg.profiles[0].iterations_run, 100)
+        self.assertEqual(self.sg.profiles[6].iterations_run, 600)
+        self.assertAlmostEqual(self.sg.profiles[0].achieved_error, 1.96 * 5 / 10)
+        self.assertAlmostEqual(
+            self.sg.profiles[1].achieved_error, 1.96 * 50 / 10 / 1001 * 100
+        )
+
+
+class TestProfilesetHoisting(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.sg = simulation_objects.Simulation_Group(
+            executable="Not_a_correct_value",
+            base_filename=os.path.join(self.tmp_dir.name, "group"),
+            hoist_keys=["talents", "potion", "head"],
+        )
+        profile = {
+            "character": {"class": "shaman", "spec": "elemental", "talents": "A"},
+            "items": {"head": {"id": "1"}},
+        }
+        shared = ["talents=", "talents=B", "potion=tempered", "flask=1"]
+        for name, arguments in [
+            ("baseline", shared),
+            ("crit", shared + ["gear_crit_rating=100"]),
+            ("other_build", ["talents=C", "potion=tempered", "flask=1"]),
+            ("same", shared),
+        ]:
+            self.sg.add(
+                simulation_objects.Simulation_Data(
+                    name=name, profile=profile, simc_arguments=arguments
+                )
+            )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _get_profileset_lines(self):
+        lines = "".join(
+            self.sg.create_profileset_lines("patchwerk", "", local_simulation=False)
+        ).splitlines()
+        return [line for line in lines if line.startswith("profileset.")]
+
+    def test_only_deltas_are_written(self):
+        self.assertEqual(
+            self._get_profileset_lines(),
+            [
+                'profileset."crit"+=spec=elemental',
+                'profileset."crit"+=flask=1',
+                'profileset."crit"+=gear_crit_rating=100',
+                'profileset."other_build"+=spec=elemental',
+                'profileset."other_build"+=talents=C',
+                'profileset."other_build"+=flask=1',
+                'profileset."same"+=spec=elemental',
+                'profileset."same"+=flask=1',
+            ],
+        )
+
+    def test_profileset_keeps_one_argument(self):
+        self.sg.hoist_keys = frozenset(["spec", "talents", "potion", "head", "flask"])
+        self.assertEqual(self._get_profileset_lines()[-1], 'profileset."same"+=flask=1')
+
+    def test_disabled(self):
+        self.sg.hoist_keys = frozenset()
+        self.assertIn(
+            'profileset."same"+=potion=tempered', self._get_profileset_lines()
+        )
+
+
+class TestProfilesetData(unittest.TestCase):
+    def setUp(self):
+        self.profile = {
+            "character": {"class": "shaman", "spec": "elemental", "level": "80"},
+            "items": {
+                slot: {"id": "1", "bonus_id": "1/2/3"}
+                for slot in ["head", "neck", "chest", "trinket1", "trinket2"]
+            },
+        }
+        self.arguments = [
+            [f"talents={talents}", f"gear_crit_rating={crit}", "potion=tempered"]
+            for talents in "AB"
+            for crit in range(10)
+        ]
+        self.base = simulation_objects.Simulation_Data(
+            name="0",
+            profile=self.profile,
+            simc_arguments=self.arguments[0],
+            fight_style="dungeonslice",
+            target_error="0.2",
+        )
+        self.sg = simulation_objects.Simulation_Group(self.base, hoist_keys=["potion"])
+        for i, arguments in enumerate(self.arguments[1:], 1):
+            self.sg.add(
+                simulation_objects.Profileset_Data(
+                    self.base, str(i), simc_arguments=arguments
+                )
+            )
+
+    def test_same_profileset_file(self):
+        full_sg = simulation_objects.Simulation_Group(hoist_keys=["potion"])
+        for i, arguments in enumerate(self.arguments):
+            full_sg.add(
+                simulation_objects.Simulation_Data(
+                    name=str(i),
+                    profile=self.profile,
+                    simc_arguments=arguments,
+                    fight_style="dungeonslice",
+                    target_error="0.2",
+                )
+            )
+        self.assertEqual(
+            list(self.sg.create_profileset_lines("dungeonslice", "")),
+            list(full_sg.create_profileset_lines("dungeonslice", "")),
+        )
+
+    def test_attributes(self):
+        profile = self.sg.profiles[5]
+        self.assertEqual(profile.fight_style, "dungeonslice")
+        self.assertEqual(profile.simc_arguments[-1], "potion=tempered")
+        self.assertTrue(self.base.is_equal(profile))
+        self.assertTrue(self.sg.selfcheck())
+        with self.assertRaises(AttributeError):
+            profile.simulate()
+
+        profile.target_error = "0.05"
+        self.assertEqual(self.base.target_error, "0.2")
+        profile.set_dps(1000.4)
+        self.assertEqual(self.sg.get_dps_of("5"), 1000)
+        self.assertEqual(self.base.get_dps(), -1)
+        with self.assertRaises(simulation_objects.AlreadySetError):
+            profile.set_dps(1000)
+
+    def test_copy(self):
+        profile = self.sg.profiles[5]
+        profile.set_dps(1000)
+        for copied in [copy.copy(profile), pickle.loads(pickle.dumps(profile))]:
+            self.assertEqual(copied.name, "5")
+            self.assertEqual(copied.get_dps(), 1000)
+            self.assertEqual(copied.simc_arguments, profile.simc_arguments)
+        self.assertIs(copy.copy(profile).base, self.base)
+
+    def test_base_needs_to_be_first(self):
+        sg = simulation_objects.Simulation_Group()
+        with self.assertRaises(TypeError):
+            sg.add(self.sg.profiles[1])
+        with self.assertRaises(TypeError):
+            simulation_objects.Simulation_Group(self.sg.profiles[1:])
+
+    def test_memory(self):
+        def create_profiles(create_profile):
+            tracemalloc.start()
+            profiles = [
+                create_profile(i, arguments)
+                for i, arguments in enumerate(self.arguments)
+            ]
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return size
+
+        full = create_profiles(
+            lambda i, arguments: simulation_objects.Simulation_Data(
+                name=str(i), profile=self.profile, simc_arguments=arguments
+            )
+        )
+        compact = create_profiles(
+            lambda i, arguments: simulation_objects.Profileset_Data(
+                self.base, str(i), simc_arguments=arguments
+            )
+        )
+        self.assertLess(compact * 5, full)
+
+
+class TestMonitorSimulation(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.sg = simulation_objects.Simulation_Group(
+            executable="Not_a_correct_value",
+            base_filename=os.path.join(self.tmp_dir.name, "group"),
+            output_buffer_lines=3,
+        )
+        self.process = mock.Mock()
+        self.process.stdout = io.StringIO(
+            "".join(f"line {i}\n" for i in range(10)) + "x" * 150 + "\n"
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_buffer_keeps_last_lines(self):
+        with mock.patch("sys.stdout", new_callable=io.StringIO):
+            self.sg.monitor_simulation(self.process)
+        self.assertEqual(self.sg.simulation_output, "line 8\nline 9\n" + "x" * 100)
+        self.assertFalse(os.path.exists(self.sg.base_filename + ".log"))
+
+        self.sg.simulation_output = "a\nb\nc\nd"
+        self.assertEqual(self.sg.simulation_output, "b\nc\nd")
+
+    def test_log_file(self):
+        self.sg.output_log = True
+        with mock.patch("sys.stdout", new_callable=io.StringIO):
+            self.sg.monitor_simulation(self.process)
+        with open(self.sg.base_filename + ".log") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(lines[-1], "x" * 150)
+
+    def test_progress_is_rate_limited(self):
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            self.sg.monitor_simulation(self.process)
+        self.assertEqual(stdout.getvalue(), "line 0".ljust(100) + "\r")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from bloodytools.utils.config import Config
+from bloodytools.utils.talent_resolution import TalentResolver
+
+FAKE_SIMC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_simc.py")
+PROFILE = {
+    "character": {"level": "80", "class": "shaman", "spec": "elemental"},
+    "items": {"head": {"id": "1"}},
+}
+
+
+@unittest.skipIf(os.name != "posix", "fake_simc.py needs to be executable")
+class TestTalentResolver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        TalentResolver._memo.clear()
+        self.settings = Config(
+            executable=FAKE_SIMC, simc_hash="abcdef", cache_dir="cache"
+        )
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+        TalentResolver._memo.clear()
+
+    def test_actor_arguments(self):
+        arguments = TalentResolver.get_actor_arguments(PROFILE, ["talents=A"])
+        self.assertEqual(arguments[0], "shaman=baseline")
+        self.assertEqual(arguments[-1], "talents=A")
+
+    def test_batched_resolution(self):
+        builds = [["talents=A"], ["talents="], ["talents=A"]]
+        talents = TalentResolver(self.settings).resolve("Elemental", PROFILE, builds)
+        self.assertEqual(talents, ["A", "DEFAULT", "A"])
+        self.assertEqual(os.listdir(), ["cache"])
+
+    def test_persisted_results(self):
+        TalentResolver(self.settings).resolve("Elemental", PROFILE, [["talents=A"]])
+        TalentResolver._memo.clear()
+        # no executable, results have to come from disk
+        self.settings.executable = "Not_a_correct_value"
+        talents = TalentResolver(self.settings).resolve(
+            "Elemental", PROFILE, [["talents=A"]]
+        )
+        self.assertEqual(talents, ["A"])
+
+
+if __name__ == "__main__":
+    unittest.main()
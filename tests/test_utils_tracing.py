@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from bloodytools.simulations.simulator import Simulator, SimulatorFactory
+from bloodytools.utils import scheduler, tracing
+from bloodytools.utils.config import Config
+from bloodytools.utils.simulation_objects import Simulation_Data
+from tests.test_utils_distributed import FAKE_SIMC, PROFILE
+
+
+def read_spans(path: str) -> list:
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            events = [json.loads(line) for line in f]
+        else:
+            events = json.load(f)
+    return [event for event in events if event["ph"] == "X"]
+
+
+class PotionSimulator(Simulator):
+    @classmethod
+    def name(cls) -> str:
+        return "Potion"
+
+    def add_simulation_data(self, simulation_group, data_dict) -> None:
+        for name in ["baseline", "a", "b", "c"]:
+            simulation_group.add(
+                Simulation_Data(
+                    name=name,
+                    fight_style=self.fight_style,
+                    profile=PROFILE,
+                    simc_arguments=[f"potion={name}"],
+                    executable=self.settings.executable,
+                )
+            )
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        tracing.stop_tracing()
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def thread_span(self) -> None:
+        with tracing.span("thread"):
+            pass
+
+    def test_tags_are_inherited(self):
+        tracing.start_tracing("trace.jsonl")
+        with tracing.span("outer", spec="elemental") as tags:
+            with tracing.span("inner", group="a"):
+                pass
+            tags["profiles"] = 3
+            thread = threading.Thread(target=tracing.propagate(self.thread_span))
+            thread.start()
+            thread.join()
+        with self.assertRaises(ValueError):
+            with tracing.span("failing"):
+                raise ValueError("broken")
+        tracing.stop_tracing()
+
+        spans = {span["name"]: span for span in read_spans("trace.jsonl")}
+        self.assertEqual(spans["inner"]["args"], {"spec": "elemental", "group": "a"})
+        self.assertEqual(spans["outer"]["args"], {"spec": "elemental", "profiles": 3})
+        self.assertEqual(spans["thread"]["args"], {"spec": "elemental"})
+        self.assertNotEqual(spans["thread"]["tid"], spans["outer"]["tid"])
+        self.assertLessEqual(spans["outer"]["ts"], spans["inner"]["ts"])
+        self.assertIn("broken", spans["failing"]["args"]["error"])
+
+    def test_disabled(self):
+        with tracing.span("nothing") as tags:
+            tags["profiles"] = 1
+        self.assertEqual(os.listdir("."), [])
+
+    @unittest.skipIf(os.name != "posix", "fake_simc.py needs to be executable")
+    @mock.patch("bloodytools.utils.utils.get_profile", lambda **kwargs: PROFILE)
+    @mock.patch("bloodytools.simulations.simulator.get_profile", lambda *args: PROFILE)
+    def test_simulator_pipeline(self):
+        factory = SimulatorFactory()
+        factory.register_simulator(PotionSimulator)
+        config = Config(
+            executable=FAKE_SIMC,
+            simc_hash="fakehash",
+            result_cache=False,
+            job_journal="",
+            profileset_shards=2,
+            trace_file=os.path.join("traces", "trace.json"),
+            wow_class_spec_names=[("shaman", "elemental")],
+            simulator_type_names=["potion"],
+            fight_styles=["patchwerk"],
+        )
+        tracing.start_tracing(config.trace_file)
+        results = scheduler.JobScheduler(config, factory).run()
+        tracing.stop_tracing()
+        self.assertTrue(results[0].success)
+
+        spans = read_spans(config.trace_file)
+        names = [span["name"] for span in spans]
+        for name in [
+            "create_base_json_dict",
+            "pre_processing",
+            "add_simulation_data",
+            "simulate",
+            "_collect_data",
+            "post_processing",
+            "_write",
+            "run",
+            "job",
+        ]:
+            self.assertEqual(names.count(name), 1, name)
+        self.assertEqual(names.count("simc"), 2)
+        self.assertEqual(names.count("parse_json"), 2)
+        self.assertEqual(names.count("write_profileset_file"), 2)
+
+        for span in spans:
+            self.assertEqual(span["args"]["spec"], "Elemental Shaman", span["name"])
+            self.assertEqual(span["args"]["fight_style"], "patchwerk", span["name"])
+        add_data = spans[names.index("add_simulation_data")]
+        self.assertEqual(add_data["args"]["profiles"], 4)
+        # shards run in their own threads
+        simc_threads = {span["tid"] for span in spans if span["name"] == "simc"}
+        self.assertEqual(len(simc_threads), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()